@@ -0,0 +1,194 @@
+import json
+from collections import deque
+from datetime import date, datetime, timedelta
+from typing import Any, Callable, Deque, Dict, FrozenSet, List, NamedTuple, Optional, Tuple
+
+
+class RuleContext(NamedTuple):
+    """规则求值时可见的数据"""
+    stats: Dict[str, int]
+    activity: "ActivityTracker"
+    now: float
+
+
+Predicate = Callable[[RuleContext], bool]
+
+
+class CompiledRule(NamedTuple):
+    """编译后的成就规则"""
+    predicate: Predicate
+    inputs: FrozenSet[str]  # 规则依赖的统计项
+    stat: Optional[str]  # 简单阈值规则对应的统计项，用于显示进度
+    threshold: Optional[int]
+
+
+class ActivityTracker:
+    """记录统计项的时间信息，供连续天数（streak）和时间窗口（window）规则使用"""
+
+    def __init__(self):
+        # 连续天数: 统计项 -> [最后活跃日期, 连续天数]
+        self.streaks: Dict[str, List[Any]] = {}
+        # 时间窗口: 统计项 -> (时间戳, 增量) 队列
+        self.recent: Dict[str, Deque[Tuple[float, int]]] = {}
+        # 每个统计项需要保留的最长窗口（秒）
+        self.window_spans: Dict[str, float] = {}
+        self.streak_stats: set = set()
+
+    def watch_streak(self, stat: str) -> None:
+        self.streak_stats.add(stat)
+
+    def watch_window(self, stat: str, seconds: float) -> None:
+        self.window_spans[stat] = max(self.window_spans.get(stat, 0), seconds)
+        self.recent.setdefault(stat, deque())
+
+    def record(self, stat: str, delta: int, now: float) -> None:
+        """记录一次统计项增长，只跟踪被规则引用的统计项"""
+        if delta <= 0:
+            return
+
+        if stat in self.streak_stats:
+            today = datetime.fromtimestamp(now).date()
+            last_day, length = self.streaks.get(stat, (None, 0))
+            if last_day != today.isoformat():
+                yesterday = (today - timedelta(days=1)).isoformat()
+                length = length + 1 if last_day == yesterday else 1
+                self.streaks[stat] = [today.isoformat(), length]
+
+        if stat in self.window_spans:
+            events = self.recent[stat]
+            events.append((now, delta))
+            self._trim(stat, now)
+
+    def _trim(self, stat: str, now: float) -> None:
+        events = self.recent[stat]
+        oldest = now - self.window_spans[stat]
+        while events and events[0][0] < oldest:
+            events.popleft()
+
+    def streak_length(self, stat: str, now: float) -> int:
+        """返回截止今天（或昨天）的连续活跃天数"""
+        if stat not in self.streaks:
+            return 0
+        last_day, length = self.streaks[stat]
+        today = datetime.fromtimestamp(now).date()
+        if date.fromisoformat(last_day) < today - timedelta(days=1):
+            return 0
+        return length
+
+    def window_total(self, stat: str, seconds: float, now: float) -> int:
+        """返回最近 seconds 秒内统计项的增量总和"""
+        if stat not in self.recent:
+            return 0
+        self._trim(stat, now)
+        oldest = now - seconds
+        return sum(delta for ts, delta in self.recent[stat] if ts >= oldest)
+
+    def to_dict(self) -> Dict:
+        """导出需要持久化的数据（时间窗口只在内存中保留）"""
+        return {"streaks": self.streaks}
+
+    def load(self, data: Dict) -> None:
+        """加载（合并）持久化数据，同一统计项保留日期更晚、天数更长的记录"""
+        for stat, value in data.get("streaks", {}).items():
+            if isinstance(value, list) and len(value) == 2:
+                if stat not in self.streaks or tuple(value) > tuple(self.streaks[stat]):
+                    self.streaks[stat] = list(value)
+
+
+def compile_rule(rule: Dict) -> CompiledRule:
+    """
+    将规则描述编译为谓词闭包
+
+    支持的规则:
+        {"stat": 名称, "gte": 阈值}                    统计项达到阈值
+        {"all": [规则...]} / {"any": [规则...]}       与 / 或 组合
+        {"streak": 名称, "days": 天数}                 连续若干天有增长
+        {"window": 名称, "gte": 阈值, "seconds": 秒}   时间窗口内增长达到阈值
+    """
+    if not isinstance(rule, dict):
+        raise ValueError(f"成就规则必须是对象: {rule!r}")
+
+    if "all" in rule or "any" in rule:
+        combinator = all if "all" in rule else any
+        children = [compile_rule(child) for child in rule["all" if "all" in rule else "any"]]
+        if not children:
+            raise ValueError(f"组合规则不能为空: {rule!r}")
+        predicates = tuple(child.predicate for child in children)
+        inputs = frozenset().union(*(child.inputs for child in children))
+        return CompiledRule(lambda ctx: combinator(p(ctx) for p in predicates), inputs, None, None)
+
+    if "streak" in rule:
+        stat = rule["streak"]
+        days = int(rule["days"])
+        return CompiledRule(lambda ctx: ctx.activity.streak_length(stat, ctx.now) >= days,
+                            frozenset([stat]), None, None)
+
+    if "window" in rule:
+        stat = rule["window"]
+        threshold = int(rule["gte"])
+        seconds = float(rule["seconds"])
+        return CompiledRule(lambda ctx: ctx.activity.window_total(stat, seconds, ctx.now) >= threshold,
+                            frozenset([stat]), None, None)
+
+    if "stat" in rule:
+        stat = rule["stat"]
+        if "gt" in rule:
+            threshold = int(rule["gt"]) + 1
+        else:
+            threshold = int(rule["gte"])
+        return CompiledRule(lambda ctx: ctx.stats.get(stat, 0) >= threshold,
+                            frozenset([stat]), stat, threshold)
+
+    raise ValueError(f"未知的成就规则: {rule!r}")
+
+
+def _watch_activity(rule: Dict, activity: ActivityTracker) -> None:
+    """登记规则中用到的时间相关统计项"""
+    for key in ("all", "any"):
+        for child in rule.get(key, []):
+            _watch_activity(child, activity)
+    if "streak" in rule:
+        activity.watch_streak(rule["streak"])
+    if "window" in rule:
+        activity.watch_window(rule["window"], float(rule["seconds"]))
+
+
+def load_definitions(path: str, activity: ActivityTracker) -> Tuple[Dict[str, Dict], Dict[str, CompiledRule]]:
+    """
+    从数据文件加载成就定义并编译规则
+
+    参数:
+        path: 成就定义文件路径
+        activity: 需要登记时间相关统计项的活动记录器
+
+    返回:
+        (成就定义, 成就ID -> 编译后的规则)
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        raw = json.load(f)
+
+    definitions = {}
+    rules = {}
+    for ach_id, ach_def in raw.items():
+        compiled = compile_rule(ach_def["rule"])
+        _watch_activity(ach_def["rule"], activity)
+        rules[ach_id] = compiled
+        definitions[ach_id] = {
+            "title": ach_def["title"],
+            "description": ach_def["description"],
+            "category": ach_def["category"],
+            "icon": ach_def["icon"],
+            "threshold": compiled.threshold,
+            "stat": compiled.stat
+        }
+
+    return definitions, rules
+
+
+def build_dependency_index(rules: Dict[str, CompiledRule]) -> Dict[str, List[str]]:
+    """建立 统计项 -> 依赖它的成就ID 的索引"""
+    index: Dict[str, List[str]] = {}
+    for ach_id, compiled in rules.items():
+        for stat in compiled.inputs:
+            index.setdefault(stat, []).append(ach_id)
+    return index
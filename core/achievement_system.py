@@ -1,23 +1,49 @@
 import json
 import os
+import re
+import threading
+import time
 from datetime import datetime
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from core.achievement_rules import (ActivityTracker, RuleContext,
+                                    build_dependency_index, load_definitions)
+from core.persistence import WriteBehindWriter, get_writer, json_bytes
+from core.stat_counters import InstanceSlot, StatCounters, merge_unlocks
+
+# 默认的成就定义文件，随程序一起发布
+DEFINITIONS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "achievement_definitions.json")
+
+# 每个实例只写自己的分片文件 achievements.<实例编号>.json
+SHARD_PATTERN = re.compile(r"^achievements\.(\w+)\.json$")
 
 
 class AchievementSystem:
     """成就系统，跟踪用户在各个游戏和计算器中的成就"""
 
-    def __init__(self, data_dir: str = "data"):
+    def __init__(self, data_dir: str = "data", definitions_file: str = DEFINITIONS_FILE,
+                 writer: Optional[WriteBehindWriter] = None):
         """初始化成就系统"""
         self.data_dir = data_dir
+        # 旧版所有实例共用的数据文件，现在只读取、不再写入
         self.achievements_file = os.path.join(data_dir, "achievements.json")
 
+        # 写盘交给后台写入服务，锁保护后台线程读取时的数据一致性
+        self.writer = writer or get_writer()
+        self._lock = threading.RLock()
+
         # 确保数据目录存在
         if not os.path.exists(data_dir):
             os.makedirs(data_dir)
 
-        # 初始化成就定义
-        self.achievement_definitions = self._define_achievements()
+        # 认领一个实例编号，本实例只写自己的分片，不会覆盖其他实例写入的进度
+        self.instance = InstanceSlot(data_dir, "achievements")
+        self.shard_file = os.path.join(data_dir, f"achievements.{self.instance.instance_id}.json")
+
+        # 加载成就定义并编译规则，建立 统计项 -> 成就 的依赖索引
+        self.activity = ActivityTracker()
+        self.achievement_definitions, self.rules = load_definitions(definitions_file, self.activity)
+        self.rules_by_stat = build_dependency_index(self.rules)
 
         # 加载或初始化成就数据
         self.achievements = self._load_achievements()
@@ -36,123 +62,33 @@ class AchievementSystem:
             "quickmath_correct_answers": 0
         }
 
+        # 统计数据以可合并的计数器保存，self.stats 是其当前值的缓存
+        self.counters = StatCounters(self.stats.keys(), self.instance.instance_id)
+
         # 加载统计数据
         self._load_stats()
 
-    def _define_achievements(self) -> Dict[str, Dict]:
-        """定义所有可能的成就"""
-        return {
-            # 计算器相关成就
-            "calc_beginner": {
-                "title": "计算新手",
-                "description": "完成10次计算",
-                "category": "calculator",
-                "icon": "🔢",
-                "threshold": 10,
-                "stat": "calculator_total_operations"
-            },
-            "calc_pro": {
-                "title": "计算高手",
-                "description": "完成100次计算",
-                "category": "calculator",
-                "icon": "🧮",
-                "threshold": 100,
-                "stat": "calculator_total_operations"
-            },
-            "calc_master": {
-                "title": "计算大师",
-                "description": "完成1000次计算",
-                "category": "calculator",
-                "icon": "🏆",
-                "threshold": 1000,
-                "stat": "calculator_total_operations"
-            },
-
-            # 二十四点游戏成就
-            "twentyfour_first_win": {
-                "title": "首胜！",
-                "description": "第一次解决二十四点问题",
-                "category": "twentyfour",
-                "icon": "🥇",
-                "threshold": 1,
-                "stat": "twentyfour_games_won"
-            },
-            "twentyfour_50_wins": {
-                "title": "二十四点达人",
-                "description": "解决50个二十四点问题",
-                "category": "twentyfour",
-                "icon": "🌟",
-                "threshold": 50,
-                "stat": "twentyfour_games_won"
-            },
-
-            # 贪吃蛇游戏成就
-            "snake_first_game": {
-                "title": "蛇的诞生",
-                "description": "第一次玩贪吃蛇游戏",
-                "category": "snake",
-                "icon": "🐍",
-                "threshold": 1,
-                "stat": "snake_games_played"
-            },
-            "snake_100_score": {
-                "title": "蛇的成长",
-                "description": "贪吃蛇游戏中获得100分",
-                "category": "snake",
-                "icon": "📈",
-                "threshold": 100,
-                "stat": "snake_high_score"
-            },
-
-            # 俄罗斯方块游戏成就
-            "tetris_first_game": {
-                "title": "方块入门",
-                "description": "第一次玩俄罗斯方块游戏",
-                "category": "tetris",
-                "icon": "🧱",
-                "threshold": 1,
-                "stat": "tetris_games_played"
-            },
-
-            # 速算挑战成就
-            "quickmath_10_correct": {
-                "title": "速算小能手",
-                "description": "速算挑战中获得10个正确答案",
-                "category": "quickmath",
-                "icon": "⚡",
-                "threshold": 10,
-                "stat": "quickmath_correct_answers"
-            },
-            "quickmath_100_correct": {
-                "title": "速算大师",
-                "description": "速算挑战中获得100个正确答案",
-                "category": "quickmath",
-                "icon": "🏅",
-                "threshold": 100,
-                "stat": "quickmath_correct_answers"
-            },
-
-            # 综合成就
-            "all_games_played": {
-                "title": "游戏探索者",
-                "description": "玩过所有类型的游戏",
-                "category": "general",
-                "icon": "🎮",
-                "threshold": None,  # 特殊成就，需要单独检查
-                "stat": None
-            }
-        }
-
-    def _load_achievements(self) -> Dict[str, Dict]:
-        """从文件加载成就数据"""
-        if os.path.exists(self.achievements_file):
+    @staticmethod
+    def _read_data_file(path: str) -> Dict:
+        """读取一个成就文件，文件不存在或损坏时返回空字典"""
+        if os.path.exists(path):
             try:
-                with open(self.achievements_file, 'r', encoding='utf-8') as f:
-                    return json.load(f)
-            except:
+                with open(path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                    if isinstance(data, dict):
+                        return data
+            except (json.JSONDecodeError, IOError):
                 pass
+        return {}
+
+    def _data_files(self) -> List[str]:
+        """旧版共用文件和所有实例的分片文件"""
+        shards = [os.path.join(self.data_dir, name) for name in sorted(os.listdir(self.data_dir))
+                  if SHARD_PATTERN.match(name)]
+        return [self.achievements_file] + shards
 
-        # 初始化成就数据
+    def _load_achievements(self) -> Dict[str, Dict]:
+        """按当前成就定义初始化成就数据，解锁状态在 _load_stats 中从各个文件合并"""
         achievements = {}
         for ach_id, ach_def in self.achievement_definitions.items():
             achievements[ach_id] = {
@@ -167,26 +103,71 @@ class AchievementSystem:
         return achievements
 
     def _load_stats(self) -> None:
-        """从成就文件加载统计数据"""
-        if os.path.exists(self.achievements_file):
-            try:
-                with open(self.achievements_file, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                    if "stats" in data:
-                        # 更新统计数据，保留新添加的统计项
-                        for key, value in data["stats"].items():
-                            if key in self.stats:
-                                self.stats[key] = value
-            except:
-                pass
+        """从所有成就文件加载统计数据"""
+        self.sync_from_disk()
+
+    def sync_from_disk(self) -> List[str]:
+        """
+        合并旧版共用文件和所有实例的分片（由事件总线的后台线程调用，不要在界面线程中调用）
+
+        文件在锁外读取和解析，只有合并内存中的数据时才持有锁，界面线程读取成就时不会等待磁盘。
+        合并可能让成就达到条件，新解锁的成就会登记保存到本实例的分片。
+
+        返回:
+            因此新解锁的成就ID列表
+        """
+        contents = [self._read_data_file(path) for path in self._data_files()]
+        new_achievements = []
+        with self._lock:
+            for data in contents:
+                new_achievements.extend(self._merge_data(data))
+        if new_achievements:
+            self._save_data()
+        return new_achievements
+
+    def _merge_data(self, data: Dict) -> List[str]:
+        """
+        合并磁盘上的数据（可能由另一个程序实例写入），调用方需持有锁
+
+        计数器按实例取最大值合并、最高分取最大值、成就解锁取并集，
+        因此多个实例共用同一个数据目录时不会互相覆盖进度。其他实例的增量
+        可能让成就达到条件，所以合并后重新检查变化的统计项对应的成就。
+
+        返回:
+            新解锁的成就ID列表
+        """
+        before = dict(self.stats)
+        if "stat_counters" in data:
+            self.counters.merge(data["stat_counters"])
+        elif isinstance(data.get("stats"), dict):
+            # 旧版文件只保存了总值
+            self.counters.merge_legacy(data["stats"])
+        merge_unlocks(self.achievements, data)
+        self.activity.load(data.get("activity", {}))
+        self.stats.update(self.counters.values())
+        changed = [stat for stat, value in self.stats.items() if value != before[stat]]
+        return self._check_achievements(changed) if changed else []
 
     def _save_data(self) -> None:
-        """保存成就和统计数据到文件"""
-        data = self.achievements.copy()
-        data["stats"] = self.stats
+        """登记保存成就和统计数据，由后台写入服务合并写盘"""
+        self.writer.schedule(self.shard_file, self._serialize)
+
+    def _serialize(self) -> bytes:
+        """
+        生成本实例分片的内容（在后台写入线程中调用）
+
+        每个实例只写自己的分片，计数器也按实例分开，所以写之前不需要读取其他实例的数据。
+        """
+        with self._lock:
+            data = {ach_id: dict(ach) for ach_id, ach in self.achievements.items()}
+            data["stats"] = dict(self.stats)
+            data["stat_counters"] = self.counters.to_dict()
+            data["activity"] = json.loads(json.dumps(self.activity.to_dict()))
+        return json_bytes(data)
 
-        with open(self.achievements_file, 'w', encoding='utf-8') as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
+    def flush(self) -> None:
+        """立即把待写入的数据写盘"""
+        self.writer.flush()
 
     def update_stat(self, stat_name: str, value: int = 1, is_increment: bool = True) -> List[str]:
         """
@@ -195,58 +176,80 @@ class AchievementSystem:
         参数:
             stat_name: 统计项名称
             value: 数值（如果是增量则为增加的值，否则为新值）
-            is_increment: 是否为增量更新
+            is_increment: 是否为增量更新（计数类统计项只会增长，不能设为更小的值）
 
         返回:
             新解锁的成就ID列表
         """
-        if stat_name not in self.stats:
-            return []
+        return self.update_stats([(stat_name, value, is_increment)])
 
-        # 更新统计数据
-        if is_increment:
-            self.stats[stat_name] += value
-        else:
-            # 对于高分等统计，只保留最大值
-            if stat_name.endswith("_high_score"):
-                self.stats[stat_name] = max(self.stats[stat_name], value)
-            else:
-                self.stats[stat_name] = value
+    def update_stats(self, updates: List[Tuple[str, int, bool]]) -> List[str]:
+        """
+        批量更新统计数据，只检查一次成就、只登记一次保存
 
-        # 检查是否解锁新成就
-        new_achievements = self._check_achievements()
+        参数:
+            updates: (统计项名称, 数值, 是否为增量) 列表，未知的统计项会被忽略
+
+        返回:
+            新解锁的成就ID列表
+        """
+        changed = []
+        with self._lock:
+            now = self._now()
+            for stat_name, value, is_increment in updates:
+                if stat_name not in self.stats:
+                    continue
+
+                # 更新统计数据
+                old_value = self.stats[stat_name]
+                if is_increment:
+                    self.counters.increment(stat_name, value)
+                else:
+                    # 对于高分等统计，只保留最大值
+                    self.counters.set_value(stat_name, value)
+                self.stats[stat_name] = self.counters.value(stat_name)
+                self.activity.record(stat_name, self.stats[stat_name] - old_value, now)
+                changed.append(stat_name)
+
+            if not changed:
+                return []
+
+            # 只检查依赖这些统计项的成就
+            new_achievements = self._check_achievements(changed)
 
         # 保存数据
         self._save_data()
 
         return new_achievements
 
-    def _check_achievements(self) -> List[str]:
-        """检查是否有新成就可以解锁"""
-        new_achievements = []
+    def _now(self) -> float:
+        """当前时间戳（测试中可替换）"""
+        return time.time()
 
-        # 检查常规成就
-        for ach_id, ach_def in self.achievement_definitions.items():
+    def _check_achievements(self, changed_stats: Optional[Iterable[str]] = None) -> List[str]:
+        """
+        检查是否有新成就可以解锁
+
+        参数:
+            changed_stats: 发生变化的统计项，为None时检查全部成就
+        """
+        if changed_stats is None:
+            candidates = list(self.rules)
+        else:
+            candidates = []
+            for stat in changed_stats:
+                for ach_id in self.rules_by_stat.get(stat, []):
+                    if ach_id not in candidates:
+                        candidates.append(ach_id)
+
+        new_achievements = []
+        context = RuleContext(self.stats, self.activity, self._now())
+        for ach_id in candidates:
             # 已解锁的成就不再检查
             if self.achievements[ach_id]["unlocked"]:
                 continue
 
-            # 处理特殊成就
-            if ach_id == "all_games_played":
-                if (self.stats["twentyfour_games_played"] > 0 and
-                        self.stats["snake_games_played"] > 0 and
-                        self.stats["tetris_games_played"] > 0 and
-                        self.stats["quickmath_games_played"] > 0):
-                    self._unlock_achievement(ach_id)
-                    new_achievements.append(ach_id)
-                continue
-
-            # 检查常规成就
-            stat_name = ach_def["stat"]
-            threshold = ach_def["threshold"]
-
-            if (stat_name in self.stats and
-                    self.stats[stat_name] >= threshold):
+            if self.rules[ach_id].predicate(context):
                 self._unlock_achievement(ach_id)
                 new_achievements.append(ach_id)
 
@@ -269,12 +272,13 @@ class AchievementSystem:
             已解锁成就的列表
         """
         unlocked = []
-        for ach in self.achievements.values():
-            if ach["unlocked"] and (category is None or ach["category"] == category):
-                unlocked.append(ach)
+        with self._lock:
+            for ach_id, ach in self.achievements.items():
+                if ach["unlocked"] and (category is None or ach["category"] == category):
+                    unlocked.append({"id": ach_id, **ach})
 
         # 按解锁时间排序
-        return sorted(unlocked, key=lambda x: x["unlocked_at"], reverse=True)
+        return sorted(unlocked, key=lambda x: x["unlocked_at"] or "", reverse=True)
 
     def get_locked_achievements(self, category: Optional[str] = None) -> List[Dict]:
         """
@@ -287,23 +291,25 @@ class AchievementSystem:
             未解锁成就的列表
         """
         locked = []
-        for ach_id, ach in self.achievements.items():
-            if not ach["unlocked"] and (category is None or ach["category"] == category):
-                # 添加进度信息
-                progress = 0
-                total = 0
-
-                if ach_id in self.achievement_definitions:
-                    def_data = self.achievement_definitions[ach_id]
-                    if def_data["stat"] and def_data["threshold"]:
-                        total = def_data["threshold"]
-                        progress = min(self.stats.get(def_data["stat"], 0), total)
-
-                locked.append({
-                    **ach,
-                    "progress": progress,
-                    "total": total
-                })
+        with self._lock:
+            for ach_id, ach in self.achievements.items():
+                if not ach["unlocked"] and (category is None or ach["category"] == category):
+                    # 添加进度信息
+                    progress = 0
+                    total = 0
+
+                    if ach_id in self.achievement_definitions:
+                        def_data = self.achievement_definitions[ach_id]
+                        if def_data["stat"] and def_data["threshold"]:
+                            total = def_data["threshold"]
+                            progress = min(self.stats.get(def_data["stat"], 0), total)
+
+                    locked.append({
+                        "id": ach_id,
+                        **ach,
+                        "progress": progress,
+                        "total": total
+                    })
 
         return locked
 
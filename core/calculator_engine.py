@@ -9,7 +9,7 @@ from core.history_manager import HistoryManager
 class CalculatorEngine:
     """计算器核心引擎，修复小数运算问题"""
 
-    def __init__(self):
+    def __init__(self, history_manager: Optional[HistoryManager] = None):
         self.operators = {
             '+': operator.add,
             '-': operator.sub,
@@ -22,7 +22,7 @@ class CalculatorEngine:
             '%': operator.mod
         }
         self.current_expression = ""
-        self.history_manager = HistoryManager()
+        self.history_manager = history_manager or HistoryManager()
         self.last_result = None
 
     def safe_divide(self, a: float, b: float) -> float:
@@ -0,0 +1,177 @@
+import queue
+import threading
+from collections import Counter
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Tuple
+
+
+@dataclass(frozen=True)
+class GameEvent:
+    """游戏事件基类"""
+
+
+@dataclass(frozen=True)
+class GameStarted(GameEvent):
+    """开始了一局游戏"""
+    game: str
+
+
+@dataclass(frozen=True)
+class GameWon(GameEvent):
+    """赢得一局（或解出一道题）"""
+    game: str
+
+
+@dataclass(frozen=True)
+class AnswerCorrect(GameEvent):
+    """答对一道题"""
+    game: str
+
+
+@dataclass(frozen=True)
+class ScoreReported(GameEvent):
+    """一局结束时的得分"""
+    game: str
+    score: int
+
+
+@dataclass(frozen=True)
+class CalculationDone(GameEvent):
+    """计算器完成一次计算"""
+
+
+@dataclass(frozen=True)
+class SessionFinished(GameEvent):
+    """一局游戏结束，写入时间序列存储供进度图表使用"""
+    game: str
+    score: int = 0
+    correct: int = 0
+    attempts: int = 0
+    avg_response_ms: float = 0.0
+
+
+# 统计更新: (统计项, 数值, 是否为增量)
+StatUpdate = Tuple[str, int, bool]
+
+# 事件类型 -> 对应的统计更新
+EVENT_HANDLERS: Dict[type, Callable[[GameEvent], StatUpdate]] = {
+    GameStarted: lambda e: (f"{e.game}_games_played", 1, True),
+    GameWon: lambda e: (f"{e.game}_games_won", 1, True),
+    AnswerCorrect: lambda e: (f"{e.game}_correct_answers", 1, True),
+    ScoreReported: lambda e: (f"{e.game}_high_score", e.score, False),
+    CalculationDone: lambda e: ("calculator_total_operations", 1, True),
+}
+
+
+class AchievementEventBus:
+    """
+    游戏事件总线
+
+    界面只负责发布事件；后台线程把一批事件合并成统计更新，交给成就系统统一检查
+    和保存，新解锁的成就通过 on_unlocked 回调送回（界面层用排队信号转回 GUI 线程）。
+    更新统计前先合并其他程序实例写入的成就数据，由此解锁的成就同样通过 on_unlocked 回报。
+    无法识别的事件会被计数并报告，而不是被悄悄丢弃。
+    """
+
+    def __init__(self, achievement_system, on_unlocked: Optional[Callable[[List[str]], None]] = None,
+                 batch_size: int = 64, session_store=None, leaderboards=None, player_name: str = ""):
+        """
+        参数:
+            achievement_system: 接收统计更新的成就系统
+            on_unlocked: 有新成就解锁时在后台线程中调用，参数为成就ID列表
+            batch_size: 每批最多合并的事件数
+            session_store: 可选，接收 SessionFinished 事件的时间序列存储
+            leaderboards: 可选，接收 SessionFinished 事件得分的排行榜
+            player_name: 排行榜上显示的当前档案名称
+        """
+        self.achievement_system = achievement_system
+        self.session_store = session_store
+        self.leaderboards = leaderboards
+        self.player_name = player_name
+        self.on_unlocked = on_unlocked
+        self.batch_size = batch_size
+        self.unknown_events: Counter = Counter()
+        self._queue: "queue.Queue[Optional[GameEvent]]" = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name="achievement-events", daemon=True)
+        self._thread.start()
+
+    def publish(self, event: GameEvent) -> None:
+        """发布事件（立即返回，不等待处理）"""
+        self._queue.put(event)
+
+    def flush(self) -> None:
+        """等待已发布的事件全部处理完"""
+        self._queue.join()
+
+    def close(self) -> None:
+        """处理完剩余事件后停止后台线程"""
+        self._queue.put(None)
+        self._thread.join(timeout=5)
+
+    def get_unknown_events(self) -> Dict[str, int]:
+        """返回无法识别的事件及其次数"""
+        return dict(self.unknown_events)
+
+    def _run(self) -> None:
+        while True:
+            batch = [self._queue.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            stop = None in batch
+            try:
+                self._process([event for event in batch if event is not None])
+            except Exception as e:
+                print(f"处理游戏事件失败: {e}")
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+            if stop:
+                return
+
+    def _process(self, events: List[GameEvent]) -> None:
+        """把一批事件合并为统计更新并交给成就系统"""
+        achievement_system = self.achievement_system
+        increments: Dict[str, int] = {}
+        values: Dict[str, int] = {}
+
+        for event in events:
+            if isinstance(event, SessionFinished):
+                if self.session_store is not None:
+                    self.session_store.append(event.game, event.score, event.correct,
+                                              event.attempts, event.avg_response_ms)
+                if self.leaderboards is not None:
+                    self.leaderboards.submit(event.game, event.score, self.player_name)
+                continue
+
+            handler = EVENT_HANDLERS.get(type(event))
+            if handler is None:
+                self._report_unknown(type(event).__name__)
+                continue
+            stat, value, is_increment = handler(event)
+            if stat not in achievement_system.stats:
+                self._report_unknown(f"{type(event).__name__}:{stat}")
+                continue
+            if is_increment:
+                increments[stat] = increments.get(stat, 0) + value
+            else:
+                values[stat] = max(values.get(stat, value), value)
+
+        updates = [(stat, value, True) for stat, value in increments.items()]
+        updates += [(stat, value, False) for stat, value in values.items()]
+        if not updates:
+            return
+
+        # 其他实例的进度可能让成就达到条件，读盘在这个后台线程中进行
+        unlocked = achievement_system.sync_from_disk()
+        unlocked += achievement_system.update_stats(updates)
+        if unlocked and self.on_unlocked:
+            self.on_unlocked(unlocked)
+
+    def _report_unknown(self, name: str) -> None:
+        if name not in self.unknown_events:
+            print(f"未知的游戏事件: {name}")
+        self.unknown_events[name] += 1
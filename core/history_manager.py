@@ -1,17 +1,23 @@
 import json
 import os
+import threading
 from datetime import datetime
-from typing import List, Dict
+from typing import List, Dict, Optional
+
+from core.persistence import WriteBehindWriter, get_writer, json_bytes
 
 
 class HistoryManager:
     """管理计算历史记录的持久化存储和读取"""
 
-    def __init__(self, data_dir: str = "data", filename: str = "history.json"):
+    def __init__(self, data_dir: str = "data", filename: str = "history.json",
+                 writer: Optional[WriteBehindWriter] = None):
         """初始化历史记录管理器"""
         self.data_dir = data_dir
         self.filename = filename
         self.file_path = os.path.join(data_dir, filename)
+        self.writer = writer or get_writer()
+        self._lock = threading.Lock()
 
         # 确保数据目录存在
         if not os.path.exists(data_dir):
@@ -32,12 +38,18 @@ class HistoryManager:
         return []
 
     def _save_history(self) -> None:
-        """将历史记录保存到文件"""
-        try:
-            with open(self.file_path, 'w', encoding='utf-8') as f:
-                json.dump(self.history, f, ensure_ascii=False, indent=2)
-        except IOError as e:
-            print(f"保存历史记录失败: {e}")
+        """登记保存历史记录，由后台写入服务合并写盘"""
+        self.writer.schedule(self.file_path, self._serialize)
+
+    def _serialize(self) -> bytes:
+        """生成历史记录文件内容（在后台写入线程中调用）"""
+        with self._lock:
+            history = list(self.history)
+        return json_bytes(history)
+
+    def flush(self) -> None:
+        """立即把待写入的历史记录写盘"""
+        self.writer.flush()
 
     def add_entry(self, expression: str, result: str, timestamp: datetime) -> None:
         """
@@ -54,12 +66,13 @@ class HistoryManager:
             "timestamp": timestamp.isoformat()
         }
 
-        # 添加到历史记录列表
-        self.history.append(entry)
+        with self._lock:
+            # 添加到历史记录列表
+            self.history.append(entry)
 
-        # 限制历史记录数量，只保留最近的100条
-        if len(self.history) > 100:
-            self.history = self.history[-100:]
+            # 限制历史记录数量，只保留最近的100条
+            if len(self.history) > 100:
+                self.history = self.history[-100:]
 
         # 保存到文件
         self._save_history()
@@ -84,7 +97,8 @@ class HistoryManager:
             是否删除成功
         """
         if 0 <= index < len(self.history):
-            del self.history[index]
+            with self._lock:
+                del self.history[index]
             self._save_history()
             return True
         return False
@@ -0,0 +1,164 @@
+import os
+import struct
+import threading
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from core.persistence import WriteBehindWriter, get_writer
+
+MAGIC = b"LAT1"
+HEADER = struct.Struct("<4sI")  # 魔数, 记录数
+
+# 每个 (运算符, 分位数) 一条: 运算符, 百分位, 观测数, 5个标记的高度, 5个标记的位置
+SKETCH_RECORD = struct.Struct("<cBxxI5d5I")
+
+
+class P2Quantile:
+    """
+    P² 流式分位数估计（Jain & Chlamtac），只保存5个标记，不保存观测值
+
+    标记的期望位置只取决于观测数，所以持久化时只需要保存高度和实际位置。
+    """
+
+    def __init__(self, p: float, count: int = 0, heights: Sequence[float] = (),
+                 positions: Sequence[int] = ()):
+        """
+        参数:
+            p: 分位数（0-1），例如0.9
+            count: 已有的观测数
+            heights, positions: 恢复保存的状态时传入
+        """
+        if not 0 < p < 1:
+            raise ValueError("分位数必须在0和1之间")
+        self.p = p
+        self.count = count
+        self.heights: List[float] = list(heights)[:min(count, 5)]
+        self.positions: List[int] = list(positions) if count >= 5 else [1, 2, 3, 4, 5]
+        self._increments = (0.0, p / 2, p, (1 + p) / 2, 1.0)
+
+    def add(self, x: float) -> None:
+        """加入一个观测值，O(1)"""
+        self.count += 1
+        q, n = self.heights, self.positions
+        if self.count <= 5:
+            q.append(x)
+            q.sort()
+            return
+
+        if x < q[0]:
+            q[0] = x
+            k = 0
+        elif x >= q[4]:
+            q[4] = x
+            k = 3
+        else:
+            k = next(i for i in range(4) if q[i] <= x < q[i + 1])
+        for i in range(k + 1, 5):
+            n[i] += 1
+
+        for i in (1, 2, 3):
+            desired = 1 + (self.count - 1) * self._increments[i]
+            d = desired - n[i]
+            if (d >= 1 and n[i + 1] - n[i] > 1) or (d <= -1 and n[i - 1] - n[i] < -1):
+                step = 1 if d > 0 else -1
+                height = self._parabolic(i, step)
+                if not q[i - 1] < height < q[i + 1]:
+                    height = q[i] + step * (q[i + step] - q[i]) / (n[i + step] - n[i])
+                q[i] = height
+                n[i] += step
+
+    def _parabolic(self, i: int, d: int) -> float:
+        q, n = self.heights, self.positions
+        return q[i] + d / (n[i + 1] - n[i - 1]) * (
+            (n[i] - n[i - 1] + d) * (q[i + 1] - q[i]) / (n[i + 1] - n[i])
+            + (n[i + 1] - n[i] - d) * (q[i] - q[i - 1]) / (n[i] - n[i - 1]))
+
+    def value(self) -> Optional[float]:
+        """当前的分位数估计，还没有观测值时返回None"""
+        if self.count == 0:
+            return None
+        if self.count < 5:
+            return self.heights[min(int(self.p * self.count), self.count - 1)]
+        return self.heights[2]
+
+
+class LatencyStats:
+    """
+    一个档案按运算符统计的答题用时分位数（p50/p90）
+
+    每个运算符的每个分位数一个 P2Quantile，状态以定长二进制保存在 <data_dir>/latency.bin。
+    可以用于调整答题时限和生成学习报告。
+    """
+
+    QUANTILES = (0.5, 0.9)
+
+    def __init__(self, data_dir: str = "data", writer: Optional[WriteBehindWriter] = None):
+        self.path = os.path.join(data_dir, "latency.bin")
+        self.writer = writer or get_writer()
+        self._lock = threading.Lock()
+        self._sketches: Dict[Tuple[str, float], P2Quantile] = self._load()
+
+    def _load(self) -> Dict[Tuple[str, float], P2Quantile]:
+        if not os.path.exists(self.path):
+            return {}
+        try:
+            with open(self.path, 'rb') as f:
+                data = f.read()
+            magic, count = HEADER.unpack_from(data, 0)
+            if magic != MAGIC or len(data) != HEADER.size + count * SKETCH_RECORD.size:
+                raise ValueError("文件格式不正确")
+        except (IOError, struct.error, ValueError) as e:
+            print(f"加载答题用时数据失败: {e}")
+            return {}
+        sketches = {}
+        for record in SKETCH_RECORD.iter_unpack(data[HEADER.size:]):
+            op, percent, observations = record[0].decode('ascii'), record[1], record[2]
+            p = percent / 100
+            sketches[(op, p)] = P2Quantile(p, observations, record[3:8], record[8:13])
+        return sketches
+
+    def _serialize(self) -> bytes:
+        with self._lock:
+            records = [SKETCH_RECORD.pack(op.encode('ascii'), round(p * 100), s.count,
+                                          *(s.heights + [0.0] * (5 - len(s.heights))), *s.positions)
+                       for (op, p), s in self._sketches.items()]
+        return HEADER.pack(MAGIC, len(records)) + b"".join(records)
+
+    def record(self, op: str, response_ms: float) -> None:
+        """
+        记录一次答题用时
+
+        参数:
+            op: 运算符
+            response_ms: 从出题到提交的用时（毫秒）
+        """
+        with self._lock:
+            for p in self.QUANTILES:
+                sketch = self._sketches.get((op, p))
+                if sketch is None:
+                    sketch = self._sketches[(op, p)] = P2Quantile(p)
+                sketch.add(response_ms)
+        self.writer.schedule(self.path, self._serialize)
+
+    def quantile(self, op: str, p: float) -> Optional[float]:
+        """某个运算符答题用时的分位数（毫秒），没有数据时返回None"""
+        with self._lock:
+            sketch = self._sketches.get((op, p))
+            return sketch.value() if sketch is not None else None
+
+    def count(self, op: str) -> int:
+        """某个运算符已记录的答题数"""
+        with self._lock:
+            sketch = self._sketches.get((op, self.QUANTILES[0]))
+            return sketch.count if sketch is not None else 0
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        """
+        各运算符的用时汇总
+
+        返回:
+            {运算符: {"count": 答题数, "p50": 中位数(毫秒), "p90": 90分位数(毫秒)}}
+        """
+        ops = sorted({op for op, _ in self._sketches})
+        return {op: {"count": self.count(op),
+                     **{f"p{round(p * 100)}": self.quantile(op, p) for p in self.QUANTILES}}
+                for op in ops}
@@ -0,0 +1,113 @@
+import json
+import os
+import threading
+from bisect import bisect_right
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from core.persistence import WriteBehindWriter, get_writer, json_bytes
+
+LEADERBOARD_GAMES = ("snake", "tetris", "quickmath")
+
+
+class Leaderboard:
+    """
+    单个游戏的前K名排行榜
+
+    条目按 (分数降序, 日期升序) 保存在有序数组中：同分时先达到的排在前面。
+    插入位置用二分查找定位（O(log K)），超出K名的条目直接丢弃。
+    """
+
+    def __init__(self, k: int = 10):
+        self.k = k
+        self.entries: List[Dict] = []
+        self._keys: List[Tuple[int, str]] = []
+
+    @staticmethod
+    def _key(score: int, date: str) -> Tuple[int, str]:
+        return (-score, date)
+
+    def qualifies(self, score: int, date: str) -> bool:
+        """判断分数能否进入排行榜"""
+        return len(self.entries) < self.k or self._key(score, date) < self._keys[-1]
+
+    def submit(self, score: int, name: str, date: Optional[str] = None) -> Optional[int]:
+        """
+        提交一局成绩
+
+        参数:
+            score: 分数
+            name: 档案名称
+            date: 达成时间（ISO 格式），默认为当前时间
+
+        返回:
+            进入排行榜时的名次（从1开始），否则返回None
+        """
+        if date is None:
+            date = datetime.now().isoformat(timespec="seconds")
+        if not self.qualifies(score, date):
+            return None
+
+        key = self._key(score, date)
+        index = bisect_right(self._keys, key)
+        self._keys.insert(index, key)
+        self.entries.insert(index, {"score": score, "name": name, "date": date})
+        if len(self.entries) > self.k:
+            self._keys.pop()
+            self.entries.pop()
+        return index + 1
+
+    def to_list(self) -> List[Dict]:
+        return [dict(entry) for entry in self.entries]
+
+    def load(self, entries: List[Dict]) -> None:
+        for entry in entries:
+            self.submit(int(entry["score"]), entry["name"], entry["date"])
+
+
+class LeaderboardStore:
+    """本机所有档案共享的排行榜，保存在 <data_dir>/leaderboards.json"""
+
+    def __init__(self, data_dir: str = "data", k: int = 10, writer: Optional[WriteBehindWriter] = None):
+        self.file_path = os.path.join(data_dir, "leaderboards.json")
+        self.writer = writer or get_writer()
+        self._lock = threading.Lock()
+        self.boards: Dict[str, Leaderboard] = {game: Leaderboard(k) for game in LEADERBOARD_GAMES}
+        self._load()
+
+    def _load(self) -> None:
+        if not os.path.exists(self.file_path):
+            return
+        try:
+            with open(self.file_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (json.JSONDecodeError, IOError):
+            return
+        for game, entries in data.items():
+            if game in self.boards and isinstance(entries, list):
+                self.boards[game].load(entries)
+
+    def _serialize(self) -> bytes:
+        with self._lock:
+            data = {game: board.to_list() for game, board in self.boards.items()}
+        return json_bytes(data)
+
+    def submit(self, game: str, score: int, name: str, date: Optional[str] = None) -> Optional[int]:
+        """
+        提交一局成绩，只有排行榜发生变化时才登记写盘
+
+        返回:
+            进入排行榜时的名次，否则返回None（不记录排行榜的游戏也返回None）
+        """
+        if game not in self.boards:
+            return None
+        with self._lock:
+            rank = self.boards[game].submit(score, name, date)
+        if rank is not None:
+            self.writer.schedule(self.file_path, self._serialize)
+        return rank
+
+    def top(self, game: str) -> List[Dict]:
+        """返回指定游戏的排行榜条目"""
+        with self._lock:
+            return self.boards[game].to_list()
@@ -0,0 +1,137 @@
+import os
+import struct
+import threading
+import time
+from typing import Dict, NamedTuple, Optional, Tuple
+
+from core.persistence import WriteBehindWriter, get_writer
+
+# 技能键: (运算符, 数1, 数2)，例如 ('*', 7, 8) 表示"7×8"这一题族
+Skill = Tuple[str, int, int]
+
+MAGIC = b"QMM1"
+HEADER = struct.Struct("<4sI")  # 魔数, 技能数
+
+# 每个技能一条: 运算符, 数1, 数2, 答题数, 答对数, 掌握度, 最近答题时间
+SKILL_RECORD = struct.Struct("<cBBxHHfd")
+
+
+class SkillState(NamedTuple):
+    """一个技能的掌握情况"""
+    attempts: int
+    correct: int
+    mastery: float  # 估计的答对概率（0-1）
+    last_seen: float  # 最近一次答题的时间戳，从未答过为0
+
+
+class MasteryModel:
+    """
+    一个档案的技能掌握度模型
+
+    每答一题按结果更新该题族的掌握度（指数滑动平均，前几次答题更新得快）。
+    掌握度高于初始值的部分会随时间遗忘，答对的次数越多忘得越慢（见 recall）。
+    数据以定长二进制记录保存在 <data_dir>/mastery.bin，加载时一次解包，不需要解析 JSON。
+    """
+
+    PRIOR = 0.6  # 没答过的题族的初始掌握度
+    MIN_RATE = 0.25  # 更新速率的下限
+    SLOW_MS = 8000  # 答对但超过这个时间只算部分掌握
+    SLOW_CREDIT = 0.7
+    HALF_LIFE = 3 * 24 * 3600.0  # 遗忘的半衰期（秒），每答对一次再延长一倍
+
+    def __init__(self, data_dir: str = "data", writer: Optional[WriteBehindWriter] = None):
+        self.path = os.path.join(data_dir, "mastery.bin")
+        self.writer = writer or get_writer()
+        self._lock = threading.Lock()
+        self._skills: Dict[Skill, SkillState] = self._load()
+
+    def _load(self) -> Dict[Skill, SkillState]:
+        if not os.path.exists(self.path):
+            return {}
+        try:
+            with open(self.path, 'rb') as f:
+                data = f.read()
+            magic, count = HEADER.unpack_from(data, 0)
+            if magic != MAGIC or len(data) != HEADER.size + count * SKILL_RECORD.size:
+                raise ValueError("文件格式不正确")
+        except (IOError, struct.error, ValueError) as e:
+            print(f"加载掌握度数据失败: {e}")
+            return {}
+        skills = {}
+        for op, a, b, attempts, correct, mastery, last_seen in SKILL_RECORD.iter_unpack(data[HEADER.size:]):
+            skills[(op.decode('ascii'), a, b)] = SkillState(attempts, correct, mastery, last_seen)
+        return skills
+
+    def _serialize(self) -> bytes:
+        with self._lock:
+            items = list(self._skills.items())
+        parts = [HEADER.pack(MAGIC, len(items))]
+        parts.extend(SKILL_RECORD.pack(op.encode('ascii'), a, b, *state) for (op, a, b), state in items)
+        return b"".join(parts)
+
+    def __len__(self) -> int:
+        return len(self._skills)
+
+    def state(self, skill: Skill) -> SkillState:
+        """技能的掌握情况，没答过时返回初始值"""
+        return self._skills.get(skill) or SkillState(0, 0, self.PRIOR, 0.0)
+
+    def mastery(self, skill: Skill) -> float:
+        return self.state(skill).mastery
+
+    def recall(self, skill: Skill, now: Optional[float] = None) -> float:
+        """
+        考虑遗忘后，现在答对该题族的估计概率
+
+        参数:
+            skill: 技能键
+            now: 当前时间戳，默认为当前时间
+
+        返回:
+            0-1之间的值，不会低于初始掌握度以下的部分（答错积累的弱项不会因为时间而"好转"）
+        """
+        state = self.state(skill)
+        if state.last_seen <= 0 or state.mastery <= self.PRIOR:
+            return state.mastery
+        elapsed = max(0.0, (time.time() if now is None else now) - state.last_seen)
+        half_life = self.HALF_LIFE * (1 + state.correct)
+        return self.PRIOR + (state.mastery - self.PRIOR) * 0.5 ** (elapsed / half_life)
+
+    def expected_gain(self, skill: Skill, now: Optional[float] = None) -> float:
+        """
+        练习一道该题族的题目预计的收获：答错的概率越大，练习越有用，很久没练的题族也会逐渐变得值得复习
+
+        参数:
+            skill: 技能键
+            now: 当前时间戳，默认为当前时间
+
+        返回:
+            0-1之间的值
+        """
+        return 1.0 - self.recall(skill, now)
+
+    def record(self, skill: Skill, correct: bool, response_ms: Optional[float] = None,
+               timestamp: Optional[float] = None) -> float:
+        """
+        记录一次答题结果
+
+        参数:
+            skill: 技能键
+            correct: 是否答对
+            response_ms: 答题用时（毫秒），答对但很慢时只算部分掌握
+            timestamp: 答题时间，默认为当前时间
+
+        返回:
+            更新后的掌握度
+        """
+        outcome = 0.0
+        if correct:
+            outcome = self.SLOW_CREDIT if response_ms is not None and response_ms > self.SLOW_MS else 1.0
+        with self._lock:
+            old = self._skills.get(skill) or SkillState(0, 0, self.PRIOR, 0.0)
+            rate = max(self.MIN_RATE, 1.0 / (old.attempts + 2))
+            mastery = old.mastery + rate * (outcome - old.mastery)
+            self._skills[skill] = SkillState(min(old.attempts + 1, 0xFFFF), min(old.correct + bool(correct), 0xFFFF),
+                                             mastery, time.time() if timestamp is None else timestamp)
+        self.writer.schedule(self.path, self._serialize)
+        return mastery
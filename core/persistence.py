@@ -0,0 +1,151 @@
+import atexit
+import json
+import os
+import tempfile
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+
+def atomic_write(path: str, data: bytes) -> None:
+    """
+    原子地写入文件：先写临时文件并 fsync，再重命名覆盖目标文件
+
+    参数:
+        path: 目标文件路径
+        data: 要写入的字节内容
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    if not os.path.exists(directory):
+        os.makedirs(directory)
+
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".tmp-", suffix=os.path.basename(path))
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def json_bytes(data: Any) -> bytes:
+    """按项目统一格式把数据序列化为 JSON 字节"""
+    return json.dumps(data, ensure_ascii=False, indent=2).encode('utf-8')
+
+
+class WriteBehindWriter:
+    """
+    后台写入服务
+
+    调用方只登记"某个文件已变脏"以及生成文件内容的函数，真正的写盘在后台线程中
+    按防抖间隔进行；同一文件在一个间隔内的多次修改只会写一次。程序退出时会写出
+    所有尚未落盘的内容。
+    """
+
+    def __init__(self, delay: float = 1.0):
+        """
+        参数:
+            delay: 第一次变脏到写盘之间的最长等待时间（秒）
+        """
+        self.delay = delay
+        self._pending: Dict[str, Callable[[], bytes]] = {}
+        self._first_dirty: Optional[float] = None
+        self._condition = threading.Condition()
+        self._write_lock = threading.Lock()
+        self._in_flight = 0  # 后台线程已取出、正在写的批次数
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="write-behind", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def schedule(self, path: str, serializer: Callable[[], bytes]) -> None:
+        """
+        标记文件需要写入
+
+        参数:
+            path: 目标文件路径
+            serializer: 在写盘时调用，返回文件的完整内容
+        """
+        with self._condition:
+            if self._closed:
+                # 退出流程中仍有写入请求时直接同步写出
+                self._write(path, serializer)
+                return
+            self._pending[path] = serializer
+            if self._first_dirty is None:
+                self._first_dirty = time.monotonic()
+                self._condition.notify_all()
+
+    def flush(self) -> None:
+        """立即写出所有待写入的文件（阻塞直到完成，包括后台线程正在写的文件）"""
+        with self._condition:
+            pending = self._take_pending()
+        self._write_all(pending)
+        with self._condition:
+            while self._in_flight:
+                self._condition.wait()
+
+    def close(self) -> None:
+        """停止后台线程并写出剩余内容"""
+        with self._condition:
+            if self._closed:
+                return
+            self._closed = True
+            self._condition.notify_all()
+        self._thread.join(timeout=5)
+        self.flush()
+
+    def _take_pending(self) -> Dict[str, Callable[[], bytes]]:
+        pending = self._pending
+        self._pending = {}
+        self._first_dirty = None
+        return pending
+
+    def _run(self) -> None:
+        while True:
+            with self._condition:
+                while not self._closed and self._first_dirty is None:
+                    self._condition.wait()
+                if self._closed:
+                    return
+                remaining = self._first_dirty + self.delay - time.monotonic()
+                if remaining > 0:
+                    self._condition.wait(remaining)
+                    continue
+                pending = self._take_pending()
+                self._in_flight += 1
+            try:
+                self._write_all(pending)
+            finally:
+                with self._condition:
+                    self._in_flight -= 1
+                    self._condition.notify_all()
+
+    def _write_all(self, pending: Dict[str, Callable[[], bytes]]) -> None:
+        for path, serializer in pending.items():
+            self._write(path, serializer)
+
+    def _write(self, path: str, serializer: Callable[[], bytes]) -> None:
+        # 同一时间只允许一个线程写盘，避免 flush 与后台线程交错写同一文件
+        with self._write_lock:
+            try:
+                atomic_write(path, serializer())
+            except Exception as e:
+                print(f"保存文件失败 {path}: {e}")
+
+
+_default_writer: Optional[WriteBehindWriter] = None
+_default_writer_lock = threading.Lock()
+
+
+def get_writer() -> WriteBehindWriter:
+    """返回全局共享的后台写入服务"""
+    global _default_writer
+    with _default_writer_lock:
+        if _default_writer is None:
+            _default_writer = WriteBehindWriter()
+        return _default_writer
@@ -0,0 +1,109 @@
+import threading
+from collections import deque
+from typing import Callable, Deque, Generic, TypeVar
+
+T = TypeVar("T")
+
+
+class PrefetchQueue(Generic[T]):
+    """
+    后台预先生成题目的有界队列
+
+    后台线程按当前难度调用 producer 生成题目，放进容量为 capacity 的队列；
+    取走题目后队列长度低于 low_watermark 时再补满。界面点"下一题"时直接从队列取，
+    不必在 GUI 线程上等待求解。切换难度时清空队列并按新难度重新生成。
+    """
+
+    def __init__(self, producer: Callable[[int], T], difficulty: int = 1, capacity: int = 8,
+                 low_watermark: int = 3, name: str = "prefetch"):
+        """
+        参数:
+            producer: 生成一道题目的函数，参数为难度（在后台线程中调用，不能修改界面状态）
+            difficulty: 初始难度
+            capacity: 队列容量
+            low_watermark: 队列长度低于此值时开始补充
+            name: 后台线程名称
+        """
+        if not 0 <= low_watermark < capacity:
+            raise ValueError("预取队列的补充水位必须小于容量")
+        self.producer = producer
+        self.difficulty = difficulty
+        self.capacity = capacity
+        self.low_watermark = low_watermark
+        self.misses = 0  # 队列为空、只能当场生成的次数
+
+        self._items: Deque[T] = deque()
+        self._condition = threading.Condition()
+        self._generation = 0  # 每次切换难度加一，丢弃按旧难度生成的题目
+        self._refilling = True  # 启动时先把队列填满
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+    def __len__(self) -> int:
+        with self._condition:
+            return len(self._items)
+
+    def get(self) -> T:
+        """
+        取出一道题目；队列为空时（刚启动或取得太快）在当前线程当场生成
+
+        返回:
+            当前难度的一道题目
+        """
+        with self._condition:
+            if self._items:
+                item = self._items.popleft()
+                if len(self._items) < self.low_watermark and not self._refilling:
+                    self._refilling = True
+                    self._condition.notify()
+                return item
+            self.misses += 1
+            difficulty = self.difficulty
+            self._refilling = True
+            self._condition.notify()
+        return self.producer(difficulty)
+
+    def set_difficulty(self, difficulty: int) -> None:
+        """切换难度：清空队列并按新难度重新生成"""
+        with self._condition:
+            if difficulty == self.difficulty:
+                return
+            self.difficulty = difficulty
+            self._items.clear()
+            self._generation += 1
+            self._refilling = True
+            self._condition.notify()
+
+    def close(self) -> None:
+        """停止后台线程"""
+        with self._condition:
+            self._closed = True
+            self._condition.notify()
+        self._thread.join(timeout=5)
+
+    def _run(self) -> None:
+        while True:
+            with self._condition:
+                while not self._closed and not self._refilling:
+                    self._condition.wait()
+                if self._closed:
+                    return
+                if len(self._items) >= self.capacity:
+                    self._refilling = False
+                    continue
+                generation, difficulty = self._generation, self.difficulty
+
+            try:
+                item = self.producer(difficulty)
+            except Exception as e:
+                print(f"预先生成题目失败: {e}")
+                with self._condition:
+                    self._refilling = False
+                continue
+
+            with self._condition:
+                if generation == self._generation:
+                    self._items.append(item)
+                if len(self._items) >= self.capacity:
+                    self._refilling = False
@@ -0,0 +1,206 @@
+import json
+import os
+import shutil
+import threading
+import uuid
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from core.achievement_system import AchievementSystem
+from core.history_manager import HistoryManager
+from core.latency import LatencyStats
+from core.mastery import MasteryModel
+from core.persistence import WriteBehindWriter, get_writer, json_bytes
+from core.session_store import SessionStore
+
+DEFAULT_PROFILE_ID = "default"
+DEFAULT_PROFILE_NAME = "默认"
+
+
+class Profile:
+    """一个孩子的数据：成就、统计、计算历史、速算掌握度和答题用时，首次使用时才从磁盘加载"""
+
+    def __init__(self, profile_id: str, data_dir: str, writer: WriteBehindWriter):
+        self.profile_id = profile_id
+        self.data_dir = data_dir
+        self.writer = writer
+        self._achievement_system: Optional[AchievementSystem] = None
+        self._history_manager: Optional[HistoryManager] = None
+        self._session_store: Optional[SessionStore] = None
+        self._mastery_model: Optional[MasteryModel] = None
+        self._latency_stats: Optional[LatencyStats] = None
+
+    @property
+    def achievement_system(self) -> AchievementSystem:
+        if self._achievement_system is None:
+            self._achievement_system = AchievementSystem(data_dir=self.data_dir, writer=self.writer)
+        return self._achievement_system
+
+    @property
+    def history_manager(self) -> HistoryManager:
+        if self._history_manager is None:
+            self._history_manager = HistoryManager(data_dir=self.data_dir, writer=self.writer)
+        return self._history_manager
+
+    @property
+    def session_store(self) -> SessionStore:
+        if self._session_store is None:
+            self._session_store = SessionStore(self.data_dir)
+        return self._session_store
+
+    @property
+    def mastery_model(self) -> MasteryModel:
+        if self._mastery_model is None:
+            self._mastery_model = MasteryModel(data_dir=self.data_dir, writer=self.writer)
+        return self._mastery_model
+
+    @property
+    def latency_stats(self) -> LatencyStats:
+        if self._latency_stats is None:
+            self._latency_stats = LatencyStats(data_dir=self.data_dir, writer=self.writer)
+        return self._latency_stats
+
+    def load(self) -> None:
+        """加载该档案的全部数据"""
+        _ = self.achievement_system
+        _ = self.history_manager
+
+
+class ProfileStore:
+    """
+    多档案存储
+
+    目录结构:
+        <data_dir>/profiles/index.json        所有档案的元数据（启动时只读取这个文件）
+        <data_dir>/profiles/<档案ID>/          每个档案独立的 achievements.<实例编号>.json、history.json、mastery.bin、latency.bin
+    """
+
+    def __init__(self, data_dir: Optional[str] = None, writer: Optional[WriteBehindWriter] = None):
+        if data_dir is None:
+            from config import config
+            data_dir = config.DATA_DIR
+
+        self.data_dir = data_dir
+        self.profiles_dir = os.path.join(data_dir, "profiles")
+        self.index_file = os.path.join(self.profiles_dir, "index.json")
+        self.writer = writer or get_writer()
+        self._lock = threading.Lock()
+
+        # 已加载的档案缓存，切换回来时无需再读盘
+        self._loaded: Dict[str, Profile] = {}
+
+        self.index = self._load_index()
+
+    def _load_index(self) -> Dict:
+        """读取档案索引，首次运行时创建默认档案并迁移旧的全局数据文件"""
+        if os.path.exists(self.index_file):
+            try:
+                with open(self.index_file, 'r', encoding='utf-8') as f:
+                    index = json.load(f)
+                    if isinstance(index, dict) and index.get("profiles"):
+                        return index
+            except (json.JSONDecodeError, IOError):
+                pass
+
+        now = datetime.now().isoformat()
+        index = {
+            "current": DEFAULT_PROFILE_ID,
+            "profiles": {
+                DEFAULT_PROFILE_ID: {"name": DEFAULT_PROFILE_NAME, "created_at": now, "last_active": now}
+            }
+        }
+
+        # 迁移旧版本保存在数据目录根下的数据
+        profile_dir = self._profile_dir(DEFAULT_PROFILE_ID)
+        if not os.path.exists(profile_dir):
+            os.makedirs(profile_dir)
+        for filename in ("achievements.json", "history.json"):
+            legacy = os.path.join(self.data_dir, filename)
+            target = os.path.join(profile_dir, filename)
+            if os.path.exists(legacy) and not os.path.exists(target):
+                shutil.copyfile(legacy, target)
+
+        self.index = index
+        self._save_index()
+        return index
+
+    def _save_index(self) -> None:
+        self.writer.schedule(self.index_file, self._serialize_index)
+
+    def _serialize_index(self) -> bytes:
+        with self._lock:
+            index = json.loads(json.dumps(self.index))
+        return json_bytes(index)
+
+    def _profile_dir(self, profile_id: str) -> str:
+        return os.path.join(self.profiles_dir, profile_id)
+
+    def list_profiles(self) -> List[Dict]:
+        """
+        获取所有档案的元数据（不会加载任何档案的数据）
+
+        返回:
+            按最近使用时间排序的档案列表
+        """
+        profiles = [{"id": profile_id, **meta} for profile_id, meta in self.index["profiles"].items()]
+        return sorted(profiles, key=lambda p: p["last_active"], reverse=True)
+
+    def create_profile(self, name: str) -> str:
+        """
+        创建新档案
+
+        参数:
+            name: 档案名称（孩子的名字）
+
+        返回:
+            新档案ID
+        """
+        name = name.strip()
+        if not name:
+            raise ValueError("档案名称不能为空")
+
+        profile_id = uuid.uuid4().hex[:8]
+        now = datetime.now().isoformat()
+        with self._lock:
+            self.index["profiles"][profile_id] = {"name": name, "created_at": now, "last_active": now}
+        os.makedirs(self._profile_dir(profile_id), exist_ok=True)
+        self._save_index()
+        return profile_id
+
+    def select(self, profile_id: str) -> Profile:
+        """
+        切换到指定档案，首次选择时加载该档案的完整数据
+
+        参数:
+            profile_id: 档案ID
+
+        返回:
+            档案对象
+        """
+        if profile_id not in self.index["profiles"]:
+            raise KeyError(f"档案不存在: {profile_id}")
+
+        profile = self._loaded.get(profile_id)
+        if profile is None:
+            profile = Profile(profile_id, self._profile_dir(profile_id), self.writer)
+            profile.load()
+            self._loaded[profile_id] = profile
+
+        with self._lock:
+            self.index["current"] = profile_id
+            self.index["profiles"][profile_id]["last_active"] = datetime.now().isoformat()
+        self._save_index()
+        return profile
+
+    def current(self) -> Profile:
+        """返回当前档案（必要时加载）"""
+        profile_id = self.index.get("current")
+        if profile_id not in self.index["profiles"]:
+            profile_id = next(iter(self.index["profiles"]))
+        return self.select(profile_id)
+
+    def profile_name(self, profile_id: str) -> str:
+        return self.index["profiles"][profile_id]["name"]
+
+    def is_loaded(self, profile_id: str) -> bool:
+        return profile_id in self._loaded
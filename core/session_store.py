@@ -0,0 +1,224 @@
+import os
+import struct
+import threading
+import time
+from array import array
+from datetime import datetime, timedelta
+from typing import Dict, List, NamedTuple, Optional
+
+# 每局游戏一条定长记录: 时间戳, 得分, 答对题数, 答题数, 平均答题用时(毫秒)
+SESSION_RECORD = struct.Struct("<diHHf4x")
+
+# 聚合记录: 区间起点, 局数, 答对题数, 答题数, 最高分, 总分, 总答题用时(毫秒)
+AGGREGATE_RECORD = struct.Struct("<dIIIidd")
+
+# 降采样分辨率（秒）
+RESOLUTIONS: Dict[str, int] = {
+    "hour": 3600,
+    "day": 86400,
+    "week": 7 * 86400,
+}
+
+GAMES = ("quickmath", "twentyfour", "snake", "tetris")
+
+
+class SessionRecord(NamedTuple):
+    """一局游戏的记录"""
+    timestamp: float
+    score: int
+    correct: int
+    attempts: int
+    avg_response_ms: float
+
+
+class Aggregate(NamedTuple):
+    """一个时间区间内的汇总数据"""
+    start: float
+    sessions: int
+    correct: int
+    attempts: int
+    max_score: int
+    total_score: float
+    total_response_ms: float
+
+    @property
+    def accuracy(self) -> float:
+        return self.correct / self.attempts if self.attempts else 0.0
+
+    @property
+    def avg_score(self) -> float:
+        return self.total_score / self.sessions if self.sessions else 0.0
+
+    @property
+    def avg_response_ms(self) -> float:
+        return self.total_response_ms / self.attempts if self.attempts else 0.0
+
+
+class SessionSeries(NamedTuple):
+    """按列存放的原始记录，便于直接用于绘图"""
+    timestamps: array
+    scores: array
+    correct: array
+    attempts: array
+    avg_response_ms: array
+
+
+def bucket_start(timestamp: float, resolution: int) -> float:
+    """
+    返回时间戳所在区间的起点（按本地时间对齐）
+
+    "天"从本地零点开始，"周"从本地周一零点开始；按本地日期计算，夏令时切换的那天也正确。
+    """
+    if resolution < RESOLUTIONS["day"]:
+        offset = time.localtime(timestamp).tm_gmtoff
+        return (int(timestamp + offset) // resolution) * resolution - offset
+    day = datetime.fromtimestamp(timestamp).date()
+    if resolution == RESOLUTIONS["week"]:
+        day -= timedelta(days=day.weekday())
+    return datetime(day.year, day.month, day.day).timestamp()
+
+
+class SessionStore:
+    """
+    每局游戏的时间序列存储
+
+    原始记录以定长二进制追加到 <data_dir>/sessions/<游戏>.ts，同时增量更新
+    小时/天/周三个分辨率的聚合文件 <游戏>.<分辨率>.agg。记录按时间有序，
+    读取时二分查找定位区间，只读取需要的部分，不需要解析 JSON。
+
+    为了保持有序，追加的时间戳不会早于文件中最后一条记录（系统时钟往回调时取最后一条的时间），
+    否则二分查找会得到错误的区间。
+    """
+
+    def __init__(self, data_dir: str = "data"):
+        self.sessions_dir = os.path.join(data_dir, "sessions")
+        self._lock = threading.Lock()
+
+    def _series_path(self, game: str) -> str:
+        if game not in GAMES:
+            raise ValueError(f"未知的游戏: {game}")
+        return os.path.join(self.sessions_dir, f"{game}.ts")
+
+    def _aggregate_path(self, game: str, resolution: str) -> str:
+        if resolution not in RESOLUTIONS:
+            raise ValueError(f"未知的分辨率: {resolution}")
+        return os.path.join(self.sessions_dir, f"{game}.{resolution}.agg")
+
+    def append(self, game: str, score: int = 0, correct: int = 0, attempts: int = 0,
+               avg_response_ms: float = 0.0, timestamp: Optional[float] = None) -> None:
+        """
+        追加一局游戏记录并更新各分辨率的聚合数据
+
+        参数:
+            game: 游戏名称（quickmath / twentyfour / snake / tetris）
+            score: 得分
+            correct: 答对题数
+            attempts: 答题数
+            avg_response_ms: 平均答题用时（毫秒）
+            timestamp: 结束时间，默认为当前时间；早于最后一条记录时按最后一条记录的时间保存
+        """
+        if timestamp is None:
+            timestamp = time.time()
+        path = self._series_path(game)
+
+        with self._lock:
+            if not os.path.exists(self.sessions_dir):
+                os.makedirs(self.sessions_dir)
+
+            with open(path, 'a+b') as f:
+                end = f.seek(0, os.SEEK_END)
+                if end >= SESSION_RECORD.size:
+                    f.seek(end - SESSION_RECORD.size)
+                    timestamp = max(timestamp, struct.unpack("<d", f.read(8))[0])
+                    f.seek(0, os.SEEK_END)
+                f.write(SESSION_RECORD.pack(timestamp, score, correct, attempts, avg_response_ms))
+
+            for name, resolution in RESOLUTIONS.items():
+                self._update_aggregate(self._aggregate_path(game, name), bucket_start(timestamp, resolution),
+                                       score, correct, attempts, avg_response_ms * attempts)
+
+    def _update_aggregate(self, path: str, start: float, score: int, correct: int, attempts: int,
+                          response_ms: float) -> None:
+        """更新聚合文件：同一区间原地改写最后一条记录，否则追加新记录"""
+        size = AGGREGATE_RECORD.size
+        mode = 'r+b' if os.path.exists(path) else 'w+b'
+        with open(path, mode) as f:
+            f.seek(0, os.SEEK_END)
+            end = f.tell()
+            if end >= size:
+                f.seek(end - size)
+                last = Aggregate(*AGGREGATE_RECORD.unpack(f.read(size)))
+                if last.start == start:
+                    f.seek(end - size)
+                    f.write(AGGREGATE_RECORD.pack(
+                        start, last.sessions + 1, last.correct + correct, last.attempts + attempts,
+                        max(last.max_score, score), last.total_score + score,
+                        last.total_response_ms + response_ms))
+                    return
+            f.write(AGGREGATE_RECORD.pack(start, 1, correct, attempts, score, score, response_ms))
+
+    @staticmethod
+    def _read_range(path: str, record: struct.Struct, start: Optional[float], end: Optional[float]) -> bytes:
+        """二分查找 [start, end) 时间范围内的记录（每条记录以时间戳开头），只读取这一段"""
+        if not os.path.exists(path):
+            return b""
+        size = record.size
+        with open(path, 'rb') as f:
+            f.seek(0, os.SEEK_END)
+            count = f.tell() // size
+
+            def lower_bound(value: float) -> int:
+                lo, hi = 0, count
+                while lo < hi:
+                    mid = (lo + hi) // 2
+                    f.seek(mid * size)
+                    if struct.unpack("<d", f.read(8))[0] < value:
+                        lo = mid + 1
+                    else:
+                        hi = mid
+                return lo
+
+            first = lower_bound(start) if start is not None else 0
+            last = lower_bound(end) if end is not None else count
+            if first >= last:
+                return b""
+            f.seek(first * size)
+            return f.read((last - first) * size)
+
+    def read_sessions(self, game: str, start: Optional[float] = None,
+                      end: Optional[float] = None) -> SessionSeries:
+        """
+        读取时间范围内的原始记录
+
+        返回:
+            按列存放的记录（array 数组）
+        """
+        data = self._read_range(self._series_path(game), SESSION_RECORD, start, end)
+        series = SessionSeries(array('d'), array('i'), array('H'), array('H'), array('f'))
+        for record in SESSION_RECORD.iter_unpack(data):
+            for column, value in zip(series, record):
+                column.append(value)
+        return series
+
+    def read_aggregates(self, game: str, resolution: str = "day", start: Optional[float] = None,
+                        end: Optional[float] = None) -> List[Aggregate]:
+        """
+        读取时间范围内某个分辨率的聚合数据
+
+        参数:
+            game: 游戏名称
+            resolution: "hour" / "day" / "week"
+            start, end: 时间范围（时间戳），为None表示不限
+        """
+        if start is not None:
+            start = bucket_start(start, RESOLUTIONS[resolution])
+        data = self._read_range(self._aggregate_path(game, resolution), AGGREGATE_RECORD, start, end)
+        return [Aggregate(*record) for record in AGGREGATE_RECORD.iter_unpack(data)]
+
+    @staticmethod
+    def choose_resolution(start: float, end: float, max_points: int = 200) -> str:
+        """为绘图选择合适的分辨率：点数不超过 max_points 的最细分辨率"""
+        for name, resolution in sorted(RESOLUTIONS.items(), key=lambda item: item[1]):
+            if (end - start) / resolution <= max_points:
+                return name
+        return "week"
@@ -0,0 +1,54 @@
+import random
+from typing import Optional
+
+_MASK32 = 0xFFFFFFFF
+
+
+class FeistelPermutation:
+    """
+    [0, size) 上由种子决定的伪随机排列（保格式加密），不需要把整个排列存下来
+
+    把编号拆成高低两半做4轮 Feistel 变换，得到 [0, 2^bits) 上的一个双射；
+    结果超出 size 时继续变换直到落入范围内（cycle walking）。2^bits 小于 4*size，
+    所以平均不到4次变换。内存占用和每次查询都是 O(1)。
+    """
+
+    ROUNDS = 4
+
+    def __init__(self, size: int, seed: Optional[int] = None):
+        """
+        参数:
+            size: 排列的大小
+            seed: 随机数种子，相同的种子得到相同的排列
+        """
+        if size < 1:
+            raise ValueError("排列大小至少为1")
+        self.size = size
+        bits = max(2, (size - 1).bit_length())
+        self._half = (bits + 1) // 2
+        self._mask = (1 << self._half) - 1
+        rng = random.Random(seed)
+        self._keys = [rng.getrandbits(32) for _ in range(self.ROUNDS)]
+
+    def _round(self, value: int, key: int) -> int:
+        value = ((value ^ key) * 0x9E3779B1) & _MASK32
+        value ^= value >> 15
+        value = (value * 0x85EBCA77) & _MASK32
+        value ^= value >> 13
+        return value & self._mask
+
+    def __len__(self) -> int:
+        return self.size
+
+    def __getitem__(self, index: int) -> int:
+        """排列中第 index 个元素"""
+        if not 0 <= index < self.size:
+            raise IndexError(f"排列下标超出范围: {index}")
+        value = index
+        while True:
+            left, right = value >> self._half, value & self._mask
+            for key in self._keys:
+                left, right = right, left ^ self._round(right, key)
+            value = (left << self._half) | right
+            if value < self.size:
+                return value
@@ -0,0 +1,157 @@
+import itertools
+import os
+from typing import IO, Dict, Iterable
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+# 旧版数据文件中的统计值统一记在这个实例名下，多个实例读取同一个旧文件时不会重复计数
+LEGACY_INSTANCE = "legacy"
+
+
+def is_max_stat(stat_name: str) -> bool:
+    """以 _high_score 结尾的统计项只保留最大值"""
+    return stat_name.endswith("_high_score")
+
+
+def _try_lock(handle: IO) -> bool:
+    """尝试给文件加独占锁（不阻塞），进程退出或文件关闭时锁自动释放"""
+    try:
+        if fcntl is not None:
+            fcntl.flock(handle.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        else:
+            handle.seek(0)
+            msvcrt.locking(handle.fileno(), msvcrt.LK_NBLCK, 1)
+    except OSError:
+        return False
+    return True
+
+
+class InstanceSlot:
+    """
+    在数据目录中认领一个实例编号（"0"、"1"、"2"……）
+
+    每个编号对应一个加了独占锁的 <prefix>.<编号>.lock 文件，同时运行的实例拿到的编号互不相同；
+    实例退出后锁自动释放，下次启动会拿回同一个编号。所以计数器中的实例数不超过
+    同时运行的实例数，不会随启动次数增长。
+    """
+
+    def __init__(self, data_dir: str, prefix: str):
+        """
+        参数:
+            data_dir: 数据目录
+            prefix: 锁文件名前缀
+        """
+        for number in itertools.count():
+            handle = open(os.path.join(data_dir, f"{prefix}.{number}.lock"), 'a+b')
+            if _try_lock(handle):
+                self.instance_id = str(number)
+                self._handle = handle
+                return
+            handle.close()
+
+    def release(self) -> None:
+        """释放编号（关闭锁文件）"""
+        self._handle.close()
+
+
+class StatCounters:
+    """
+    可合并的统计数据
+
+    普通统计项是按实例分别计数的只增计数器（G-Counter），总值为各实例计数之和；
+    最高分类统计项是最大值寄存器。两者的合并都满足交换律、结合律和幂等性，
+    因此多个程序实例共用一个数据目录时，无论以什么顺序合并都不会丢失进度。
+    """
+
+    def __init__(self, stat_names: Iterable[str], instance_id: str):
+        """
+        参数:
+            stat_names: 统计项名称
+            instance_id: 本实例的编号（见 InstanceSlot），只有本实例会增加这个编号下的计数
+        """
+        self.instance_id = instance_id
+        self.counters: Dict[str, Dict[str, int]] = {}
+        self.maxima: Dict[str, int] = {}
+        for stat in stat_names:
+            if is_max_stat(stat):
+                self.maxima[stat] = 0
+            else:
+                self.counters[stat] = {}
+
+    def __contains__(self, stat_name: str) -> bool:
+        return stat_name in self.counters or stat_name in self.maxima
+
+    def value(self, stat_name: str) -> int:
+        """返回统计项的当前值"""
+        if stat_name in self.maxima:
+            return self.maxima[stat_name]
+        return sum(self.counters[stat_name].values())
+
+    def values(self) -> Dict[str, int]:
+        """返回所有统计项的当前值"""
+        result = {stat: sum(counts.values()) for stat, counts in self.counters.items()}
+        result.update(self.maxima)
+        return result
+
+    def increment(self, stat_name: str, delta: int) -> None:
+        """增加本实例的计数（计数器不能减少，负数增量会被忽略）"""
+        if delta <= 0:
+            return
+        counts = self.counters[stat_name]
+        counts[self.instance_id] = counts.get(self.instance_id, 0) + delta
+
+    def set_value(self, stat_name: str, value: int) -> None:
+        """
+        设置统计项的值
+
+        最大值寄存器取较大者；计数器只能增长，因此换算成对本实例的增量
+        """
+        if stat_name in self.maxima:
+            self.maxima[stat_name] = max(self.maxima[stat_name], value)
+        else:
+            self.increment(stat_name, value - self.value(stat_name))
+
+    def merge(self, data: Dict) -> None:
+        """合并另一份（通常是磁盘上的）统计数据"""
+        for stat, counts in data.get("counters", {}).items():
+            if stat not in self.counters or not isinstance(counts, dict):
+                continue
+            local = self.counters[stat]
+            for instance, count in counts.items():
+                if count > local.get(instance, 0):
+                    local[instance] = count
+
+        for stat, value in data.get("maxima", {}).items():
+            if stat in self.maxima and value > self.maxima[stat]:
+                self.maxima[stat] = value
+
+    def merge_legacy(self, stats: Dict[str, int]) -> None:
+        """合并旧版只保存总值的统计数据"""
+        self.merge({
+            "counters": {stat: {LEGACY_INSTANCE: value} for stat, value in stats.items() if not is_max_stat(stat)},
+            "maxima": {stat: value for stat, value in stats.items() if is_max_stat(stat)}
+        })
+
+    def to_dict(self) -> Dict:
+        return {
+            "counters": {stat: dict(counts) for stat, counts in self.counters.items()},
+            "maxima": dict(self.maxima)
+        }
+
+
+def merge_unlocks(local: Dict[str, Dict], remote: Dict) -> None:
+    """合并成就解锁状态：任一实例解锁即为解锁，解锁时间取最早的一次"""
+    for ach_id, ach in local.items():
+        state = remote.get(ach_id)
+        if not isinstance(state, dict) or not state.get("unlocked"):
+            continue
+        remote_time = state.get("unlocked_at")
+        if not ach["unlocked"]:
+            ach["unlocked"] = True
+            ach["unlocked_at"] = remote_time
+        elif remote_time and (ach["unlocked_at"] is None or remote_time < ach["unlocked_at"]):
+            ach["unlocked_at"] = remote_time
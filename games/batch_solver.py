@@ -0,0 +1,166 @@
+from itertools import combinations_with_replacement
+from typing import List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+
+# 两数运算编号: 0 a+b, 1 a*b, 2 a-b, 3 b-a, 4 a/b, 5 b/a
+OP_COUNT = 6
+_OP_FORMATS = ("({a} + {b})", "({a} * {b})", "({a} - {b})", "({b} - {a})", "({a} / {b})", "({b} / {a})")
+
+# 四个数中先合并哪两个（其余两个按顺序保留）
+_PAIRS4 = ((0, 1, 2, 3), (0, 2, 1, 3), (0, 3, 1, 2), (1, 2, 0, 3), (1, 3, 0, 2), (2, 3, 0, 1))
+# 三个数中再合并哪两个（剩下一个留到最后）
+_PAIRS3 = ((0, 1, 2), (0, 2, 1), (1, 2, 0))
+
+
+class BatchResult(NamedTuple):
+    """批量求解结果"""
+    solvable: np.ndarray  # 每组牌是否有解（bool 数组）
+    witnesses: List[Optional[str]]  # 每组牌的一种解法，无解时为None
+
+
+def _combine(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """
+    对两个同形数组做全部6种运算，结果在最后一维
+
+    除数为零的位置记为 NaN，NaN 会在后续运算中一直传递下去，不会被误判为解。
+    """
+    out = np.empty(a.shape + (OP_COUNT,))
+    np.add(a, b, out=out[..., 0])
+    np.multiply(a, b, out=out[..., 1])
+    np.subtract(a, b, out=out[..., 2])
+    np.subtract(b, a, out=out[..., 3])
+    out[..., 4:] = np.nan
+    np.divide(a, b, out=out[..., 4], where=b != 0)
+    np.divide(b, a, out=out[..., 5], where=a != 0)
+    return out
+
+
+def _close(values: np.ndarray, target: float, tolerance: float, out: np.ndarray) -> None:
+    """原地计算 |values - target| <= tolerance，结果写入 out"""
+    values -= target
+    np.abs(values, out=values)
+    np.less_equal(values, tolerance, out=out)
+
+
+def _solve_chunk(hands: np.ndarray, target: float, tolerance: float) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    一次性计算一批四张牌的全部运算组合
+
+    先任选两个数合并（6种选法 x 6种运算），再从剩下三个数中任选两个合并（3 x 6），
+    最后两个数做6种运算。每组牌共 3888 种组合，覆盖所有括号形式和数字顺序。
+
+    返回:
+        (是否有解, 第一个解在展平后的组合中的位置)
+    """
+    count = len(hands)
+    # 第一步: (H, 6选法, 6运算)，以及每种选法剩下的两个数
+    first = np.stack([_combine(hands[:, i], hands[:, j]) for i, j, _, _ in _PAIRS4], axis=1)
+    rest = np.stack([hands[:, [k, l]] for _, _, k, l in _PAIRS4], axis=1)  # (H, 6, 2)
+
+    # 三个数: (H, 36, 3)
+    three = np.empty((count, len(_PAIRS4), OP_COUNT, 3))
+    three[..., 0] = first
+    three[..., 1:] = rest[:, :, None, :]
+    three = three.reshape(count, -1, 3)
+
+    # 第二步: 从三个数中选两个合并 -> (H, 36, 3选法, 6运算)，另一个数 (H, 36, 3选法)
+    second = np.stack([_combine(three[..., i], three[..., j]) for i, j, _ in _PAIRS3], axis=2)
+    last = np.stack([three[..., k] for _, _, k in _PAIRS3], axis=2)
+
+    # 最后一步直接比较，不保存结果: (H, 36, 3, 6, 6)
+    # 这里除以零得到 inf 或 NaN，都不会等于目标值，不需要再屏蔽
+    last = np.broadcast_to(last[..., None], second.shape)
+    hits = np.empty(second.shape + (OP_COUNT,), dtype=bool)
+    _close(second + last, target, tolerance, hits[..., 0])
+    _close(second * last, target, tolerance, hits[..., 1])
+    _close(second - last, target, tolerance, hits[..., 2])
+    _close(last - second, target, tolerance, hits[..., 3])
+    _close(second / last, target, tolerance, hits[..., 4])
+    _close(last / second, target, tolerance, hits[..., 5])
+    hits = hits.reshape(count, -1)
+    return hits.any(axis=1), hits.argmax(axis=1)
+
+
+def _number_text(value: float) -> str:
+    """数字的精确写法：整数不带小数点，小数用能原样读回的最短写法"""
+    value = float(value)
+    return str(int(value)) if value.is_integer() else repr(value)
+
+
+def _witness(hand: Sequence[float], position: int) -> str:
+    """把展平后的组合位置还原成表达式"""
+    pair4, op1, pair3, op2, op3 = np.unravel_index(
+        position, (len(_PAIRS4), OP_COUNT, len(_PAIRS3), OP_COUNT, OP_COUNT))
+    names = [_number_text(n) for n in hand]
+    i, j, k, l = _PAIRS4[pair4]
+    three = [_OP_FORMATS[op1].format(a=names[i], b=names[j]), names[k], names[l]]
+    i, j, k = _PAIRS3[pair3]
+    expression = _OP_FORMATS[op3].format(a=_OP_FORMATS[op2].format(a=three[i], b=three[j]), b=three[k])
+    return expression[1:-1]
+
+
+def solve_many(hands, target: float = 24, chunk_size: int = 2048, tolerance: float = 1e-9) -> BatchResult:
+    """
+    批量判断多组四张牌能否算出目标值（NumPy 向量化，适合成批筛选自定义数字范围）
+
+    数字可以是整数或小数；相同的组合（顺序无关）只计算一次。
+
+    参数:
+        hands: 形如 (N, 4) 的数组或列表
+        target: 目标值
+        chunk_size: 每批计算的组合数（控制内存占用）
+        tolerance: 判定等于目标值的误差
+
+    返回:
+        每组牌是否有解以及一种解法
+    """
+    hands = np.asarray(hands, dtype=np.float64)
+    if hands.ndim != 2 or hands.shape[1] != 4:
+        raise ValueError("每组必须恰好是4个数字")
+    if len(hands) == 0:
+        return BatchResult(np.zeros(0, dtype=bool), [])
+
+    unique, inverse = np.unique(np.sort(hands, axis=1), axis=0, return_inverse=True)
+    inverse = inverse.reshape(-1)
+    solvable = np.zeros(len(unique), dtype=bool)
+    positions = np.zeros(len(unique), dtype=np.int64)
+    with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+        for start in range(0, len(unique), chunk_size):
+            chunk = unique[start:start + chunk_size]
+            solvable[start:start + len(chunk)], positions[start:start + len(chunk)] = \
+                _solve_chunk(chunk, float(target), tolerance)
+
+    unique_witnesses = [_witness(hand, position) if ok else None
+                        for hand, ok, position in zip(unique, solvable, positions)]
+    return BatchResult(solvable[inverse], [unique_witnesses[i] for i in inverse])
+
+
+def hands_in_range(low: int, high: int) -> np.ndarray:
+    """
+    生成 low..high 中任取四个数（可重复、顺序无关）的全部组合
+
+    返回:
+        形如 (N, 4) 的数组
+    """
+    if low > high:
+        raise ValueError("数字范围的下限不能大于上限")
+    return np.array(list(combinations_with_replacement(range(low, high + 1), 4)), dtype=np.float64)
+
+
+if __name__ == '__main__':
+    import time
+
+    rng = np.random.default_rng(0)
+    sample = rng.integers(1, 31, size=(1_000_000, 4))
+    start = time.perf_counter()
+    result = solve_many(sample)
+    elapsed = time.perf_counter() - start
+    print(f"随机 {len(sample)} 组 (1-30): 有解 {int(result.solvable.sum())} 组, 用时 {elapsed:.2f}s")
+
+    everything = hands_in_range(1, 30)
+    start = time.perf_counter()
+    result = solve_many(everything)
+    elapsed = time.perf_counter() - start
+    print(f"1-30 全部 {len(everything)} 种组合: 有解 {int(result.solvable.sum())} 种, 用时 {elapsed:.2f}s "
+          f"({len(everything) / elapsed * 60:,.0f} 组/分钟)")
@@ -0,0 +1,156 @@
+import re
+from collections import Counter
+from fractions import Fraction
+from typing import List, Sequence, Tuple
+
+# 孩子可能输入的全角符号和乘除号
+SYMBOLS = {'×': '*', '÷': '/', '（': '(', '）': ')', '＋': '+', '－': '-'}
+OPERATORS = "+-*/"
+PRECEDENCE = {'+': 1, '-': 1, '*': 2, '/': 2}
+
+_TOKEN = re.compile(r"\d+|[-+*/()]")
+_INVALID = re.compile(r"[^\d\s+\-*/()]")
+_TRANSLATION = str.maketrans(SYMBOLS)
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    把算式拆成记号（数字、运算符、括号），忽略空白
+
+    参数:
+        text: 用户输入的算式
+
+    返回:
+        记号列表
+    """
+    text = text.translate(_TRANSLATION)
+    invalid = _INVALID.search(text)
+    if invalid:
+        raise ValueError(f"不认识的符号: {invalid.group()}")
+    return _TOKEN.findall(text)
+
+
+def evaluate(tokens: List[str]) -> Fraction:
+    """
+    用精确分数计算一串记号（先乘除后加减）
+
+    参数:
+        tokens: tokenize 的结果
+
+    返回:
+        计算结果
+    """
+    return Fraction(*_rational(tokens))
+
+
+def _rational(tokens: List[str]) -> Tuple[int, int]:
+    """
+    计算结果为未约分的 (分子, 分母)
+
+    用算符优先法（两个栈）逐个处理记号，不需要递归；中间结果用整数对表示，
+    比每一步都构造 Fraction 快得多。
+    """
+    values: List[Tuple[int, int]] = []
+    operators: List[str] = []
+
+    def apply() -> None:
+        op = operators.pop()
+        c, d = values.pop()
+        a, b = values.pop()
+        if op == "+":
+            values.append((a * d + c * b, b * d))
+        elif op == "-":
+            values.append((a * d - c * b, b * d))
+        elif op == "*":
+            values.append((a * c, b * d))
+        else:
+            if c == 0:
+                raise ValueError("除数不能为零")
+            values.append((a * d, b * c))
+
+    expect_operand = True
+    for token in tokens:
+        if expect_operand:
+            if token == "(":
+                operators.append(token)
+            elif token.isdigit():
+                values.append((int(token), 1))
+                expect_operand = False
+            else:
+                raise ValueError(f"这里应该是数字或括号: {token}")
+        elif token == ")":
+            while operators and operators[-1] != "(":
+                apply()
+            if not operators:
+                raise ValueError("括号不匹配")
+            operators.pop()
+        elif token in PRECEDENCE:
+            while operators and operators[-1] != "(" and PRECEDENCE[operators[-1]] >= PRECEDENCE[token]:
+                apply()
+            operators.append(token)
+            expect_operand = True
+        else:
+            raise ValueError(f"这里应该是运算符: {token}")
+
+    if expect_operand:
+        raise ValueError("算式不完整")
+    while operators:
+        if operators[-1] == "(":
+            raise ValueError("括号不匹配")
+        apply()
+    return values[0]
+
+
+def format_value(value: Fraction) -> str:
+    """整数显示为整数，否则显示为分数"""
+    return str(value.numerator) if value.denominator == 1 else f"{value.numerator}/{value.denominator}"
+
+
+def check_numbers(tokens: List[str], numbers: Sequence[int]) -> str:
+    """
+    检查算式是否恰好把每个数字各用一次（按多重集比较，11 不会被当成用了 1）
+
+    返回:
+        问题描述，没有问题时返回空字符串
+    """
+    used = [int(token) for token in tokens if token.isdigit()]
+    if sorted(used) == sorted(numbers):
+        return ""
+
+    used = Counter(used)
+    expected = Counter(numbers)
+    problems = []
+    for number in sorted(used - expected):
+        if number in expected:
+            problems.append(f"数字 {number} 只能用{expected[number]}次")
+        else:
+            problems.append(f"题目里没有数字 {number}")
+    for number in sorted(expected - used):
+        problems.append(f"还没有用数字 {number}")
+    return "，".join(problems)
+
+
+def verify_answer(text: str, numbers: Sequence[int], target: int = 24) -> Tuple[bool, str]:
+    """
+    验证一个完整的答案：数字用法正确、用精确分数计算结果等于目标值
+
+    参数:
+        text: 用户输入的算式
+        numbers: 题目数字
+        target: 目标值
+
+    返回:
+        Tuple[是否正确, 反馈信息]
+    """
+    try:
+        tokens = tokenize(text)
+        problem = check_numbers(tokens, numbers)
+        if problem:
+            return False, problem
+        numerator, denominator = _rational(tokens)
+    except ValueError as e:
+        return False, f"表达式有误: {e}"
+
+    if numerator == target * denominator:
+        return True, "太棒了，正确答案！"
+    return False, f"计算结果是 {format_value(Fraction(numerator, denominator))}，不是{target}哦"
@@ -0,0 +1,164 @@
+import random
+from functools import lru_cache
+from typing import List, Optional, Sequence, Tuple
+
+from games.expression import PRECEDENCE
+
+# 节点: [值, 运算符, 左子节点, 右子节点]，叶子节点的运算符为None
+Node = list
+
+
+@lru_cache(maxsize=16)
+def divisor_table(limit: int, max_factor: int) -> Tuple[Tuple[int, ...], ...]:
+    """
+    因数表：table[v] 是 v 的所有拆法中较小的因数 d（2 <= d <= v // d <= max_factor）
+
+    乘法和除法都在口诀表范围内拆数，所以只需要 O(max_factor²) 次运算建表。
+    """
+    table: List[List[int]] = [[] for _ in range(limit + 1)]
+    for d in range(2, max_factor + 1):
+        for q in range(d, min(max_factor, limit // d) + 1):
+            table[d * q].append(d)
+    return tuple(tuple(t) for t in table)
+
+
+def needs_brackets(parent: str, child: str, right: bool) -> bool:
+    """
+    子表达式作为 parent 的左/右操作数时是否需要加括号
+
+    同级运算作为右操作数时总是加括号（即使是连加、连乘）：省略后从左往右算会先算出
+    树里没有的中间结果，它可能超过上限。
+    """
+    if PRECEDENCE[child] < PRECEDENCE[parent]:
+        return True
+    return right and PRECEDENCE[child] == PRECEDENCE[parent]
+
+
+class MultiStepBuilder:
+    """
+    从答案倒推生成多步速算题（例如 "3 + 4 * 2 = ?"）
+
+    先选定答案，再反复挑一个数按某种运算拆成两个数：
+        v = x + y: x 在 [1, v-1] 中任取
+        v = x - y: y 在 [1, limit-v] 中任取
+        v = x * y: 从因数表中取 x
+        v = x / y: y 在 [2, min(max_factor, limit // v)] 中任取
+    每一步都直接算出满足约束的取值，没有"生成后检查不合格再重来"的循环，所以每个中间结果
+    都是不超过 limit 的非负整数，生成时间不随步数和数字范围增大。
+    """
+
+    def __init__(self, operators: Sequence[str], limit: int, max_factor: int = 10):
+        """
+        参数:
+            operators: 可用的运算符
+            limit: 题目中所有数和中间结果的上限
+            max_factor: 乘除法因数的上限（乘法口诀表范围）
+        """
+        if limit < 2:
+            raise ValueError("数字上限至少为2")
+        if not {'+', '-'} <= set(operators):
+            raise ValueError("多步题至少要能用加法和减法")
+        self.operators = tuple(operators)
+        self.limit = limit
+        self.max_factor = max_factor
+        self._divisors = divisor_table(limit, max_factor) if set(self.operators) & set("*/") else ()
+
+    def _options(self, value: int, parent: Optional[str], right: bool, brackets: bool) -> List[str]:
+        """能把 value 拆开的运算符"""
+        options = []
+        for op in self.operators:
+            if not brackets and parent is not None and needs_brackets(parent, op, right):
+                continue
+            if op == '+' and value >= 2:
+                options.append(op)
+            elif op == '-' and value < self.limit:
+                options.append(op)
+            elif op == '*' and value >= 4 and self._divisors[value]:
+                options.append(op)
+            elif op == '/' and 1 <= value <= self.limit // 2:
+                options.append(op)
+        return options
+
+    def _split(self, value: int, op: str, rng: random.Random) -> Tuple[int, int]:
+        if op == '+':
+            left = rng.randint(1, value - 1)
+            return left, value - left
+        if op == '-':
+            right = rng.randint(1, self.limit - value)
+            return value + right, right
+        if op == '*':
+            factor = rng.choice(self._divisors[value])
+            return (factor, value // factor) if rng.random() < 0.5 else (value // factor, factor)
+        divisor = rng.randint(2, min(self.max_factor, self.limit // value))
+        return value * divisor, divisor
+
+    def build(self, steps: int, rng: Optional[random.Random] = None, brackets: bool = False,
+              answer: Optional[int] = None) -> Node:
+        """
+        生成一棵有 steps 个运算的表达式树
+
+        根和加减号左边的数总能用加法或减法再拆，不需要括号；只要始终留着至少一个
+        这样的数，就一定能拆满 steps 步。每一步随机挑一个数，
+        挑中的数拆不开时改拆一个加减位置的数，所以每一步都是 O(1)。
+
+        参数:
+            steps: 运算个数
+            rng: 可选的随机数生成器
+            brackets: 是否允许需要括号的题目
+            answer: 指定答案，默认随机
+
+        返回:
+            表达式树（所有数都已确定）
+        """
+        rng = rng or random
+        root: Node = [rng.randint(0, self.limit) if answer is None else answer, None, None, None]
+        free = [(root, None, False)]  # 总能再拆的叶子: (叶子, 父节点运算符, 是否是右操作数)
+        bound = []  # 其他叶子（乘除的操作数、加减号右边）
+
+        for remaining in range(steps, 0, -1):
+            index = rng.randrange(len(free) + len(bound))
+            group = free if index < len(free) else bound
+            if group is bound:
+                index -= len(free)
+                options = self._options(*self._context(bound[index]), brackets)
+                if not options:
+                    group, index = free, rng.randrange(len(free))
+            if group is free:
+                options = self._options(*self._context(free[index]), brackets)
+                if not brackets and len(free) == 1 and remaining > 1:
+                    options = [op for op in options if op in "+-"]  # 留住最后一个总能再拆的叶子
+
+            leaf, _, _ = group[index]
+            group[index] = group[-1]
+            group.pop()
+
+            op = rng.choice(options)
+            left_value, right_value = self._split(leaf[0], op, rng)
+            leaf[1:] = [op, [left_value, None, None, None], [right_value, None, None, None]]
+            for child, right in ((leaf[2], False), (leaf[3], True)):
+                (free if brackets or (op in "+-" and not right) else bound).append((child, op, right))
+        return root
+
+    @staticmethod
+    def _context(entry: Tuple[Node, Optional[str], bool]) -> Tuple[int, Optional[str], bool]:
+        leaf, parent, right = entry
+        return leaf[0], parent, right
+
+
+def render(node: Node) -> str:
+    """用最少的括号把表达式树写成算式"""
+    value, op, left, right = node
+    if op is None:
+        return str(value)
+    parts = []
+    for child, is_right in ((left, False), (right, True)):
+        text = render(child)
+        if child[1] is not None and needs_brackets(op, child[1], is_right):
+            text = f"({text})"
+        parts.append(text)
+    return f"{parts[0]} {op} {parts[1]}"
+
+
+def count_steps(node: Node) -> int:
+    """表达式树中的运算个数"""
+    return 0 if node[1] is None else 1 + count_steps(node[2]) + count_steps(node[3])
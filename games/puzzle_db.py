@@ -0,0 +1,176 @@
+import mmap
+import os
+import random
+import struct
+from itertools import combinations_with_replacement
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from games.puzzle_rating import assign_buckets, rate_all
+from games.solver import best_solution, solve
+
+DB_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "puzzles.bin")
+
+MAGIC = b"P24D"
+VERSION = 2
+DIFFICULTIES = (1, 2, 3)
+
+# 文件头: 魔数, 版本, 记录数, 然后每个难度一组 (索引偏移, 题目数)
+HEADER = struct.Struct("<4sHH" + "II" * len(DIFFICULTIES))
+
+# 每个组合一条定长记录: 四张牌(升序), 难度(0表示无解), 难度评分x10, 解法数, 一个规范解法(ASCII, 补零)
+RECORD = struct.Struct("<4BBBH32s")
+
+# 难度索引中的题目编号
+INDEX_ENTRY = struct.Struct("<H")
+
+
+class Puzzle(NamedTuple):
+    """数据库中的一个四张牌组合"""
+    puzzle_id: int
+    numbers: Tuple[int, int, int, int]
+    difficulty: int
+    score: float
+    solution_count: int
+    solution: str
+
+    @property
+    def solvable(self) -> bool:
+        return self.difficulty > 0
+
+
+def all_hands() -> List[Tuple[int, int, int, int]]:
+    """1-13中任取四张牌（可重复）的全部1820种组合，列表下标就是题目编号"""
+    return list(combinations_with_replacement(range(1, 14), 4))
+
+
+def build_database(path: str = DB_FILE, workers: Optional[int] = None) -> Dict[int, int]:
+    """
+    离线生成题库文件：1-13中任取四张牌（可重复）共1820种组合
+
+    难度由 games/puzzle_rating.py 并行评估后按评分排名划分。
+
+    参数:
+        path: 输出文件路径
+        workers: 评估时使用的进程数，默认为CPU核数
+
+    返回:
+        各难度的可解题目数
+    """
+    hands = all_hands()
+    ratings = rate_all(hands, workers)
+    levels = assign_buckets(ratings)
+
+    records = []
+    index: Dict[int, List[int]] = {level: [] for level in DIFFICULTIES}
+    for puzzle_id, (numbers, rating, difficulty) in enumerate(zip(hands, ratings, levels)):
+        solutions = solve(numbers)
+        solution = best_solution(solutions) if solutions else ""
+        records.append(RECORD.pack(*numbers, difficulty, min(round(rating.score * 10), 0xFF),
+                                   min(len(solutions), 0xFFFF), solution.encode("ascii")))
+        if difficulty:
+            index[difficulty].append(puzzle_id)
+
+    offset = HEADER.size + RECORD.size * len(records)
+    header_fields = []
+    for level in DIFFICULTIES:
+        header_fields += [offset, len(index[level])]
+        offset += INDEX_ENTRY.size * len(index[level])
+
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, VERSION, len(records), *header_fields))
+        f.writelines(records)
+        for level in DIFFICULTIES:
+            f.writelines(INDEX_ENTRY.pack(puzzle_id) for puzzle_id in index[level])
+    os.replace(tmp_path, path)
+
+    return {level: len(ids) for level, ids in index.items()}
+
+
+class PuzzleDatabase:
+    """
+    内存映射的二十四点题库
+
+    题库由 build_database 离线生成，运行时只做内存映射，不做任何求解：
+    按难度抽题是在该难度的题目编号数组中随机取一项，时间为 O(1)。
+    """
+
+    def __init__(self, path: str = DB_FILE):
+        self.path = path
+        with open(path, 'rb') as f:
+            self._data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, self.count, *fields = HEADER.unpack_from(self._data, 0)
+        if magic != MAGIC or version != VERSION:
+            self._data.close()
+            raise ValueError(f"题库文件格式不正确: {path}")
+
+        # 难度 -> (索引偏移, 题目数)
+        self._index = {level: (fields[2 * i], fields[2 * i + 1]) for i, level in enumerate(DIFFICULTIES)}
+        self._ids_by_numbers: Optional[Dict[Tuple[int, ...], int]] = None
+
+    def close(self) -> None:
+        self._data.close()
+
+    def get(self, puzzle_id: int) -> Puzzle:
+        """按编号读取一条记录"""
+        if not 0 <= puzzle_id < self.count:
+            raise ValueError(f"题目编号超出范围: {puzzle_id}")
+        a, b, c, d, difficulty, score, count, solution = RECORD.unpack_from(
+            self._data, HEADER.size + puzzle_id * RECORD.size)
+        return Puzzle(puzzle_id, (a, b, c, d), difficulty, score / 10, count,
+                      solution.rstrip(b"\0").decode("ascii"))
+
+    def lookup(self, numbers: List[int]) -> Optional[Puzzle]:
+        """按四张牌查找记录（顺序无关），不在题库范围内时返回None"""
+        if self._ids_by_numbers is None:
+            self._ids_by_numbers = {}
+            for puzzle_id in range(self.count):
+                offset = HEADER.size + puzzle_id * RECORD.size
+                self._ids_by_numbers[tuple(self._data[offset:offset + 4])] = puzzle_id
+        puzzle_id = self._ids_by_numbers.get(tuple(sorted(numbers)))
+        return self.get(puzzle_id) if puzzle_id is not None else None
+
+    def count_for(self, difficulty: int) -> int:
+        """某个难度的可解题目数"""
+        return self._index[difficulty][1]
+
+    def sample(self, difficulty: int, rng: Optional[random.Random] = None) -> Puzzle:
+        """
+        随机抽取一道指定难度的可解题目
+
+        参数:
+            difficulty: 难度 1-3
+            rng: 可选的随机数生成器
+
+        返回:
+            题目记录（数字为升序，展示前需要自行打乱）
+        """
+        if difficulty not in self._index:
+            raise ValueError(f"难度必须是1-3: {difficulty}")
+        offset, count = self._index[difficulty]
+        position = (rng or random).randrange(count)
+        (puzzle_id,) = INDEX_ENTRY.unpack_from(self._data, offset + position * INDEX_ENTRY.size)
+        return self.get(puzzle_id)
+
+
+_database: Optional[PuzzleDatabase] = None
+
+
+def get_database() -> Optional[PuzzleDatabase]:
+    """返回全局题库（首次调用时映射文件），文件缺失或损坏时返回None"""
+    global _database
+    if _database is None:
+        try:
+            _database = PuzzleDatabase()
+        except (IOError, ValueError) as e:
+            print(f"加载二十四点题库失败: {e}")
+            return None
+    return _database
+
+
+if __name__ == '__main__':
+    totals = build_database()
+    print(f"题库已生成: {DB_FILE}")
+    for level, total in totals.items():
+        print(f"  难度{level}: {total} 题")
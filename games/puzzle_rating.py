@@ -0,0 +1,170 @@
+from concurrent.futures import ProcessPoolExecutor
+from fractions import Fraction
+from itertools import combinations_with_replacement
+from typing import Dict, Iterator, List, NamedTuple, Optional, Sequence, Tuple
+
+from games.solver import LEAF, SUM, Node, solution_trees, uses_division
+
+# 各难度所占的比例（按评分从低到高划分可解题目）
+BUCKET_SHARES = {1: 0.35, 2: 0.40, 3: 0.25}
+
+
+class PuzzleRating(NamedTuple):
+    """一道题目的难度特征"""
+    numbers: Tuple[int, ...]
+    solution_count: int
+    needs_fraction: bool  # 每种解法都会出现分数
+    needs_division: bool  # 每种解法都要用除法
+    min_depth: int  # 最浅解法的括号嵌套层数
+    hardest_step: int  # 最容易的解法中最难的一步（1-4）
+    score: float  # 综合评分，越高越难（无解时为0）
+
+    @property
+    def solvable(self) -> bool:
+        return self.solution_count > 0
+
+
+def _depth(node: Node) -> int:
+    if node[0] == LEAF:
+        return 0
+    return 1 + max(_depth(term) for term in node[1] + node[2])
+
+
+def _steps(node: Node) -> Iterator[Tuple[Fraction, Fraction, str, Fraction]]:
+    """按书写顺序逐步计算表达式，产出每一步的 (左操作数, 右操作数, 运算符, 结果)"""
+    kind, positive, negative = node
+    if kind == LEAF:
+        return
+
+    def value(term: Node) -> Fraction:
+        result = Fraction(term[1]) if term[0] == LEAF else None
+        for step in _steps(term):
+            result = step[3]
+            yield step
+        return result
+
+    total = None
+    for term, sign in [(t, 1) for t in positive] + [(t, -1) for t in negative]:
+        operand = yield from value(term)
+        if total is None:
+            total = operand
+            continue
+        if kind == SUM:
+            op, result = ("+", total + operand) if sign > 0 else ("-", total - operand)
+        else:
+            op, result = ("*", total * operand) if sign > 0 else ("/", total / operand)
+        yield total, operand, op, result
+        total = result
+
+
+def step_difficulty(a: Fraction, b: Fraction, op: str, result: Fraction) -> int:
+    """
+    估计一步运算对孩子的难度
+
+    返回:
+        1: 20以内加减、乘法口诀表内的乘法
+        2: 更大的加减、口诀表外的乘法、整除
+        3: 大数的乘除
+        4: 涉及分数
+    """
+    if any(x.denominator != 1 for x in (a, b, result)):
+        return 4
+    if op in "+-":
+        return 1 if max(abs(a), abs(b), abs(result)) <= 20 else 2
+    if op == "*":
+        if abs(a) <= 10 and abs(b) <= 10:
+            return 1
+        return 2 if min(abs(a), abs(b)) <= 10 else 3
+    return 2 if abs(a) <= 100 and abs(b) <= 10 else 3
+
+
+def _hardest_step(node: Node) -> int:
+    return max((step_difficulty(*step) for step in _steps(node)), default=1)
+
+
+def rate_puzzle(numbers: Sequence[int], target: int = 24) -> PuzzleRating:
+    """
+    计算一道题目的难度特征和综合评分
+
+    参数:
+        numbers: 题目数字
+        target: 目标值
+
+    返回:
+        难度特征
+    """
+    numbers = tuple(sorted(numbers))
+    trees = solution_trees(numbers, target)
+    if not trees:
+        return PuzzleRating(numbers, 0, False, False, 0, 0, 0.0)
+
+    steps = [_hardest_step(tree) for tree in trees]
+    needs_fraction = min(steps) == 4
+    needs_division = all(uses_division(tree) for tree in trees)
+    min_depth = min(_depth(tree) for tree in trees)
+    hardest_step = min(steps)
+
+    score = (3.0 * needs_fraction + 1.5 * needs_division + (min_depth - 1) + (hardest_step - 1)
+             + 4.0 / len(trees) + 0.5 * (max(numbers) > 10))
+    return PuzzleRating(numbers, len(trees), needs_fraction, needs_division, min_depth, hardest_step,
+                        round(score, 2))
+
+
+def rate_all(hands: Optional[List[Tuple[int, ...]]] = None, workers: Optional[int] = None) -> List[PuzzleRating]:
+    """
+    用进程池并行评估所有题目
+
+    参数:
+        hands: 题目列表，默认为1-13中任取四张牌的全部1820种组合
+        workers: 进程数，默认为CPU核数
+
+    返回:
+        与 hands 顺序一致的评估结果
+    """
+    if hands is None:
+        hands = list(combinations_with_replacement(range(1, 14), 4))
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(rate_puzzle, hands, chunksize=32))
+
+
+def assign_buckets(ratings: Sequence[PuzzleRating]) -> List[int]:
+    """
+    按评分排名把可解题目划分到难度1-3（比例见 BUCKET_SHARES），无解的题目为0
+
+    返回:
+        与 ratings 顺序一致的难度
+    """
+    solvable = sorted((r.score, i) for i, r in enumerate(ratings) if r.solvable)
+    levels = [0] * len(ratings)
+    start = 0
+    for level, share in BUCKET_SHARES.items():
+        end = len(solvable) if level == max(BUCKET_SHARES) else start + round(share * len(solvable))
+        for _, i in solvable[start:end]:
+            levels[i] = level
+        start = end
+    return levels
+
+
+def summarize(ratings: Sequence[PuzzleRating], levels: Sequence[int]) -> Dict[int, Dict[str, float]]:
+    """各难度的平均特征，用于检查划分是否合理"""
+    summary = {}
+    for level in sorted(set(levels) - {0}):
+        group = [r for r, l in zip(ratings, levels) if l == level]
+        summary[level] = {
+            "count": len(group),
+            "avg_score": sum(r.score for r in group) / len(group),
+            "avg_solutions": sum(r.solution_count for r in group) / len(group),
+            "fraction_share": sum(r.needs_fraction for r in group) / len(group),
+            "division_share": sum(r.needs_division for r in group) / len(group),
+        }
+    return summary
+
+
+if __name__ == '__main__':
+    import time
+
+    start = time.perf_counter()
+    all_ratings = rate_all()
+    print(f"评估 {len(all_ratings)} 道题用时 {time.perf_counter() - start:.2f}s")
+    for lvl, stats in summarize(all_ratings, assign_buckets(all_ratings)).items():
+        print(f"难度{lvl}: " + ", ".join(f"{k}={v:.2f}" for k, v in stats.items()))
@@ -1,77 +1,232 @@
+import heapq
 import random
-from typing import Tuple, Optional
+import threading
+from collections import deque
+from functools import lru_cache
+from typing import Callable, Deque, Dict, List, Optional, Tuple
+
+from core.latency import LatencyStats
+from core.mastery import MasteryModel, Skill
+from core.shuffle import FeistelPermutation
+from games.multi_step import MultiStepBuilder, render
+
+# 各难度两个数字的取值上限（与 make_question 一致）
+NUMBER_RANGES = {1: (10, 10), 2: (20, 15), 3: (50, 20)}
+
+# 多步题中所有数和中间结果的上限
+MULTI_STEP_LIMITS = {1: 20, 2: 50, 3: 100}
+
+# 两位数加减法不再逐题区分，只分"进位/不进位"、"退位/不退位"两类
+CARRY = ('+', 0, 1)
+NO_CARRY = ('+', 0, 0)
+BORROW = ('-', 0, 1)
+NO_BORROW = ('-', 0, 0)
+_CATEGORY_NAMES = {CARRY: "进位加法", NO_CARRY: "不进位加法", BORROW: "退位减法", NO_BORROW: "不退位减法"}
+
+
+def question_grid(difficulty: int, op: str) -> Tuple[int, int]:
+    """
+    某个难度某种运算的题目空间：两个数字各自的取值上限（与 make_question 一致）
+
+    除法的两维是除数和商，被除数由两者相乘得到。
+    """
+    if op == '/':
+        return 10, 10
+    if op == '*' and difficulty == 3:
+        return 15, 10
+    return NUMBER_RANGES[difficulty]
+
+
+def fact_family(num1: int, op: str, num2: int) -> Skill:
+    """
+    一道题所属的题族（掌握度按题族统计）
+
+    10以内的加减法和所有乘除法按具体的数字组合区分（例如"7×8"，交换两数算同一族）。
+    除法按对应乘法口诀的两个因数归族：56÷7 和 56÷8 同属 ('/', 7, 8)，但与 7×8 分开统计。
+    其余加减法按是否进位/退位分为两类。
+    """
+    if op == '+':
+        if num1 <= 10 and num2 <= 10:
+            return ('+', min(num1, num2), max(num1, num2))
+        return CARRY if num1 % 10 + num2 % 10 >= 10 else NO_CARRY
+    if op == '-':
+        if num1 <= 10:
+            return ('-', num1, num2)
+        return BORROW if num1 % 10 < num2 % 10 else NO_BORROW
+    if op == '/':
+        num1 //= num2
+    return (op, min(num1, num2), max(num1, num2))
+
+
+def family_name(family: Skill) -> str:
+    """题族的显示名称，例如 7×8、退位减法"""
+    if family in _CATEGORY_NAMES:
+        return _CATEGORY_NAMES[family]
+    op, a, b = family
+    if op == '/':
+        return f"{a * b}÷{a}"
+    return f"{a}{'×' if op == '*' else op}{b}"
 
 
 class QuickMathGame:
     """速算挑战游戏核心逻辑"""
 
-    def __init__(self):
+    def __init__(self, mastery: Optional[MasteryModel] = None, latency: Optional[LatencyStats] = None):
+        """
+        参数:
+            mastery: 当前档案的掌握度模型，提供时按掌握情况挑选题目并记录每次答题
+            latency: 当前档案的答题用时统计，提供时记录每道答对的题的用时
+        """
         self.difficulty = 1  # 难度等级 1-3
         self.current_question = ""
         self.current_answer = 0
+        self.current_family: Optional[Skill] = None  # 当前题目所属的题族
+        self._answered = False  # 当前题目是否已记录过答题结果
         self.operators = ['+', '-']  # 初始运算符
+        self.scheduler: Optional[QuestionScheduler] = None
+        self.sampler = QuestionSampler()  # 不重复地出题，按掌握度出题时也由它出具体的题目
+        self.latency = latency
+        self.use_mastery(mastery)
+
+    def use_mastery(self, mastery: Optional[MasteryModel]) -> None:
+        """切换掌握度模型（例如切换档案时），为None时恢复随机出题"""
+        self.scheduler = QuestionScheduler(mastery, sampler=self.sampler) if mastery is not None else None
 
     def set_difficulty(self, difficulty: int) -> None:
         """设置游戏难度"""
         if 1 <= difficulty <= 3:
             self.difficulty = difficulty
             # 根据难度调整可用运算符
-            if difficulty >= 2:
-                self.operators = ['+', '-', '*']
-            if difficulty >= 3:
-                self.operators = ['+', '-', '*', '/']
+            self.operators = self.operators_for(difficulty)
 
-    def generate_question(self) -> Tuple[str, float]:
+    @staticmethod
+    def operators_for(difficulty: int) -> List[str]:
+        """某个难度可用的运算符"""
+        if difficulty >= 3:
+            return ['+', '-', '*', '/']
+        if difficulty >= 2:
+            return ['+', '-', '*']
+        return ['+', '-']
+
+    @classmethod
+    def make_question(cls, difficulty: int, rng: Optional[random.Random] = None) -> Tuple[str, float]:
         """
-        生成一个速算问题
+        独立随机地生成一个指定难度的速算问题（不修改游戏状态，可能与之前的题目重复；
+        需要不重复时用 QuestionSampler）
+
+        参数:
+            difficulty: 难度等级 1-3
+            rng: 可选的随机数生成器
 
         返回:
             Tuple[问题字符串, 正确答案]
         """
+        rng = rng or random
+
         # 根据难度调整数字范围
-        if self.difficulty == 1:
-            num1 = random.randint(1, 10)
-            num2 = random.randint(1, 10)
-        elif self.difficulty == 2:
-            num1 = random.randint(1, 20)
-            num2 = random.randint(1, 15)
+        if difficulty == 1:
+            num1 = rng.randint(1, 10)
+            num2 = rng.randint(1, 10)
+        elif difficulty == 2:
+            num1 = rng.randint(1, 20)
+            num2 = rng.randint(1, 15)
         else:  # difficulty == 3
-            num1 = random.randint(1, 50)
-            num2 = random.randint(1, 20)
+            num1 = rng.randint(1, 50)
+            num2 = rng.randint(1, 20)
 
         # 随机选择运算符
-        op = random.choice(self.operators)
+        op = rng.choice(cls.operators_for(difficulty))
 
         # 确保减法结果不为负，除法结果为整数
         if op == '-':
             # 确保结果非负
             if num1 < num2:
                 num1, num2 = num2, num1
-            self.current_answer = num1 - num2
+            answer = num1 - num2
         elif op == '*':
             # 难度3时使用更大的数字
-            if self.difficulty == 3:
-                num1 = random.randint(1, 15)
-                num2 = random.randint(1, 10)
-            self.current_answer = num1 * num2
+            if difficulty == 3:
+                num1 = rng.randint(1, 15)
+                num2 = rng.randint(1, 10)
+            answer = num1 * num2
         elif op == '/':
             # 确保可以整除且除数不为零
-            num2 = random.randint(1, 10)
-            num1 = num2 * random.randint(1, 10)
-            self.current_answer = num1 // num2
+            num2 = rng.randint(1, 10)
+            num1 = num2 * rng.randint(1, 10)
+            answer = num1 // num2
         else:  # '+'
-            self.current_answer = num1 + num2
+            answer = num1 + num2
 
         # 构建问题字符串
-        self.current_question = f"{num1} {op} {num2} = ?"
+        return f"{num1} {op} {num2} = ?", answer
+
+    @staticmethod
+    @lru_cache(maxsize=None)
+    def families_for(difficulty: int) -> frozenset:
+        """某个难度可能出现的全部题族"""
+        families = set()
+        for op in QuickMathGame.operators_for(difficulty):
+            if op in '+-':
+                families.update(fact_family(a, op, b) for a in range(1, 11) for b in range(1, a + 1))
+                if difficulty >= 2:
+                    families.update((CARRY, NO_CARRY) if op == '+' else (BORROW, NO_BORROW))
+            elif op == '*':
+                high1, high2 = (20, 15) if difficulty == 2 else (15, 10)
+                families.update(fact_family(a, op, b) for a in range(1, high1 + 1) for b in range(1, high2 + 1))
+            else:
+                families.update(fact_family(a * b, op, b) for a in range(1, 11) for b in range(1, 11))
+        return frozenset(families)
+
+    @classmethod
+    def make_multi_step(cls, difficulty: int, steps: int = 2, brackets: bool = False,
+                        rng: Optional[random.Random] = None) -> Tuple[str, int]:
+        """
+        生成一道多步速算题（例如 "3 + 4 * 2 = ?"），见 games/multi_step.py
+
+        从答案倒推生成，每一步的中间结果都是不超过 MULTI_STEP_LIMITS 的非负整数。
+
+        参数:
+            difficulty: 难度等级 1-3（决定可用的运算符和数字上限）
+            steps: 运算个数
+            brackets: 是否允许带括号的题目
+            rng: 可选的随机数生成器
+
+        返回:
+            Tuple[问题字符串, 正确答案]
+        """
+        builder = MultiStepBuilder(cls.operators_for(difficulty), MULTI_STEP_LIMITS[difficulty])
+        tree = builder.build(steps, rng, brackets)
+        return f"{render(tree)} = ?", tree[0]
+
+    def set_question(self, question: str, answer: float) -> None:
+        """设置当前问题（例如从预取队列中取出的问题）"""
+        self.current_question = question
+        self.current_answer = answer
+        parts = question.split()
+        # 只有单步题才归入题族、按运算符统计用时
+        self.current_family = fact_family(int(parts[0]), parts[1], int(parts[2])) if len(parts) == 5 else None
+        self._answered = False
+
+    def generate_question(self) -> Tuple[str, float]:
+        """
+        生成一个速算问题（有掌握度模型时优先出最值得练习的题族，否则不重复地抽题）
+
+        返回:
+            Tuple[问题字符串, 正确答案]
+        """
+        if self.scheduler is not None:
+            self.set_question(*self.scheduler.next_question(self.difficulty))
+        else:
+            self.set_question(*self.sampler.draw(self.difficulty))
         return self.current_question, self.current_answer
 
-    def check_answer(self, user_answer: str) -> bool:
+    def check_answer(self, user_answer: str, response_ms: Optional[float] = None) -> bool:
         """
-        检查用户答案是否正确
+        检查用户答案是否正确，有掌握度模型时记录结果，答对时记录该运算符的答题用时
 
         参数:
             user_answer: 用户输入的答案字符串
+            response_ms: 从出题到提交的用时（毫秒）
 
         返回:
             如果答案正确则返回True，否则返回False
@@ -81,10 +236,25 @@ class QuickMathGame:
             user_num = float(user_answer)
 
             # 考虑浮点数精度问题
-            return abs(user_num - self.current_answer) < 0.001
+            correct = abs(user_num - self.current_answer) < 0.001
         except ValueError:
             # 输入不是有效的数字
-            return False
+            correct = False
+        if (correct and response_ms is not None and self.latency is not None and self.current_family is not None
+                and not self._answered):
+            # 只统计答对的题，乱猜的快速作答不代表真实速度
+            self.latency.record(self.current_question.split()[1], response_ms)
+        self._record(correct, response_ms)
+        return correct
+
+    def give_up(self) -> None:
+        """时间到仍未作答，记为答错"""
+        self._record(False)
+
+    def _record(self, correct: bool, response_ms: Optional[float] = None) -> None:
+        if self.scheduler is not None and self.current_family is not None and not self._answered:
+            self.scheduler.record(self.current_family, correct, response_ms)
+        self._answered = True
 
     def get_correct_answer(self) -> str:
         """返回当前问题的正确答案字符串"""
@@ -92,3 +262,221 @@ class QuickMathGame:
         if isinstance(self.current_answer, float) and self.current_answer.is_integer():
             return str(int(self.current_answer))
         return str(self.current_answer)
+
+
+class QuestionScheduler:
+    """
+    按预计收获（见 MasteryModel.expected_gain）挑选下一道速算题
+
+    每个难度一个堆，元素为 (-预计收获, 随机数, 版本, 题族)。题族的掌握度变化后不在堆里查找
+    修改，而是压入一条新版本的元素；旧元素到达堆顶时发现版本过期直接丢弃（惰性删除），
+    所以选题和更新都是 O(log n)。刚出过的几个题族暂时跳过，避免同一道题连续出现。
+    预计收获里的遗忘以天计，一局练习中几乎不变，所以只在元素压入堆时计算一次。
+    选出题族后由 QuestionSampler.draw_family 出具体的题目，同一题族的题目也不会重复。
+    """
+
+    COOLDOWN = 4  # 同一题族至少隔这么多道题才会再出
+
+    def __init__(self, mastery: MasteryModel, rng: Optional[random.Random] = None,
+                 sampler: Optional["QuestionSampler"] = None):
+        """
+        参数:
+            mastery: 掌握度模型
+            rng: 可选的随机数生成器（打破预计收获相同的题族之间的平局）
+            sampler: 出具体题目用的抽题器，同一题族的题目不重复
+        """
+        self.mastery = mastery
+        self.rng = rng or random.Random()
+        self.sampler = sampler or QuestionSampler()
+        self._heaps: Dict[int, List[Tuple[float, float, int, Skill]]] = {}
+        self._versions: Dict[Skill, int] = {}
+        self._recent: Deque[Skill] = deque(maxlen=self.COOLDOWN)
+
+    def _entry(self, family: Skill) -> Tuple[float, float, int, Skill]:
+        return (-self.mastery.expected_gain(family), self.rng.random(), self._versions.get(family, 0), family)
+
+    def _heap(self, difficulty: int) -> List[Tuple[float, float, int, Skill]]:
+        """某个难度的堆，第一次用到时建堆"""
+        heap = self._heaps.get(difficulty)
+        if heap is None:
+            heap = [self._entry(family) for family in sorted(QuickMathGame.families_for(difficulty))]
+            heapq.heapify(heap)
+            self._heaps[difficulty] = heap
+        return heap
+
+    def next_family(self, difficulty: int) -> Skill:
+        """
+        预计收获最大、且最近没有出过的题族
+
+        选中的元素留在堆里，作答后由 record 压入新版本使其过期；没有作答时下次仍可选中。
+        """
+        heap = self._heap(difficulty)
+        skipped = []
+        chosen = None
+        while heap:
+            entry = heap[0]
+            if entry[2] != self._versions.get(entry[3], 0):
+                heapq.heappop(heap)  # 过期元素
+            elif entry[3] in self._recent:
+                skipped.append(heapq.heappop(heap))
+            else:
+                chosen = entry[3]
+                break
+        for entry in skipped:
+            heapq.heappush(heap, entry)
+        if chosen is None:
+            chosen = skipped[0][3]  # 题族比冷却数还少时只能重复
+        self._recent.append(chosen)
+        return chosen
+
+    def next_question(self, difficulty: int) -> Tuple[str, int]:
+        """
+        生成下一道题
+
+        返回:
+            Tuple[问题字符串, 正确答案]
+        """
+        return self.sampler.draw_family(self.next_family(difficulty), difficulty)
+
+    def record(self, family: Skill, correct: bool, response_ms: Optional[float] = None) -> None:
+        """记录答题结果，并按新的掌握度更新该题族在各难度堆中的位置"""
+        self.mastery.record(family, correct, response_ms)
+        self._versions[family] = self._versions.get(family, 0) + 1
+        entry = self._entry(family)
+        for difficulty, heap in self._heaps.items():
+            catalog = QuickMathGame.families_for(difficulty)
+            if family not in catalog:
+                continue
+            heapq.heappush(heap, entry)
+            if len(heap) > 2 * len(catalog):
+                # 过期元素太多时重建，堆的大小保持在题族数的两倍以内
+                heap[:] = [e for e in heap if e[2] == self._versions.get(e[3], 0)]
+                heapq.heapify(heap)
+
+
+class QuestionSampler:
+    """
+    不重复地抽取速算题
+
+    每个 (难度, 运算符) 的题目空间是一个隐式的网格（见 question_grid），格子按编号经过
+    由种子决定的 FeistelPermutation 打乱后依次取出：同一空间的题目全部出过之前不会重复，
+    也不需要生成或保存题目列表，内存和每次抽题都是 O(1)。一轮出完后换一个种子开始下一轮，
+    新一轮的第一题不会和上一轮的最后一题相同。减法网格中被减数小于减数的格子直接跳过（不到一半），
+    平均仍是 O(1)。
+
+    按题族出题（draw_family）时每个题族单独一个排列：具体的题族在它的几种写法（交换两数、
+    除以不同的因数）之间轮换，进位/退位这类题族在网格里只取属于该类的格子。
+    """
+
+    RESEED_TRIES = 16  # 新一轮以上一轮最后一题开头时最多换几次种子
+
+    def __init__(self, seed: Optional[int] = None):
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()  # 预取队列在后台线程中抽题
+        # (难度, 运算符或题族) -> [排列, 下一个位置, 上一次取出的编号]
+        self._walks: Dict[Tuple[int, object], List] = {}
+
+    def _next_index(self, key: Tuple[int, object], size: int,
+                    accept: Optional[Callable[[int], bool]] = None) -> int:
+        """
+        从 key 对应的排列中取下一个编号（调用方需持有锁）
+
+        参数:
+            key: 题目空间的键
+            size: 题目空间的大小
+            accept: 可选的过滤条件，不满足的编号直接跳过（空间中至少要有一个满足的编号）
+
+        返回:
+            0 到 size-1 之间的编号
+        """
+        walk = self._walks.get(key)
+        if walk is None:
+            walk = self._walks[key] = [None, size, None]
+        while True:
+            if walk[1] >= size:
+                self._new_round(walk, size, accept)
+            index = walk[0][walk[1]]
+            walk[1] += 1
+            if accept is None or accept(index):
+                break
+        walk[2] = index
+        return index
+
+    def _new_round(self, walk: List, size: int, accept: Optional[Callable[[int], bool]]) -> None:
+        """换一个种子开始新一轮，第一题和上一轮最后一题相同时换种子重试（只有一道题可出时只能重复）"""
+        for _ in range(self.RESEED_TRIES):
+            permutation = FeistelPermutation(size, self._rng.getrandbits(64))
+            first = next(index for index in (permutation[i] for i in range(size))
+                         if accept is None or accept(index))
+            if first != walk[2]:
+                break
+        walk[0], walk[1] = permutation, 0
+
+    @staticmethod
+    def _format(op: str, num1: int, num2: int) -> Tuple[str, int]:
+        """题目字符串和答案"""
+        if op == '+':
+            answer = num1 + num2
+        elif op == '-':
+            answer = num1 - num2
+        elif op == '*':
+            answer = num1 * num2
+        else:
+            answer = num1 // num2
+        return f"{num1} {op} {num2} = ?", answer
+
+    def draw(self, difficulty: int) -> Tuple[str, int]:
+        """
+        抽取一道指定难度的题目
+
+        返回:
+            Tuple[问题字符串, 正确答案]
+        """
+        with self._lock:
+            op = self._rng.choice(QuickMathGame.operators_for(difficulty))
+            high1, high2 = question_grid(difficulty, op)
+            accept = (lambda index: index // high2 >= index % high2) if op == '-' else None
+            first, second = divmod(self._next_index((difficulty, op), high1 * high2, accept), high2)
+        first, second = first + 1, second + 1
+        if op == '/':
+            return self._format(op, first * second, first)
+        return self._format(op, first, second)
+
+    def draw_family(self, family: Skill, difficulty: int) -> Tuple[str, int]:
+        """
+        抽取一道指定题族的题目，同一题族的各种写法全部出过之前不会重复
+
+        参数:
+            family: 题族，必须是该难度会出现的题族（见 QuickMathGame.families_for）
+            difficulty: 难度等级 1-3（决定数字范围）
+
+        返回:
+            Tuple[问题字符串, 正确答案]
+        """
+        if family not in QuickMathGame.families_for(difficulty):
+            raise ValueError(f"难度{difficulty}没有{family_name(family)}这类题目")
+        op, a, b = family
+        if family in _CATEGORY_NAMES:
+            high1, high2 = question_grid(difficulty, op)
+
+            def accept(index: int) -> bool:
+                num1, num2 = divmod(index, high2)
+                if op == '-' and num1 < num2:
+                    return False
+                return fact_family(num1 + 1, op, num2 + 1) == family
+
+            with self._lock:
+                num1, num2 = divmod(self._next_index((difficulty, family), high1 * high2, accept), high2)
+            return self._format(op, num1 + 1, num2 + 1)
+
+        if op == '-':
+            variants = [(a, b)]
+        elif op == '/':
+            variants = [(a * b, a), (a * b, b)]
+        else:
+            high1, high2 = question_grid(difficulty, op)
+            variants = [(x, y) for x, y in ((a, b), (b, a)) if x <= high1 and y <= high2]
+        variants = list(dict.fromkeys(variants))  # a == b 时两种写法相同
+        with self._lock:
+            num1, num2 = variants[self._next_index((difficulty, family), len(variants))]
+        return self._format(op, num1, num2)
@@ -0,0 +1,210 @@
+from collections import Counter
+from fractions import Fraction
+from functools import lru_cache
+from typing import List, NamedTuple, Optional, Sequence, Tuple
+
+from games.expression import PRECEDENCE, evaluate, format_value, tokenize
+
+Values = Tuple[Fraction, ...]
+
+
+class Step(NamedTuple):
+    """一步运算"""
+    left: Fraction
+    op: str
+    right: Fraction
+    result: Fraction
+
+    def __str__(self) -> str:
+        symbol = {'+': '+', '-': '-', '*': '×', '/': '÷'}[self.op]
+        return (f"{format_value(self.left)} {symbol} {format_value(self.right)}"
+                f" = {format_value(self.result)}")
+
+
+class Progress(NamedTuple):
+    """输入到一半时的状态"""
+    status: str  # "empty" 未输入 / "invalid" 输入有误 / "reachable" 还能算出 / "unreachable" 算不出了 / "solved" 已解出
+    message: str
+    values: Values  # 已经组合好的括号的值，加上还没用的数字
+    hint: Optional[Step]  # 下一步可以怎么算（算不出时为None）
+
+
+def _steps(a: Fraction, b: Fraction) -> List[Step]:
+    """两个数能做的所有运算，不出现负数和分数的排在前面"""
+    big, small = (a, b) if a >= b else (b, a)
+    steps = [Step(a, "+", b, a + b), Step(a, "*", b, a * b),
+             Step(big, "-", small, big - small), Step(small, "-", big, small - big)]
+    if small != 0:
+        steps.append(Step(big, "/", small, big / small))
+    if big != 0:
+        steps.append(Step(small, "/", big, small / big))
+    return sorted(steps, key=lambda s: (s.result < 0, s.result.denominator != 1))
+
+
+@lru_cache(maxsize=65536)
+def _reachable(values: Values, target: Fraction) -> bool:
+    """按剩余值的多重集缓存：values 必须已排序"""
+    if len(values) == 1:
+        return values[0] == target
+    for i in range(len(values)):
+        for j in range(i + 1, len(values)):
+            rest = values[:i] + values[i + 1:j] + values[j + 1:]
+            for step in _steps(values[i], values[j]):
+                if _reachable(tuple(sorted(rest + (step.result,))), target):
+                    return True
+    return False
+
+
+def can_reach(values: Sequence[Fraction], target: int = 24) -> bool:
+    """判断这些值（每个恰好用一次）还能否算出 target"""
+    return bool(values) and _reachable(tuple(sorted(Fraction(v) for v in values)), Fraction(target))
+
+
+def next_step(values: Sequence[Fraction], target: int = 24) -> Optional[Step]:
+    """
+    给出一步有用的运算：做完这一步后仍然能算出 target
+
+    返回:
+        运算步骤，已经只剩一个值或算不出时返回None
+    """
+    values = tuple(sorted(Fraction(v) for v in values))
+    target = Fraction(target)
+    for i in range(len(values)):
+        for j in range(i + 1, len(values)):
+            rest = values[:i] + values[i + 1:j] + values[j + 1:]
+            for step in _steps(values[i], values[j]):
+                if _reachable(tuple(sorted(rest + (step.result,))), target):
+                    return step
+    return None
+
+
+def _apply(left: Fraction, op: str, right: Fraction) -> Fraction:
+    if op == "+":
+        return left + right
+    if op == "-":
+        return left - right
+    if op == "*":
+        return left * right
+    if right == 0:
+        raise ValueError("除数不能为零")
+    return left / right
+
+
+def _partial_values(tokens: List[str], finished: bool) -> List[Fraction]:
+    """
+    按先乘除后加减计算输入到一半的算式，返回已经确定的值
+
+    已经闭合的括号、以及后面再写什么也改变不了的运算（例如 "12 * 2 +" 中的 12 * 2）
+    都会算成一个值；还可能被后面的乘除"抢走"右操作数的加减（例如 "3 + 4"）暂不计算。
+
+    参数:
+        tokens: 记号（不含正在输入、还不确定的最后一个数字）
+        finished: 最后一个数字是否已经写完；写完时末尾的乘除也已经确定
+
+    返回:
+        已经确定的值，加上还没参与运算的数字
+    """
+    values: List[Fraction] = []
+    operators: List[str] = []
+
+    def reduce() -> None:
+        right, left = values.pop(), values.pop()
+        values.append(_apply(left, operators.pop(), right))
+
+    expect_operand = True
+    for token in tokens:
+        if expect_operand:
+            if token == "(":
+                operators.append(token)
+            elif token.isdigit():
+                values.append(Fraction(int(token)))
+                expect_operand = False
+            else:
+                raise ValueError(f"这里应该是数字或括号: {token}")
+        elif token == ")":
+            while operators and operators[-1] != "(":
+                reduce()
+            if not operators:
+                raise ValueError("括号不匹配")
+            operators.pop()
+        elif token in PRECEDENCE:
+            while operators and operators[-1] != "(" and PRECEDENCE[operators[-1]] >= PRECEDENCE[token]:
+                reduce()
+            operators.append(token)
+            expect_operand = True
+        else:
+            raise ValueError(f"这里应该是运算符: {token}")
+
+    # 末尾的乘除没有更高优先级的运算能抢走它的右操作数
+    if finished and not expect_operand:
+        while operators and operators[-1] in "*/":
+            reduce()
+    return values
+
+
+def analyze(text: str, numbers: Sequence[int], target: int = 24) -> Progress:
+    """
+    分析孩子输入到一半的算式
+
+    已经闭合的括号和已经确定的运算（考虑先乘除后加减）算作组合好的一个值，
+    没写下的数字视为还没有使用。据此判断剩下的值还能否算出 target，并给出下一步的提示。
+
+    参数:
+        text: 当前输入
+        numbers: 题目数字
+        target: 目标值
+
+    返回:
+        当前状态
+    """
+    available = Counter(numbers)
+    if not text.strip():
+        values = tuple(Fraction(n) for n in numbers)
+        return Progress("empty", "", values, next_step(values, target))
+
+    try:
+        tokens = tokenize(text)
+    except ValueError as e:
+        return Progress("invalid", str(e), (), None)
+
+    # 写下的数字必须是题目里还没用过的
+    used = Counter()
+    pending = False
+    typing = text[-1:].isdigit()
+    for index, token in enumerate(tokens):
+        if not token.isdigit():
+            continue
+        number = int(token)
+        if used[number] >= available[number]:
+            # 正在输入的最后一个数字可能还没写完（例如要输入13，目前只输入了1）
+            last = index == len(tokens) - 1
+            if last and typing and any(str(n).startswith(token) and used[n] < available[n] for n in available):
+                pending = True
+                continue
+            return Progress("invalid", f"只能用题目里的数字: {list(numbers)}", (), None)
+        used[number] += 1
+
+    remaining = available - used
+    # 最后一个数字还可能继续写成另一个题目数字时，末尾的运算还不确定
+    growing = pending or (typing and any(str(n).startswith(tokens[-1]) and len(str(n)) > len(tokens[-1])
+                                         for n in remaining))
+    try:
+        combined = _partial_values(tokens[:-1] if pending else tokens, not growing)
+    except ValueError as e:
+        return Progress("invalid", f"算式有误: {e}", (), None)
+    values = tuple(combined) + tuple(Fraction(n) for n in remaining.elements())
+
+    # 所有数字都已写下，且整个算式已经完整
+    if not pending and not remaining:
+        try:
+            result = evaluate(tokens)
+        except ValueError:
+            result = None
+        if result is not None:
+            if result == target:
+                return Progress("solved", "算对了！", (result,), None)
+            return Progress("unreachable", f"算出来是 {format_value(result)}，不是{target}", (result,), None)
+
+    if can_reach(values, target):
+        return Progress("reachable", f"继续加油，还能算出{target}", values, next_step(values, target))
+    return Progress("unreachable", f"这样组合已经算不出{target}了，换个思路吧", values, None)
@@ -0,0 +1,181 @@
+import random
+from collections import deque
+from typing import NamedTuple, Optional, Tuple, Union
+
+# 方向（格子坐标的增量）
+UP = (0, -1)
+DOWN = (0, 1)
+LEFT = (-1, 0)
+RIGHT = (1, 0)
+DIRECTIONS = {"UP": UP, "DOWN": DOWN, "LEFT": LEFT, "RIGHT": RIGHT}
+
+INITIAL_LENGTH = 3
+FOOD_SCORE = 10
+LEVEL_UP_SCORE = 100
+
+Direction = Tuple[int, int]
+
+
+class FreeCells:
+    """
+    空闲格子索引：空闲格子存在一个稠密数组里，另用位置表记录每个格子在数组中的下标
+
+    占用格子时把数组最后一个元素换到它的位置再删掉（swap-remove），所以占用、释放、
+    随机取一个空格子都是 O(1)，与蛇的长度无关。
+    """
+
+    def __init__(self, size: int):
+        self._cells = list(range(size))
+        self._slots = list(range(size))  # 格子 -> 在 _cells 中的下标，-1 表示已被占用
+
+    def __len__(self) -> int:
+        return len(self._cells)
+
+    def __contains__(self, cell: int) -> bool:
+        return self._slots[cell] >= 0
+
+    def occupy(self, cell: int) -> bool:
+        """占用一个格子，格子原本已被占用时返回False"""
+        slot = self._slots[cell]
+        if slot < 0:
+            return False
+        last = self._cells.pop()
+        if last != cell:
+            self._cells[slot] = last
+            self._slots[last] = slot
+        self._slots[cell] = -1
+        return True
+
+    def release(self, cell: int) -> None:
+        """释放一个格子"""
+        if self._slots[cell] < 0:
+            self._slots[cell] = len(self._cells)
+            self._cells.append(cell)
+
+    def choice(self, rng: random.Random) -> Optional[int]:
+        """随机取一个空格子，没有空格子时返回None"""
+        if not self._cells:
+            return None
+        return self._cells[rng.randrange(len(self._cells))]
+
+
+class StepResult(NamedTuple):
+    """一步模拟的结果"""
+    ate: bool  # 这一步是否吃到了食物
+    game_over: bool  # 游戏是否已经结束（撞墙、撞到自己或占满棋盘）
+
+
+class SnakeSimulation:
+    """
+    贪吃蛇的纯逻辑模拟，不依赖 pygame 和 Qt，也不依赖帧率
+
+    格子用编号 y * width + x 表示。蛇身是格子编号组成的双端队列（蛇头在左端），
+    另用 bytearray 记录每个格子是否被蛇身占用，食物从 FreeCells 中取，所以每一步都是 O(1)。
+    随机数只来自构造时传入的种子，同样的种子和同样的操作序列总是得到同样的一局。
+    pygame 和 Qt 界面只负责按自己的节奏调用 step 并把状态画出来。
+    """
+
+    def __init__(self, width: int = 20, height: int = 15, seed: Optional[int] = None):
+        """
+        参数:
+            width: 棋盘宽度（格子数）
+            height: 棋盘高度（格子数）
+            seed: 随机数种子（决定食物出现的位置）
+        """
+        if width < 2 or height < 1:
+            raise ValueError("棋盘至少要有2列1行")
+        self.width = width
+        self.height = height
+        self.rng = random.Random(seed)
+        self.reset()
+
+    def reset(self) -> None:
+        """开始新的一局（随机数生成器继续使用，不重新播种）"""
+        size = self.width * self.height
+        center = (self.height // 2) * self.width + self.width // 2
+        self.body = deque([center])
+        self.occupied = bytearray(size)
+        self.occupied[center] = 1
+        self.free_cells = FreeCells(size)
+        self.free_cells.occupy(center)
+        self.length = INITIAL_LENGTH
+        self.direction = RIGHT
+        self.score = 0
+        self.level = 1
+        self.steps = 0
+        self.game_over = False
+        self.won = False
+        self.food = self.free_cells.choice(self.rng)
+
+    def cell_xy(self, cell: int) -> Tuple[int, int]:
+        """格子编号对应的 (列, 行)"""
+        return cell % self.width, cell // self.width
+
+    @property
+    def head(self) -> int:
+        """蛇头所在的格子"""
+        return self.body[0]
+
+    @property
+    def snake_length(self) -> int:
+        """蛇当前的节数"""
+        return len(self.body)
+
+    def turn(self, direction: Union[Direction, str, None]) -> None:
+        """
+        改变前进方向，掉头（与当前方向相反）会被忽略
+
+        参数:
+            direction: 方向增量，或 "UP"/"DOWN"/"LEFT"/"RIGHT"，None 表示不变
+        """
+        if isinstance(direction, str):
+            direction = DIRECTIONS[direction]
+        if direction is not None and (-direction[0], -direction[1]) != self.direction:
+            self.direction = direction
+
+    def step(self, action: Union[Direction, str, None] = None) -> StepResult:
+        """
+        前进一格
+
+        参数:
+            action: 这一步之前要转向的方向，None 表示保持方向
+
+        返回:
+            StepResult
+        """
+        if self.game_over:
+            return StepResult(False, True)
+        self.turn(action)
+        self.steps += 1
+
+        x, y = self.cell_xy(self.body[0])
+        x, y = x + self.direction[0], y + self.direction[1]
+        if not (0 <= x < self.width and 0 <= y < self.height):
+            self.game_over = True
+            return StepResult(False, True)
+        new_head = y * self.width + x
+
+        # 尾巴这一步会让出格子，所以蛇头可以跟着尾巴走
+        moves_tail = len(self.body) >= self.length
+        if self.occupied[new_head] and not (moves_tail and new_head == self.body[-1]):
+            self.game_over = True
+            return StepResult(False, True)
+        if moves_tail:
+            tail = self.body.pop()
+            self.occupied[tail] = 0
+            self.free_cells.release(tail)
+        self.body.appendleft(new_head)
+        self.occupied[new_head] = 1
+        self.free_cells.occupy(new_head)
+
+        if new_head != self.food:
+            return StepResult(False, False)
+        self.length += 1
+        self.score += FOOD_SCORE
+        self.level = self.score // LEVEL_UP_SCORE + 1
+        self.food = self.free_cells.choice(self.rng)
+        if self.food is None:
+            # 蛇占满了整个棋盘，没有地方放食物了
+            self.won = True
+            self.game_over = True
+        return StepResult(True, self.game_over)
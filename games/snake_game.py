@@ -1,9 +1,7 @@
 import pygame
-import random
 import sys
 
-# 初始化pygame
-pygame.init()
+from games.snake_core import DOWN, LEFT, RIGHT, UP, SnakeSimulation
 
 # 游戏常量
 GRID_SIZE = 20
@@ -16,81 +14,8 @@ BLUE = (0, 100, 255)
 LIGHT_BLUE = (100, 180, 255)
 GOLD = (255, 215, 0)
 
-# 方向常量
-UP = (0, -1)
-DOWN = (0, 1)
-LEFT = (-1, 0)
-RIGHT = (1, 0)
-
 # 速度设置
 SPEED_LEVELS = {'简单': 8, '中等': 12, '困难': 18}
-LEVEL_UP_SCORE = 100
-
-
-class Snake:
-    def __init__(self, grid_width, grid_height):
-        self.grid_width = grid_width
-        self.grid_height = grid_height
-        self.reset()
-
-    def reset(self):
-        center_x = (self.grid_width // 2) * GRID_SIZE
-        center_y = (self.grid_height // 2) * GRID_SIZE
-        self.length = 3
-        self.positions = [(center_x, center_y)]
-        self.direction = RIGHT
-        self.next_direction = None
-        self.color = GREEN
-        self.head_color = DARK_GREEN
-
-    def change_direction(self, new_direction):
-        if (new_direction[0] * -1, new_direction[1] * -1) != self.direction:
-            self.next_direction = new_direction
-
-    def move(self):
-        if self.next_direction:
-            self.direction = self.next_direction
-            self.next_direction = None
-
-        head_x, head_y = self.positions[0]
-        dx, dy = self.direction
-        new_head = (head_x + dx * GRID_SIZE, head_y + dy * GRID_SIZE)
-        self.positions.insert(0, new_head)
-
-        if len(self.positions) > self.length:
-            self.positions.pop()
-
-    def grow(self):
-        self.length += 1
-
-    def draw(self, surface):
-        for i, pos in enumerate(self.positions):
-            rect = pygame.Rect(pos, (GRID_SIZE, GRID_SIZE))
-            color = self.head_color if i == 0 else self.color
-            pygame.draw.rect(surface, color, rect)
-            pygame.draw.rect(surface, BLACK, rect, 1)
-
-
-class Food:
-    def __init__(self, grid_width, grid_height):
-        self.grid_width = grid_width
-        self.grid_height = grid_height
-        self.position = (0, 0)
-        self.color = RED
-        self.randomize_position([])
-
-    def randomize_position(self, snake_positions):
-        while True:
-            x = random.randint(0, self.grid_width - 1) * GRID_SIZE
-            y = random.randint(0, self.grid_height - 1) * GRID_SIZE
-            self.position = (x, y)
-            if self.position not in snake_positions:
-                break
-
-    def draw(self, surface):
-        rect = pygame.Rect(self.position, (GRID_SIZE, GRID_SIZE))
-        pygame.draw.rect(surface, self.color, rect)
-        pygame.draw.rect(surface, BLACK, rect, 1)
 
 
 class Button:
@@ -123,7 +48,10 @@ class Button:
 
 
 class SnakeGame:
-    def __init__(self, width=40, height=30):
+    """贪吃蛇的 pygame 界面：游戏逻辑在 SnakeSimulation 中，这里只处理按键、节奏和绘制"""
+
+    def __init__(self, width=40, height=30, seed=None):
+        pygame.init()
         self.grid_width = width
         self.grid_height = height
         self.window_width = width * GRID_SIZE
@@ -131,11 +59,9 @@ class SnakeGame:
         self.window = pygame.display.set_mode((self.window_width, self.window_height))
         pygame.display.set_caption("贪吃蛇游戏")
 
-        self.snake = Snake(width, height)
-        self.food = Food(width, height)
-        self.score = 0
-        self.level = 1
-        self.game_over = False
+        self.sim = SnakeSimulation(width, height, seed)
+        self.next_direction = None  # 两次前进之间最后按下的方向
+        self.shown_level = 1
         self.paused = False
         self.speed_level = '中等'
         self.speed = SPEED_LEVELS[self.speed_level]
@@ -195,13 +121,13 @@ class SnakeGame:
                         sys.exit()
                 else:
                     if event.key == pygame.K_UP:
-                        self.snake.change_direction(UP)
+                        self.queue_turn(UP)
                     elif event.key == pygame.K_DOWN:
-                        self.snake.change_direction(DOWN)
+                        self.queue_turn(DOWN)
                     elif event.key == pygame.K_LEFT:
-                        self.snake.change_direction(LEFT)
+                        self.queue_turn(LEFT)
                     elif event.key == pygame.K_RIGHT:
-                        self.snake.change_direction(RIGHT)
+                        self.queue_turn(RIGHT)
                     elif event.key == pygame.K_SPACE:
                         self.paused = not self.paused
                     elif event.key in [pygame.K_1, pygame.K_2, pygame.K_3]:
@@ -213,40 +139,58 @@ class SnakeGame:
                     if self.need_check and self.check_button.is_clicked(mouse_pos):
                         self.need_check = False
 
+    def queue_turn(self, direction):
+        """记下下一步要转的方向，掉头的按键被忽略"""
+        if (-direction[0], -direction[1]) != self.sim.direction:
+            self.next_direction = direction
+
+    @property
+    def score(self):
+        return self.sim.score
+
+    @property
+    def level(self):
+        return self.sim.level
+
+    @property
+    def game_over(self):
+        return self.sim.game_over
+
+    @property
+    def won(self):
+        return self.sim.won
+
     def check_level_up(self):
-        new_level = (self.score // LEVEL_UP_SCORE) + 1
-        if new_level > self.level:
-            self.level = new_level
+        if self.level > self.shown_level:
+            self.shown_level = self.level
             if self.level % 3 == 0:
                 current_idx = list(SPEED_LEVELS.values()).index(self.speed)
                 if current_idx < len(SPEED_LEVELS) - 1:
                     self.speed = list(SPEED_LEVELS.values())[current_idx + 1]
                     self.speed_level = list(SPEED_LEVELS.keys())[current_idx + 1]
 
-    def check_collisions(self):
-        head = self.snake.positions[0]
-        if (head[0] < 0 or head[0] >= self.window_width or
-                head[1] < 0 or head[1] >= self.window_height):
-            self.game_over = True
-
-        for segment in self.snake.positions[1:]:
-            if head == segment:
-                self.game_over = True
-
-        if head == self.food.position:
-            self.snake.grow()
-            self.score += 10
-            self.check_level_up()
-            self.food.randomize_position(self.snake.positions)
-
     def update(self):
         if not self.need_check and not self.game_over and not self.paused:
             self.frame_counter += 1
             if self.frame_counter >= (60 // self.speed):
-                self.snake.move()
-                self.check_collisions()
+                if self.sim.step(self.next_direction).ate:
+                    self.check_level_up()
+                self.next_direction = None
                 self.frame_counter = 0
 
+    def draw_board(self):
+        """绘制蛇和食物"""
+        for i, cell in enumerate(self.sim.body):
+            x, y = self.sim.cell_xy(cell)
+            rect = pygame.Rect(x * GRID_SIZE, y * GRID_SIZE, GRID_SIZE, GRID_SIZE)
+            pygame.draw.rect(self.window, DARK_GREEN if i == 0 else GREEN, rect)
+            pygame.draw.rect(self.window, BLACK, rect, 1)
+        if self.sim.food is not None:
+            x, y = self.sim.cell_xy(self.sim.food)
+            rect = pygame.Rect(x * GRID_SIZE, y * GRID_SIZE, GRID_SIZE, GRID_SIZE)
+            pygame.draw.rect(self.window, RED, rect)
+            pygame.draw.rect(self.window, BLACK, rect, 1)
+
     def draw_check_screen(self):
         # 绘制渐变背景
         for y in range(self.window_height):
@@ -298,8 +242,7 @@ class SnakeGame:
         else:
             self.window.fill(BLACK)
             if not self.game_over:
-                self.snake.draw(self.window)
-                self.food.draw(self.window)
+                self.draw_board()
 
                 score_text = self.normal_font.render(f"分数: {self.score}", True, WHITE)
                 self.window.blit(score_text, (10, 10))
@@ -315,7 +258,7 @@ class SnakeGame:
                     self.window.blit(pause_text,
                                      (self.window_width // 2 - 80, self.window_height // 2 - 24))
             else:
-                over_text = self.title_font.render("游戏结束", True, RED)
+                over_text = self.title_font.render("你赢了！" if self.won else "游戏结束", True, GOLD if self.won else RED)
                 score_text = self.normal_font.render(f"最终分数: {self.score}", True, WHITE)
                 restart_text = self.normal_font.render("按 R 重新开始，按 Q 退出", True, WHITE)
 
@@ -329,11 +272,9 @@ class SnakeGame:
         pygame.display.update()
 
     def reset(self):
-        self.snake.reset()
-        self.food.randomize_position(self.snake.positions)
-        self.score = 0
-        self.level = 1
-        self.game_over = False
+        self.sim.reset()
+        self.next_direction = None
+        self.shown_level = 1
         self.paused = False
         self.speed_level = '中等'
         self.speed = SPEED_LEVELS[self.speed_level]
@@ -0,0 +1,408 @@
+from fractions import Fraction
+from functools import lru_cache
+from itertools import combinations
+from typing import Dict, FrozenSet, List, NamedTuple, Optional, Sequence, Tuple
+
+# 规范化的表达式树（可哈希、可排序的元组）:
+#   (LEAF, n, ())            数字 n
+#   (SUM, 正项, 负项)          a + b + ... - c - ...，各项都不是和式
+#   (PRODUCT, 分子, 分母)      a * b * ... / c / ...，各因子都不是积式
+# 加法和乘法的结合律通过"展平"体现，交换律通过对子项排序体现，
+# 因此 (a + b) + c、c + (b + a)、a - (c - b) 等价的写法只会得到同一棵树。
+LEAF, SUM, PRODUCT = 0, 1, 2
+
+Node = Tuple
+Table = Dict[Fraction, FrozenSet[Node]]
+
+
+class Solution(NamedTuple):
+    """一种解法"""
+    expression: str
+    integral: bool  # 按书写顺序计算时中间结果是否都是整数
+
+
+def _terms(node: Node, kind: int) -> Tuple[Tuple[Node, ...], Tuple[Node, ...]]:
+    """把节点拆成 kind 类型的 (正项, 负项)；不是该类型的节点本身就是一个正项"""
+    if node[0] == kind:
+        return node[1], node[2]
+    return (node,), ()
+
+
+def _join(kind: int, positive: Sequence[Node], negative: Sequence[Node]) -> Node:
+    return (kind, tuple(sorted(positive)), tuple(sorted(negative)))
+
+
+def _combine(a: Node, b: Node, op: str) -> Node:
+    """按运算符合并两个规范表达式"""
+    kind = SUM if op in "+-" else PRODUCT
+    a_pos, a_neg = _terms(a, kind)
+    b_pos, b_neg = _terms(b, kind)
+    if op in "+*":
+        return _join(kind, a_pos + b_pos, a_neg + b_neg)
+    return _join(kind, a_pos + b_neg, a_neg + b_pos)
+
+
+def _merge(table: Dict[Fraction, set], left: Table, right: Table) -> None:
+    """把两组子表达式的所有组合加入 table"""
+    for va, exprs_a in left.items():
+        for vb, exprs_b in right.items():
+            results = [(va + vb, "+", False), (va * vb, "*", False),
+                       (va - vb, "-", False), (vb - va, "-", True)]
+            if vb != 0:
+                results.append((va / vb, "/", False))
+            if va != 0:
+                results.append((vb / va, "/", True))
+            for value, op, swap in results:
+                bucket = table.setdefault(value, set())
+                for ea in exprs_a:
+                    for eb in exprs_b:
+                        bucket.add(_combine(eb, ea, op) if swap else _combine(ea, eb, op))
+
+
+def _splits(numbers: Tuple[int, ...]):
+    """把数字分成两组（无序）的所有不同方式"""
+    seen = set()
+    indices = range(len(numbers))
+    for size in range(1, len(numbers) // 2 + 1):
+        for chosen in combinations(indices, size):
+            left = tuple(numbers[i] for i in chosen)
+            right = tuple(numbers[i] for i in indices if i not in chosen)
+            split = tuple(sorted((left, right)))
+            if split not in seen:
+                seen.add(split)
+                yield split
+
+
+@lru_cache(maxsize=4096)
+def expressions(numbers: Tuple[int, ...]) -> Table:
+    """
+    求出用这些数字（每个恰好用一次）能组成的所有不同表达式，按值分组
+
+    参数:
+        numbers: 升序排列的数字（作为缓存键，同一组数只计算一次）
+
+    返回:
+        {值: 该值的所有规范表达式}
+    """
+    if len(numbers) == 1:
+        return {Fraction(numbers[0]): frozenset([(LEAF, numbers[0], ())])}
+
+    table: Dict[Fraction, set] = {}
+    for left, right in _splits(numbers):
+        _merge(table, expressions(left), expressions(right))
+    return {value: frozenset(exprs) for value, exprs in table.items()}
+
+
+def value_table(numbers: Sequence[int]) -> Table:
+    """
+    与 expressions 相同，但最外层的结果不进入缓存（用于一次性遍历大量四张牌组合）
+
+    返回:
+        {值: 该值的所有规范表达式}
+    """
+    # 直接调用未缓存的函数体，子组合仍然通过 expressions 使用缓存
+    return expressions.__wrapped__(tuple(sorted(numbers)))
+
+
+def _needed(va: Fraction, target: Fraction) -> List[Tuple[Fraction, str, bool]]:
+    """
+    左半边取值 va 时，右半边需要取哪些值才能得到 target
+
+    返回:
+        [(右半边的值, 运算符, 是否交换左右)]，已排除除数为零的情况
+    """
+    needed = [(target - va, "+", False), (va - target, "-", False), (va + target, "-", True)]
+    if va != 0:
+        needed += [(target / va, "*", False), (target * va, "/", True)]
+    if target != 0 and va != 0:
+        needed.append((va / target, "/", False))
+    return needed
+
+
+def _reaching(numbers: Tuple[int, ...], target: Fraction) -> set:
+    """
+    只求值等于 target 的表达式
+
+    最后一步运算不必枚举所有组合：对左半边的每个值，直接算出右半边需要的值再查表。
+    """
+    if len(numbers) == 1:
+        return set(expressions(numbers).get(target, ()))
+
+    found = set()
+    for left, right in _splits(numbers):
+        right_table = expressions(right)
+        for va, exprs_a in expressions(left).items():
+            for vb, op, swap in _needed(va, target):
+                for ea in exprs_a:
+                    for eb in right_table.get(vb, ()):
+                        found.add(_combine(eb, ea, op) if swap else _combine(ea, eb, op))
+    return found
+
+
+def _apply(a: Fraction, b: Fraction, op: str) -> Fraction:
+    if op == "+":
+        return a + b
+    if op == "-":
+        return a - b
+    if op == "*":
+        return a * b
+    return a / b
+
+
+class SubsetSolver:
+    """
+    任意个数字、任意目标值的求解器（位掩码子集动态规划）
+
+    数字的每个子集用位掩码表示，子集能得到的所有值由它拆成的两个不相交子集合并而来；
+    数字相同的子集共用一张表。只需判断能否得到某个值时不必求出全集的值表：
+    在较小的一半中取值，算出另一半需要的值，再递归判断（小子集直接查表）。
+
+    有解时通常很快就能找到；算不出时必须试遍所有拆法，耗时随数字个数急剧增长：
+    6 个数字在 0.2 秒左右，7 个数字要好几秒。需要即时响应的地方（例如游戏）最多
+    使用 MAX_INTERACTIVE 个数字，更多数字只适合离线计算。
+    """
+
+    # 算不出时也能即时给出结论的最多数字个数
+    MAX_INTERACTIVE = 6
+
+    # 不超过这么多个数字的子集直接求出完整的值表
+    TABLE_LIMIT = 4
+
+    def __init__(self, numbers: Sequence[int]):
+        if not numbers:
+            raise ValueError("至少需要一个数字")
+        self.numbers = list(numbers)
+        self.full_mask = (1 << len(self.numbers)) - 1
+        # 数字组合 -> {值: 得到该值的方式}；方式为 None（单个数字）或 (左组合, 左值, 右组合, 右值, 运算符)
+        self._tables: Dict[Tuple[int, ...], Dict[Fraction, Optional[Tuple]]] = {}
+        self._reach_cache: Dict[Tuple[Tuple[int, ...], Fraction], Optional[Node]] = {}
+        self._mask_keys: Dict[int, Tuple[int, ...]] = {}
+
+    def _mask_key(self, mask: int) -> Tuple[int, ...]:
+        """全部数字中 mask 选中的那些（升序），结果按掩码缓存"""
+        key = self._mask_keys.get(mask)
+        if key is None:
+            key = self._mask_keys[mask] = self._key(mask)
+        return key
+
+    def _key(self, mask: int, numbers: Optional[Sequence[int]] = None) -> Tuple[int, ...]:
+        numbers = self.numbers if numbers is None else numbers
+        return tuple(sorted(n for i, n in enumerate(numbers) if mask >> i & 1))
+
+    @staticmethod
+    def _submasks(mask: int):
+        """枚举把 mask 拆成两个非空不相交子集的方式，每种只出现一次（较小的一半在前）"""
+        sub = (mask - 1) & mask
+        while sub:
+            other = mask ^ sub
+            size, other_size = bin(sub).count("1"), bin(other).count("1")
+            if size < other_size or (size == other_size and sub < other):
+                yield sub, other
+            sub = (sub - 1) & mask
+
+    def values(self, key: Optional[Tuple[int, ...]] = None) -> Dict[Fraction, Optional[Tuple]]:
+        """
+        求出一组数字（默认为全部数字）能得到的所有值
+
+        返回:
+            {值: 得到该值的方式}
+        """
+        if key is None:
+            key = tuple(sorted(self.numbers))
+        table = self._tables.get(key)
+        if table is not None:
+            return table
+
+        table = {}
+        if len(key) == 1:
+            table[Fraction(key[0])] = None
+        else:
+            for sub, other in self._submasks((1 << len(key)) - 1):
+                left, right = self._key(sub, key), self._key(other, key)
+                right_table = self.values(right)
+                for va in self.values(left):
+                    for vb in right_table:
+                        for a, b, op, x, y in ((va, vb, "+", left, right), (va, vb, "*", left, right),
+                                               (va, vb, "-", left, right), (vb, va, "-", right, left),
+                                               (va, vb, "/", left, right), (vb, va, "/", right, left)):
+                            if op == "/" and b == 0:
+                                continue
+                            value = _apply(a, b, op)
+                            if value not in table:
+                                table[value] = (x, a, y, b, op)
+        self._tables[key] = table
+        return table
+
+    def _build(self, key: Tuple[int, ...], value: Fraction) -> Node:
+        """按值表中记录的方式还原表达式"""
+        way = self._tables[key][value]
+        if way is None:
+            return (LEAF, key[0], ())
+        left, va, right, vb, op = way
+        return _combine(self._build(left, va), self._build(right, vb), op)
+
+    def _reach(self, mask: int, target: Fraction) -> Optional[Node]:
+        """求一个值等于 target 的表达式，不存在时返回None"""
+        key = self._mask_key(mask)
+        if len(key) <= self.TABLE_LIMIT:
+            return self._build(key, target) if target in self.values(key) else None
+
+        cache_key = (key, target)
+        if cache_key in self._reach_cache:
+            return self._reach_cache[cache_key]
+
+        result = None
+        tried = set()
+        for sub, other in self._submasks(mask):
+            left, right = self._mask_key(sub), self._mask_key(other)
+            if (left, right) in tried:
+                continue  # 数字相同的拆法只需试一次
+            tried.add((left, right))
+            # 另一半也足够小时直接查表，不必递归
+            right_table = self.values(right) if len(right) <= self.TABLE_LIMIT else None
+            for va in self.values(left):
+                for vb, op, swap in _needed(va, target):
+                    if right_table is not None:
+                        node = self._build(right, vb) if vb in right_table else None
+                    else:
+                        node = self._reach(other, vb)
+                    if node is not None:
+                        ea = self._build(left, va)
+                        result = _combine(node, ea, op) if swap else _combine(ea, node, op)
+                        break
+                if result is not None:
+                    break
+            if result is not None:
+                break
+
+        self._reach_cache[cache_key] = result
+        return result
+
+    def can_reach(self, target: int) -> bool:
+        """判断这些数字（每个恰好用一次）能否算出 target"""
+        return self._reach(self.full_mask, Fraction(target)) is not None
+
+    def find_expression(self, target: int) -> Optional[str]:
+        """
+        给出一种算出 target 的方法
+
+        返回:
+            表达式字符串，无解时返回None
+        """
+        node = self._reach(self.full_mask, Fraction(target))
+        return render(node) if node is not None else None
+
+
+def render(node: Node) -> str:
+    """把规范表达式转成字符串，只在必要处加括号"""
+    kind, positive, negative = node
+    if kind == LEAF:
+        return str(positive)
+    if kind == SUM:
+        text = " + ".join(render(term) for term in positive)
+        return text + "".join(f" - {render(term)}" for term in negative)
+
+    def factor(term: Node) -> str:
+        return f"({render(term)})" if term[0] == SUM else render(term)
+
+    text = " * ".join(factor(term) for term in positive)
+    return text + "".join(f" / {factor(term)}" for term in negative)
+
+
+def _evaluate(node: Node) -> Tuple[Fraction, bool]:
+    """按书写顺序计算表达式，返回 (值, 中间结果是否都是整数)"""
+    kind, positive, negative = node
+    if kind == LEAF:
+        return Fraction(positive), True
+
+    integral = True
+    total = None
+    for term, sign in [(t, 1) for t in positive] + [(t, -1) for t in negative]:
+        value, term_integral = _evaluate(term)
+        integral = integral and term_integral
+        if total is None:
+            total = value
+        elif kind == SUM:
+            total = total + value if sign > 0 else total - value
+        else:
+            total = total * value if sign > 0 else total / value
+        integral = integral and total.denominator == 1
+    return total, integral
+
+
+def uses_division(node: Node) -> bool:
+    """表达式中是否用到了除法"""
+    if node[0] == LEAF:
+        return False
+    return (node[0] == PRODUCT and bool(node[2])) or any(uses_division(t) for t in node[1] + node[2])
+
+
+def is_integral(node: Node) -> bool:
+    """按书写顺序计算时中间结果是否都是整数"""
+    return _evaluate(node)[1]
+
+
+def solve(numbers: Sequence[int], target: int = 24) -> List[Solution]:
+    """
+    精确求出一组数字的全部解法（在交换律和结合律意义下不重复）
+
+    参数:
+        numbers: 数字列表（顺序无关）
+        target: 目标值
+
+    返回:
+        解法列表，按表达式排序
+    """
+    return sorted(Solution(render(node), _evaluate(node)[1]) for node in solution_trees(numbers, target))
+
+
+def solution_trees(numbers: Sequence[int], target: int = 24) -> List[Node]:
+    """与 solve 相同，但返回规范表达式树，供难度评估等分析使用"""
+    return sorted(_reaching(tuple(sorted(numbers)), Fraction(target)))
+
+
+def best_solution(solutions: Sequence[Solution]) -> str:
+    """挑选最适合展示给孩子的解法：优先中间结果不出现分数，其次最短"""
+    return min(solutions, key=lambda s: (not s.integral, len(s.expression), s.expression)).expression
+
+
+def _legacy_search(numbers: Sequence[int], target: int = 24) -> int:
+    """旧版求解方式（浮点数、五种括号形式逐一尝试），仅用于性能对比"""
+    from itertools import permutations, product
+    ops = {'+': lambda a, b: a + b, '-': lambda a, b: a - b,
+           '*': lambda a, b: a * b, '/': lambda a, b: a / b}
+    hits = 0
+    for a, b, c, d in permutations(numbers):
+        for o1, o2, o3 in product(ops, repeat=3):
+            f1, f2, f3 = ops[o1], ops[o2], ops[o3]
+            shapes = (lambda: f3(f2(f1(a, b), c), d), lambda: f3(f1(a, f2(b, c)), d),
+                      lambda: f1(a, f3(f2(b, c), d)), lambda: f1(a, f2(b, f3(c, d))),
+                      lambda: f2(f1(a, b), f3(c, d)))
+            for shape in shapes:
+                try:
+                    if abs(shape() - target) < 0.001:
+                        hits += 1
+                except ZeroDivisionError:
+                    pass
+    return hits
+
+
+if __name__ == '__main__':
+    import time
+    from itertools import combinations_with_replacement
+
+    hands = list(combinations_with_replacement(range(1, 14), 4))
+
+    start = time.perf_counter()
+    for hand in hands:
+        _legacy_search(hand)
+    legacy = time.perf_counter() - start
+
+    expressions.cache_clear()
+    start = time.perf_counter()
+    solvable = sum(1 for hand in hands if solve(hand))
+    exact = time.perf_counter() - start
+
+    print(f"{len(hands)} 组牌, 可解 {solvable} 组")
+    print(f"旧版浮点穷举: {legacy:.2f}s ({legacy / len(hands) * 1000:.2f} ms/组)")
+    print(f"精确分数求解: {exact:.2f}s ({exact / len(hands) * 1000:.2f} ms/组)")
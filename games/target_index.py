@@ -0,0 +1,190 @@
+import mmap
+import os
+import random
+import struct
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from games.puzzle_db import all_hands
+from games.solver import is_integral, uses_division, value_table
+
+INDEX_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "targets.bin")
+
+MAGIC = b"P24T"
+VERSION = 1
+
+# "凑N"玩法的目标值范围
+MIN_TARGET = 1
+MAX_TARGET = 100
+
+# 文件头: 魔数, 版本, 组合数, 最小目标值, 最大目标值
+HEADER = struct.Struct("<4sHHHH")
+
+# 每个目标值一条: 条目起始位置, 条目数, 其中必须用除法的条目数（排在最前面）
+TARGET_ENTRY = struct.Struct("<IHH")
+
+# 每个 (目标值, 组合) 一条: 组合编号（与 puzzles.bin 相同）, 解法数, 标志位
+ENTRY = struct.Struct("<HHB")
+
+DIVISION_ONLY = 0x01  # 每种解法都要用除法
+FRACTION_ONLY = 0x02  # 每种解法都会出现分数
+
+
+class TargetHand(NamedTuple):
+    """能凑出某个目标值的一组牌"""
+    puzzle_id: int
+    numbers: Tuple[int, int, int, int]
+    solution_count: int
+    division_only: bool
+    fraction_only: bool
+
+
+def hand_targets(numbers: Sequence[int]) -> List[Tuple[int, int, int]]:
+    """
+    求出一组牌能精确得到的所有值，保留范围内的整数目标值
+
+    返回:
+        [(目标值, 解法数, 标志位)]
+    """
+    result = []
+    for value, trees in value_table(numbers).items():
+        if value.denominator != 1 or not MIN_TARGET <= value <= MAX_TARGET:
+            continue
+        flags = 0
+        if all(uses_division(tree) for tree in trees):
+            flags |= DIVISION_ONLY
+        if not any(is_integral(tree) for tree in trees):
+            flags |= FRACTION_ONLY
+        result.append((int(value), min(len(trees), 0xFFFF), flags))
+    return sorted(result)
+
+
+def build_index(path: str = INDEX_FILE, workers: Optional[int] = None) -> Dict[int, int]:
+    """
+    离线生成目标值索引：对每组牌求出所有可达值，再倒排为 目标值 -> 组合
+
+    参数:
+        path: 输出文件路径
+        workers: 进程数，默认为CPU核数
+
+    返回:
+        每个目标值能凑出它的组合数
+    """
+    hands = all_hands()
+    by_target: Dict[int, List[Tuple[int, int, int]]] = {t: [] for t in range(MIN_TARGET, MAX_TARGET + 1)}
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for puzzle_id, targets in enumerate(executor.map(hand_targets, hands, chunksize=32)):
+            for target, count, flags in targets:
+                by_target[target].append((puzzle_id, count, flags))
+
+    table = []
+    entries = []
+    for target in range(MIN_TARGET, MAX_TARGET + 1):
+        # 必须用除法的组合排在前面，查询时直接取一段
+        items = sorted(by_target[target], key=lambda item: (not item[2] & DIVISION_ONLY, item[0]))
+        division_count = sum(1 for item in items if item[2] & DIVISION_ONLY)
+        table.append(TARGET_ENTRY.pack(len(entries), len(items), division_count))
+        entries.extend(ENTRY.pack(*item) for item in items)
+
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, VERSION, len(hands), MIN_TARGET, MAX_TARGET))
+        f.writelines(table)
+        f.writelines(entries)
+    os.replace(tmp_path, path)
+
+    return {target: len(items) for target, items in by_target.items()}
+
+
+class TargetIndex:
+    """
+    内存映射的目标值索引，用于"凑N"玩法
+
+    查询某个目标值的全部组合（或只要必须用除法的组合）只是读取文件中连续的一段。
+    """
+
+    def __init__(self, path: str = INDEX_FILE):
+        self.path = path
+        with open(path, 'rb') as f:
+            self._data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, self.hand_count, self.min_target, self.max_target = HEADER.unpack_from(self._data, 0)
+        if magic != MAGIC or version != VERSION:
+            self._data.close()
+            raise ValueError(f"目标值索引文件格式不正确: {path}")
+        self._entries_offset = HEADER.size + TARGET_ENTRY.size * (self.max_target - self.min_target + 1)
+        self._hands = all_hands()
+
+    def close(self) -> None:
+        self._data.close()
+
+    def __contains__(self, target: int) -> bool:
+        return self.min_target <= target <= self.max_target
+
+    def _range(self, target: int, division_only: bool) -> Tuple[int, int]:
+        if target not in self:
+            raise ValueError(f"目标值必须在{self.min_target}-{self.max_target}之间: {target}")
+        start, count, division_count = TARGET_ENTRY.unpack_from(
+            self._data, HEADER.size + (target - self.min_target) * TARGET_ENTRY.size)
+        return start, division_count if division_only else count
+
+    def _entry(self, position: int) -> TargetHand:
+        puzzle_id, count, flags = ENTRY.unpack_from(self._data, self._entries_offset + position * ENTRY.size)
+        return TargetHand(puzzle_id, self._hands[puzzle_id], count,
+                          bool(flags & DIVISION_ONLY), bool(flags & FRACTION_ONLY))
+
+    def count(self, target: int, division_only: bool = False) -> int:
+        """能凑出 target 的组合数"""
+        return self._range(target, division_only)[1]
+
+    def hands_for(self, target: int, division_only: bool = False) -> List[TargetHand]:
+        """
+        列出能凑出 target 的所有组合
+
+        参数:
+            target: 目标值
+            division_only: 只要每种解法都必须用除法的组合
+
+        返回:
+            组合列表
+        """
+        start, count = self._range(target, division_only)
+        return [self._entry(start + i) for i in range(count)]
+
+    def sample(self, target: int, rng: Optional[random.Random] = None,
+               division_only: bool = False) -> Optional[TargetHand]:
+        """随机抽取一组能凑出 target 的牌，没有时返回None"""
+        start, count = self._range(target, division_only)
+        if count == 0:
+            return None
+        return self._entry(start + (rng or random).randrange(count))
+
+    def random_target(self, rng: Optional[random.Random] = None, min_hands: int = 50) -> int:
+        """随机选一个至少有 min_hands 组牌能凑出的目标值，作为"凑N"玩法的下一轮目标"""
+        rng = rng or random
+        candidates = [t for t in range(self.min_target, self.max_target + 1) if self.count(t) >= min_hands]
+        if not candidates:
+            raise ValueError(f"没有目标值能被至少{min_hands}组牌凑出")
+        return rng.choice(candidates)
+
+
+_index: Optional[TargetIndex] = None
+
+
+def get_target_index() -> Optional[TargetIndex]:
+    """返回全局目标值索引（首次调用时映射文件），文件缺失或损坏时返回None"""
+    global _index
+    if _index is None:
+        try:
+            _index = TargetIndex()
+        except (IOError, ValueError) as e:
+            print(f"加载目标值索引失败: {e}")
+            return None
+    return _index
+
+
+if __name__ == '__main__':
+    totals = build_index()
+    print(f"目标值索引已生成: {INDEX_FILE}")
+    print(f"  能凑出的组合最少的目标值: {min(totals, key=totals.get)} ({min(totals.values())} 组)")
+    print(f"  能凑出的组合最多的目标值: {max(totals, key=totals.get)} ({max(totals.values())} 组)")
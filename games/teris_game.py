@@ -4,6 +4,7 @@ import os
 import json
 from typing import List, Tuple, Dict, Optional, Set, Union
 import time
+from core.persistence import get_writer
 # 初始化pygame
 pygame.init()
 # 游戏常量
@@ -474,12 +475,12 @@ class ScoreSystem:
             return 0
 
     def save_high_score(self) -> None:
-        """将最高分保存到文件"""
-        try:
-            with open('high_score.json', 'w') as f:
-                json.dump({'high_score': self.high_score}, f)
-        except Exception as e:
-            print(f"Error saving high score: {e}")
+        """登记保存最高分，由后台写入服务合并写盘（软降每格都会调用，不能同步写文件）"""
+        get_writer().schedule('high_score.json', self._serialize_high_score)
+
+    def _serialize_high_score(self) -> bytes:
+        """生成最高分文件内容（在后台写入线程中调用）"""
+        return json.dumps({'high_score': self.high_score}).encode('utf-8')
 
     def __repr__(self) -> str:
         return f"ScoreSystem(score={self.score}, level={self.level}, lines_cleared={self.lines_cleared}, high_score={self.high_score})"
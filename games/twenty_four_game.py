@@ -1,109 +1,116 @@
 import random
-from itertools import permutations, product
 from typing import List, Optional, Tuple
 
+from games.expression import verify_answer
+from games.puzzle_db import get_database
+from games.reachability import Progress, analyze
+from games.solver import SubsetSolver, best_solution, solve
+from games.target_index import get_target_index
+
 
 class TwentyFourGame:
-    """二十四点游戏核心逻辑"""
+    """二十四点游戏核心逻辑（也支持"凑10"、五张牌等变体）"""
+
+    # 全部解法只对不超过这么多个数字的题目列举，更多数字时只求一种解法
+    ENUMERATE_LIMIT = 4
+
+    # 随机生成题目时最多尝试的次数
+    MAX_ATTEMPTS = 1000
 
-    def __init__(self):
+    # 随机生成的数字上限（难度1只用1-10）
+    HIGHEST_NUMBER = 13
+
+    def __init__(self, target: int = 24, count: int = 4):
+        """
+        参数:
+            target: 目标值，默认24
+            count: 每道题的数字个数，默认4，最多 SubsetSolver.MAX_INTERACTIVE 个（更多时判断无解太慢）
+        """
+        if not 1 <= count <= SubsetSolver.MAX_INTERACTIVE:
+            raise ValueError(f"数字个数必须在1到{SubsetSolver.MAX_INTERACTIVE}之间")
+        # 1-13 中的 count 个数能算出的值不超过 13^count；只有一个数时只能得到它本身
+        if abs(target) > self.HIGHEST_NUMBER ** count or (count == 1 and not 1 <= target <= self.HIGHEST_NUMBER):
+            raise ValueError(f"{count}个数字无法凑出{target}")
+        self.target = target
+        self.count = count
         self.numbers = []  # 当前题目数字
         self.solution = ""  # 解决方案
         self.difficulty = 1  # 难度等级 1-3
 
     def generate_numbers(self, difficulty: int = 1) -> List[int]:
         """
-        生成符合难度的四个数字
-
-        难度1: 1-10的数字，包含更多可解组合
-        难度2: 1-13的数字，增加难度
-        难度3: 1-13的数字，包含更多质数和大数
+        生成符合难度的一组数字
+
+        标准玩法（四个数算24）从预先生成的题库中按难度随机抽取一道可解的题目
+        （见 games/puzzle_db.py）。题库中每道题按解法数量、是否必须用分数或除法、
+        括号层数和最难的一步综合评分（见 games/puzzle_rating.py），难度1-3分别
+        对应评分最低的35%、中间的40%和最高的25%。
+        四张牌凑其他目标值时从目标值索引中抽取（见 games/target_index.py），
+        其他玩法随机生成数字（难度1只用1-10），直到有解为止。
         """
         self.difficulty = difficulty
+        self.set_puzzle(*self.make_puzzle(difficulty))
+        return self.numbers
 
-        if difficulty == 1:
-            # 简单模式：1-10，更多小数字
-            self.numbers = [random.randint(1, 10) for _ in range(4)]
-        elif difficulty == 2:
-            # 中等模式：1-13，均衡分布
-            self.numbers = [random.randint(1, 13) for _ in range(4)]
-        else:
-            # 困难模式：增加大数和质数概率
-            pool = [1, 2, 3, 5, 7, 11, 13] + [random.randint(4, 10) for _ in range(5)]
-            self.numbers = random.sample(pool, 4)
+    def make_puzzle(self, difficulty: int, rng: Optional[random.Random] = None) -> Tuple[List[int], str]:
+        """
+        生成一道题目但不修改当前题目（可以在后台线程中预先生成）
 
-        # 确保生成的数字有解
-        if not self.find_solution():
-            return self.generate_numbers(difficulty)
+        参数:
+            difficulty: 难度等级 1-3
+            rng: 可选的随机数生成器
 
-        return self.numbers
+        返回:
+            Tuple[数字列表, 一种解法]；随机尝试 MAX_ATTEMPTS 次仍无解时抛出 ValueError
+        """
+        rng = rng or random
+        if self.target == 24 and self.count == 4:
+            database = get_database()
+            if database is not None:
+                puzzle = database.sample(difficulty, rng)
+                numbers = list(puzzle.numbers)
+                rng.shuffle(numbers)
+                return numbers, puzzle.solution
+
+        # "凑N"玩法：从目标值索引中抽取能凑出目标值的牌
+        if self.count == 4:
+            index = get_target_index()
+            if index is not None and self.target in index:
+                hand = index.sample(self.target, rng)
+                if hand is not None:
+                    numbers = list(hand.numbers)
+                    rng.shuffle(numbers)
+                    return numbers, self._solve(numbers)
+
+        # 题库不可用或其他玩法时随机生成并验证
+        highest = 10 if difficulty == 1 else self.HIGHEST_NUMBER
+        for _ in range(self.MAX_ATTEMPTS):
+            numbers = [rng.randint(1, highest) for _ in range(self.count)]
+            solution = self._solve(numbers)
+            if solution:
+                return numbers, solution
+        raise ValueError(f"尝试{self.MAX_ATTEMPTS}次仍未生成{self.count}个数字凑{self.target}的题目")
+
+    def set_puzzle(self, numbers: List[int], solution: str = "") -> None:
+        """设置当前题目（例如从预取队列中取出的题目），没有给出解法时现场求解"""
+        self.numbers = list(numbers)
+        self.solution = solution or self._solve(self.numbers)
+
+    def _solve(self, numbers: List[int]) -> str:
+        """求一种解法，无解时返回空字符串"""
+        if len(numbers) <= self.ENUMERATE_LIMIT:
+            solutions = solve(numbers, self.target)
+            return best_solution(solutions) if solutions else ""
+        return SubsetSolver(numbers).find_expression(self.target) or ""
 
     def find_solution(self) -> bool:
         """寻找当前数字组合的解决方案，返回是否有解"""
-        # 所有可能的运算符组合 (+, -, *, /)
-        operators = ['+', '-', '*', '/']
-
-        # 尝试所有数字排列
-        for nums in permutations(self.numbers):
-            # 尝试所有运算符组合
-            for ops in product(operators, repeat=3):
-                # 尝试不同的运算顺序（括号位置）
-                # 形式1: ((a op1 b) op2 c) op3 d
-                try:
-                    result1 = self.calculate(nums[0], nums[1], ops[0])
-                    result2 = self.calculate(result1, nums[2], ops[1])
-                    final = self.calculate(result2, nums[3], ops[2])
-                    if abs(final - 24) < 0.001:
-                        self.solution = f"(({nums[0]} {ops[0]} {nums[1]}) {ops[1]} {nums[2]}) {ops[2]} {nums[3]}"
-                        return True
-                except:
-                    pass
-
-                # 形式2: (a op1 (b op2 c)) op3 d
-                try:
-                    result1 = self.calculate(nums[1], nums[2], ops[1])
-                    result2 = self.calculate(nums[0], result1, ops[0])
-                    final = self.calculate(result2, nums[3], ops[2])
-                    if abs(final - 24) < 0.001:
-                        self.solution = f"({nums[0]} {ops[0]} ({nums[1]} {ops[1]} {nums[2]})) {ops[2]} {nums[3]}"
-                        return True
-                except:
-                    pass
-
-                # 形式3: a op1 ((b op2 c) op3 d)
-                try:
-                    result1 = self.calculate(nums[1], nums[2], ops[1])
-                    result2 = self.calculate(result1, nums[3], ops[2])
-                    final = self.calculate(nums[0], result2, ops[0])
-                    if abs(final - 24) < 0.001:
-                        self.solution = f"{nums[0]} {ops[0]} (({nums[1]} {ops[1]} {nums[2]}) {ops[2]} {nums[3]})"
-                        return True
-                except:
-                    pass
-
-                # 形式4: a op1 (b op2 (c op3 d))
-                try:
-                    result1 = self.calculate(nums[2], nums[3], ops[2])
-                    result2 = self.calculate(nums[1], result1, ops[1])
-                    final = self.calculate(nums[0], result2, ops[0])
-                    if abs(final - 24) < 0.001:
-                        self.solution = f"{nums[0]} {ops[0]} ({nums[1]} {ops[1]} ({nums[2]} {ops[2]} {nums[3]}))"
-                        return True
-                except:
-                    pass
-
-                # 形式5: (a op1 b) op2 (c op3 d)
-                try:
-                    result1 = self.calculate(nums[0], nums[1], ops[0])
-                    result2 = self.calculate(nums[2], nums[3], ops[2])
-                    final = self.calculate(result1, result2, ops[1])
-                    if abs(final - 24) < 0.001:
-                        self.solution = f"({nums[0]} {ops[0]} {nums[1]}) {ops[1]} ({nums[2]} {ops[2]} {nums[3]})"
-                        return True
-                except:
-                    pass
-
-        return False
+        self.solution = self._solve(self.numbers)
+        return bool(self.solution)
+
+    def find_all_solutions(self) -> List[str]:
+        """列出当前数字组合的全部不同解法"""
+        return [s.expression for s in solve(self.numbers, self.target)]
 
     def calculate(self, a: float, b: float, op: str) -> float:
         """执行基本运算，处理除法特殊情况"""
@@ -145,33 +152,23 @@ class TwentyFourGame:
 
     def check_answer(self, user_answer: str) -> Tuple[bool, str]:
         """
-        验证用户答案是否正确
+        验证用户答案是否正确（不使用 eval，按多重集检查数字用法，用精确分数计算）
 
         返回:
             Tuple[是否正确, 反馈信息]
         """
         if not user_answer:
             return False, "请输入你的答案"
+        return verify_answer(user_answer, self.numbers, self.target)
 
-        # 简单验证：检查计算结果是否为24
-        try:
-            # 替换用户输入中的×为*，÷为/
-            normalized = user_answer.replace('×', '*').replace('÷', '/')
-
-            # 检查是否使用了所有数字
-            for num in self.numbers:
-                if str(num) not in normalized:
-                    return False, f"请使用所有数字: {self.numbers}"
-
-            # 计算结果
-            result = eval(normalized)
-
-            if abs(result - 24) < 0.001:
-                return True, "太棒了，正确答案！"
-            else:
-                return False, f"计算结果是 {result}，不是24哦"
-        except Exception as e:
-            return False, f"表达式有误: {str(e)}"
+    def check_progress(self, partial_answer: str) -> Progress:
+        """
+        检查输入到一半的答案：已闭合的括号算作组合好的值，判断还能否算出目标值
+
+        返回:
+            当前状态，包括下一步的提示
+        """
+        return analyze(partial_answer, self.numbers, self.target)
 
     def get_solution(self) -> str:
         """返回完整解决方案"""
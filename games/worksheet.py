@@ -0,0 +1,278 @@
+import csv
+import html
+import os
+import random
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+from games.quick_math import QuickMathGame
+from games.twenty_four_game import TwentyFourGame
+
+# 题目类型: 二十四点 / 速算 / 多步速算
+KINDS = ("24", "quick", "multi")
+
+# HTML 卷子的标题
+TITLES = {"24": "二十四点练习", "quick": "速算练习", "multi": "多步速算练习"}
+
+# 多步速算题的运算个数
+MULTI_STEPS = 2
+
+# 默认难度比例
+DEFAULT_MIX = {1: 0.4, 2: 0.4, 3: 0.2}
+
+# 每个分片（一个进程任务）生成的卷子张数
+SHARD_SHEETS = 20
+
+# 抽到重复题目时最多重抽的次数
+MAX_ATTEMPTS = 100
+
+
+class Problem(NamedTuple):
+    """卷子上的一道题"""
+    number: int  # 题号，从1开始
+    kind: str
+    difficulty: int
+    question: str
+    answer: str
+
+
+def difficulty_counts(size: int, mix: Dict[int, float]) -> Dict[int, int]:
+    """
+    按比例分配一张卷子上各难度的题数（最大余数法，总数恰好为 size）
+
+    参数:
+        size: 题目数
+        mix: 难度 -> 比例，比例之和不必为1
+
+    返回:
+        难度 -> 题数
+    """
+    if not mix or any(level not in (1, 2, 3) or share < 0 for level, share in mix.items()):
+        raise ValueError("难度比例必须是难度1-3到非负数的映射")
+    total = sum(mix.values())
+    if total <= 0:
+        raise ValueError("难度比例之和必须大于0")
+    exact = {level: size * share / total for level, share in mix.items()}
+    counts = {level: int(value) for level, value in exact.items()}
+    remainder = size - sum(counts.values())
+    for level in sorted(exact, key=lambda l: (counts[l] - exact[l], l))[:remainder]:
+        counts[level] += 1
+    return counts
+
+
+_twenty_four: Optional[TwentyFourGame] = None
+
+
+def _make_problem(kind: str, difficulty: int, rng: random.Random) -> Tuple[object, str, str]:
+    """生成一道题，返回 (去重用的键, 题目, 答案)"""
+    if kind == "24":
+        global _twenty_four
+        if _twenty_four is None:
+            _twenty_four = TwentyFourGame()
+        numbers, solution = _twenty_four.make_puzzle(difficulty, rng)
+        return tuple(sorted(numbers)), f"{' '.join(map(str, numbers))} → 24", solution
+    if kind == "multi":
+        question, answer = QuickMathGame.make_multi_step(difficulty, MULTI_STEPS, rng=rng)
+    else:
+        question, answer = QuickMathGame.make_question(difficulty, rng)
+    return question, question, str(answer)
+
+
+def generate_sheet(kind: str, size: int, mix: Dict[int, float], seed: int, index: int) -> List[Problem]:
+    """
+    生成一张卷子，同一张卷子上没有重复的题目
+
+    随机数种子由 (seed, 卷号) 决定，与分片方式和进程数无关，同样的参数总是得到同样的卷子。
+
+    参数:
+        kind: 题目类型，"24"、"quick" 或 "multi"
+        size: 题目数
+        mix: 难度比例
+        seed: 整批卷子的种子
+        index: 卷号
+
+    返回:
+        题目列表
+    """
+    if kind not in KINDS:
+        raise ValueError(f"未知的题目类型: {kind}")
+    rng = random.Random(f"{seed}:{kind}:{index}")
+    levels = [level for level, count in difficulty_counts(size, mix).items() for _ in range(count)]
+    rng.shuffle(levels)
+
+    seen = set()
+    problems = []
+    for level in levels:
+        for _ in range(MAX_ATTEMPTS):
+            key, question, answer = _make_problem(kind, level, rng)
+            if key not in seen:
+                break
+        else:
+            raise ValueError(f"难度{level}的不同题目不够出一张{size}道题的卷子")
+        seen.add(key)
+        problems.append(Problem(len(problems) + 1, kind, level, question, answer))
+    return problems
+
+
+def _generate_shard(kind: str, sizes: List[int], mix: Dict[int, float], seed: int,
+                    first_index: int) -> List[List[Problem]]:
+    """生成连续的若干张卷子（在子进程中运行）"""
+    return [generate_sheet(kind, size, mix, seed, first_index + i) for i, size in enumerate(sizes)]
+
+
+def generate_sheets(kind: str, count: int, sheet_size: int = 50, mix: Optional[Dict[int, float]] = None,
+                    seed: int = 0, workers: Optional[int] = None) -> Iterator[List[Problem]]:
+    """
+    按卷号顺序逐张产出卷子，多张卷子分片后在进程池中并行生成
+
+    同时在途的分片数有上限，写得慢时不会把整批卷子都堆在内存里。
+
+    参数:
+        kind: 题目类型，"24"、"quick" 或 "multi"
+        count: 题目总数（最后一张卷子可能不满）
+        sheet_size: 每张卷子的题目数
+        mix: 难度比例，默认为 DEFAULT_MIX
+        seed: 随机数种子
+        workers: 进程数，默认为CPU核数；为1时在当前进程中生成
+
+    返回:
+        卷子迭代器
+    """
+    if sheet_size < 1:
+        raise ValueError("每张卷子至少要有1道题")
+    mix = dict(mix or DEFAULT_MIX)
+    sizes = [min(sheet_size, count - start) for start in range(0, count, sheet_size)]
+    shards = [(start, sizes[start:start + SHARD_SHEETS]) for start in range(0, len(sizes), SHARD_SHEETS)]
+
+    if workers == 1:
+        for start, shard_sizes in shards:
+            yield from _generate_shard(kind, shard_sizes, mix, seed, start)
+        return
+
+    workers = workers or os.cpu_count() or 1
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = deque()
+        remaining = iter(shards)
+        for start, shard_sizes in remaining:
+            pending.append(executor.submit(_generate_shard, kind, shard_sizes, mix, seed, start))
+            if len(pending) >= workers * 2:
+                break
+        while pending:
+            sheets = pending.popleft().result()
+            for start, shard_sizes in remaining:
+                pending.append(executor.submit(_generate_shard, kind, shard_sizes, mix, seed, start))
+                break
+            yield from sheets
+
+
+def _printable(text: str) -> str:
+    return html.escape(text.replace("*", "×").replace("/", "÷"))
+
+
+class CsvSheetWriter:
+    """把卷子逐张写成 CSV（题目和答案分两个文件，带BOM方便用Excel打开）"""
+
+    def __init__(self, path: str):
+        self.paths = (f"{path}.csv", f"{path}_answers.csv")
+        self._files = [open(p, 'w', newline='', encoding='utf-8-sig') for p in self.paths]
+        self._questions, self._answers = (csv.writer(f) for f in self._files)
+        self._questions.writerow(["卷号", "题号", "难度", "题目"])
+        self._answers.writerow(["卷号", "题号", "答案"])
+
+    def write_sheet(self, index: int, problems: List[Problem]) -> None:
+        self._questions.writerows((index + 1, p.number, p.difficulty, p.question) for p in problems)
+        self._answers.writerows((index + 1, p.number, p.answer) for p in problems)
+
+    def close(self) -> None:
+        for f in self._files:
+            f.close()
+
+
+class HtmlSheetWriter:
+    """把卷子逐张写成可打印的 HTML（每张卷子一页，答案另存一个文件）"""
+
+    STYLE = ("body{font-family:sans-serif} .sheet{page-break-after:always} "
+             "ol{columns:2;font-size:18px;line-height:2}")
+
+    def __init__(self, path: str, title: str = "练习卷"):
+        self.paths = (f"{path}.html", f"{path}_answers.html")
+        self._files = [open(p, 'w', encoding='utf-8') for p in self.paths]
+        for f, suffix in zip(self._files, ("", " 答案")):
+            f.write(f"<!DOCTYPE html>\n<html><head><meta charset=\"utf-8\"><title>{html.escape(title + suffix)}"
+                    f"</title><style>{self.STYLE}</style></head><body>\n")
+        self.title = title
+
+    def write_sheet(self, index: int, problems: List[Problem]) -> None:
+        questions, answers = self._files
+        heading = html.escape(f"{self.title} 第{index + 1}张")
+        questions.write(f"<section class=\"sheet\"><h2>{heading}</h2><ol>")
+        questions.writelines(f"<li>{_printable(p.question)}</li>" for p in problems)
+        questions.write("</ol></section>\n")
+        answers.write(f"<section class=\"sheet\"><h2>{heading} 答案</h2><ol>")
+        answers.writelines(f"<li>{_printable(p.answer or '无解')}</li>" for p in problems)
+        answers.write("</ol></section>\n")
+
+    def close(self) -> None:
+        for f in self._files:
+            f.write("</body></html>\n")
+            f.close()
+
+
+def write_worksheets(path: str, kind: str, count: int, sheet_size: int = 50,
+                     mix: Optional[Dict[int, float]] = None, seed: int = 0, fmt: str = "csv",
+                     workers: Optional[int] = None) -> Tuple[str, str]:
+    """
+    生成一批练习卷和答案，边生成边写入文件
+
+    参数:
+        path: 输出文件路径（不含扩展名），答案文件名后加 _answers
+        kind: 题目类型，"24"、"quick" 或 "multi"
+        count: 题目总数
+        sheet_size: 每张卷子的题目数
+        mix: 难度比例，默认为 DEFAULT_MIX
+        seed: 随机数种子
+        fmt: 输出格式，"csv" 或 "html"
+        workers: 进程数，默认为CPU核数
+
+    返回:
+        (题目文件路径, 答案文件路径)
+    """
+    # 先检查参数，出错时不会留下空的输出文件
+    if kind not in KINDS:
+        raise ValueError(f"未知的题目类型: {kind}")
+    if sheet_size < 1:
+        raise ValueError("每张卷子至少要有1道题")
+    difficulty_counts(sheet_size, mix or DEFAULT_MIX)
+    if fmt == "csv":
+        writer = CsvSheetWriter(path)
+    elif fmt == "html":
+        writer = HtmlSheetWriter(path, TITLES[kind])
+    else:
+        raise ValueError(f"不支持的输出格式: {fmt}")
+    try:
+        for index, problems in enumerate(generate_sheets(kind, count, sheet_size, mix, seed, workers)):
+            writer.write_sheet(index, problems)
+    finally:
+        writer.close()
+    return writer.paths
+
+
+if __name__ == '__main__':
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(description="批量生成二十四点/速算练习卷")
+    parser.add_argument("kind", choices=KINDS)
+    parser.add_argument("count", type=int)
+    parser.add_argument("--out", default="worksheet")
+    parser.add_argument("--format", choices=("csv", "html"), default="csv")
+    parser.add_argument("--sheet-size", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int)
+    args = parser.parse_args()
+
+    begin = time.perf_counter()
+    outputs = write_worksheets(args.out, args.kind, args.count, args.sheet_size, seed=args.seed,
+                               fmt=args.format, workers=args.workers)
+    print(f"已生成 {args.count} 道题: {', '.join(outputs)}，用时 {time.perf_counter() - begin:.2f}s")
@@ -1,13 +1,14 @@
 import sys
 from PyQt5.QtWidgets import QApplication
 from view.main_window import MainWindow
-from core.achievement_system import AchievementSystem
+from core.profile_store import ProfileStore
 def main():
     import matplotlib
     matplotlib.rcParams["font.family"] = ["SimHei", "WenQuanYi Micro Hei", "Heiti TC"]
     app = QApplication(sys.argv)
-    achievement_system = AchievementSystem()
-    window = MainWindow(achievement_system)
+    profile_store = ProfileStore()
+    profile = profile_store.current()
+    window = MainWindow(profile.achievement_system, profile_store)
     window.setWindowTitle("儿童益智计算器")
     window.resize(800, 600)
     window.show()
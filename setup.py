@@ -14,7 +14,11 @@ def build():
         ['main.py'],
         pathex=[current_dir],
         binaries=[],
-        datas=collect_data_files('PyQt5'),
+        datas=collect_data_files('PyQt5') + [
+            (os.path.join(current_dir, 'core', 'achievement_definitions.json'), 'core'),
+            (os.path.join(current_dir, 'games', 'puzzles.bin'), 'games'),
+            (os.path.join(current_dir, 'games', 'targets.bin'), 'games')
+        ],
         hiddenimports=[],
         hookspath=[],
         runtime_hooks=[],
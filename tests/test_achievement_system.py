@@ -0,0 +1,214 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from core.achievement_rules import ActivityTracker, RuleContext, compile_rule
+from core.achievement_system import AchievementSystem
+from core.event_bus import (AchievementEventBus, AnswerCorrect, GameEvent,
+                            GameStarted, ScoreReported)
+from core.persistence import atomic_write
+from core.stat_counters import InstanceSlot
+
+
+class TestAchievementRules(unittest.TestCase):
+    """成就规则编译测试类"""
+
+    def test_threshold_rule(self):
+        """测试阈值规则"""
+        rule = compile_rule({"stat": "a", "gte": 3})
+        self.assertEqual(rule.inputs, frozenset(["a"]))
+        self.assertEqual((rule.stat, rule.threshold), ("a", 3))
+        self.assertFalse(rule.predicate(RuleContext({"a": 2}, ActivityTracker(), 0)))
+        self.assertTrue(rule.predicate(RuleContext({"a": 3}, ActivityTracker(), 0)))
+
+    def test_combined_rule(self):
+        """测试与/或组合规则"""
+        rule = compile_rule({"any": [{"stat": "a", "gte": 1},
+                                     {"all": [{"stat": "b", "gte": 1}, {"stat": "c", "gte": 1}]}]})
+        self.assertEqual(rule.inputs, frozenset(["a", "b", "c"]))
+        self.assertFalse(rule.predicate(RuleContext({"b": 1}, ActivityTracker(), 0)))
+        self.assertTrue(rule.predicate(RuleContext({"b": 1, "c": 1}, ActivityTracker(), 0)))
+
+    def test_streak_and_window(self):
+        """测试连续天数和时间窗口规则"""
+        activity = ActivityTracker()
+        activity.watch_streak("a")
+        activity.watch_window("b", 60)
+        day = 86400
+        for i in range(3):
+            activity.record("a", 1, 1_700_000_000 + i * day)
+        activity.record("b", 5, 1_700_000_000)
+        activity.record("b", 5, 1_700_000_050)
+
+        now = 1_700_000_000 + 2 * day
+        self.assertEqual(activity.streak_length("a", now), 3)
+        self.assertEqual(activity.streak_length("a", now + 3 * day), 0)
+        self.assertEqual(activity.window_total("b", 60, 1_700_000_055), 10)
+        self.assertEqual(activity.window_total("b", 60, 1_700_000_100), 5)
+
+    def test_unknown_rule(self):
+        """测试未知规则报错"""
+        with self.assertRaises(ValueError):
+            compile_rule({"foo": 1})
+
+
+class TestAchievementSystem(unittest.TestCase):
+    """成就系统测试类"""
+
+    def setUp(self):
+        """测试前创建临时数据目录"""
+        self.data_dir = tempfile.mkdtemp()
+        self.system = AchievementSystem(data_dir=self.data_dir)
+
+    def tearDown(self):
+        self.system.flush()
+        shutil.rmtree(self.data_dir, ignore_errors=True)
+
+    def test_threshold_unlock(self):
+        """测试达到阈值解锁成就"""
+        self.assertEqual(self.system.update_stat("calculator_total_operations", 9), [])
+        self.assertEqual(self.system.update_stat("calculator_total_operations"), ["calc_beginner"])
+        self.assertEqual(self.system.get_achievement_progress("calc_pro"), (10, 100))
+
+    def test_compound_unlock(self):
+        """测试组合成就只在所有游戏都玩过后解锁"""
+        for stat in ["twentyfour_games_played", "snake_games_played", "tetris_games_played"]:
+            self.assertNotIn("all_games_played", self.system.update_stat(stat))
+        self.assertIn("all_games_played", self.system.update_stat("quickmath_games_played"))
+
+    def test_unrelated_update_skips_rules(self):
+        """测试无关统计项不会触发规则求值"""
+        self.assertNotIn("tetris_high_score", self.system.rules_by_stat)
+        self.assertEqual(self.system.update_stat("tetris_high_score", 500, is_increment=False), [])
+
+    def test_state_persisted(self):
+        """测试成就和统计数据的持久化"""
+        self.system.update_stat("twentyfour_games_won")
+        self.system.flush()
+        with open(self.system.shard_file, encoding='utf-8') as f:
+            data = json.load(f)
+        self.assertTrue(data["twentyfour_first_win"]["unlocked"])
+
+        reloaded = AchievementSystem(data_dir=self.data_dir)
+        self.assertEqual(reloaded.stats["twentyfour_games_won"], 1)
+        self.assertTrue(reloaded.achievements["twentyfour_first_win"]["unlocked"])
+        self.assertNotIn("stats", reloaded.achievements)
+
+    def test_concurrent_instances_merge(self):
+        """测试两个实例共用数据目录时不会丢失进度"""
+        other = AchievementSystem(data_dir=self.data_dir)
+        self.system.update_stat("snake_games_played", 2)
+        self.system.update_stat("snake_high_score", 80, is_increment=False)
+        self.system.flush()
+        other.update_stat("snake_games_played", 3)
+        other.update_stat("snake_high_score", 50, is_increment=False)
+        other.flush()
+        self.system.update_stat("quickmath_games_played")
+        self.system.flush()
+
+        merged = AchievementSystem(data_dir=self.data_dir)
+        self.assertEqual(merged.stats["snake_games_played"], 5)
+        self.assertEqual(merged.stats["snake_high_score"], 80)
+        self.assertEqual(merged.stats["quickmath_games_played"], 1)
+        self.assertTrue(merged.achievements["snake_first_game"]["unlocked"])
+
+    def test_interleaved_writes_keep_both(self):
+        """测试两个实例先后读、再以相反顺序写盘时也不会丢失对方的增量"""
+        other = AchievementSystem(data_dir=self.data_dir)
+        self.assertNotEqual(other.shard_file, self.system.shard_file)
+        self.system.update_stat("snake_games_played", 2)
+        other.update_stat("snake_games_played", 3)
+        first, second = self.system._serialize(), other._serialize()
+        atomic_write(other.shard_file, second)
+        atomic_write(self.system.shard_file, first)
+        self.assertEqual(AchievementSystem(data_dir=self.data_dir).stats["snake_games_played"], 5)
+
+    def test_merge_unlocks_achievements(self):
+        """测试合并其他实例的增量后达到条件的成就会解锁"""
+        other = AchievementSystem(data_dir=self.data_dir)
+        self.system.update_stat("calculator_total_operations", 60)
+        other.update_stat("calculator_total_operations", 50)
+        other.flush()
+        self.assertFalse(self.system.achievements["calc_pro"]["unlocked"])
+        self.assertEqual(self.system.sync_from_disk(), ["calc_pro"])
+        self.assertEqual(self.system.sync_from_disk(), [])
+        self.system.flush()
+        with open(self.system.shard_file, encoding='utf-8') as f:
+            self.assertTrue(json.load(f)["calc_pro"]["unlocked"])
+
+    def test_instance_slot_reused(self):
+        """测试实例编号在实例退出后被重新使用，同时运行的实例编号不同"""
+        first = InstanceSlot(self.data_dir, "test")
+        second = InstanceSlot(self.data_dir, "test")
+        self.assertNotEqual(first.instance_id, second.instance_id)
+        first.release()
+        third = InstanceSlot(self.data_dir, "test")
+        self.assertEqual(third.instance_id, first.instance_id)
+        second.release()
+        third.release()
+
+    def test_legacy_stats_loaded(self):
+        """测试读取只保存总值的旧版数据文件"""
+        with open(os.path.join(self.data_dir, "achievements.json"), 'w', encoding='utf-8') as f:
+            json.dump({"stats": {"twentyfour_games_won": 6, "snake_high_score": 40}}, f)
+        first = AchievementSystem(data_dir=self.data_dir)
+        second = AchievementSystem(data_dir=self.data_dir)
+        first.update_stat("twentyfour_games_won")
+        first.flush()
+        second.update_stat("twentyfour_games_won")
+        second.flush()
+        self.assertEqual(AchievementSystem(data_dir=self.data_dir).stats["twentyfour_games_won"], 8)
+
+
+class TestAchievementEventBus(unittest.TestCase):
+    """成就事件总线测试类"""
+
+    def setUp(self):
+        """测试前创建成就系统和事件总线"""
+        self.data_dir = tempfile.mkdtemp()
+        self.system = AchievementSystem(data_dir=self.data_dir)
+        self.unlocked = []
+        self.bus = AchievementEventBus(self.system, on_unlocked=self.unlocked.extend)
+
+    def tearDown(self):
+        self.bus.close()
+        self.system.flush()
+        shutil.rmtree(self.data_dir, ignore_errors=True)
+
+    def test_events_update_stats(self):
+        """测试事件被合并为统计更新并回报解锁"""
+        for _ in range(10):
+            self.bus.publish(AnswerCorrect("quickmath"))
+        self.bus.publish(ScoreReported("snake", 120))
+        self.bus.publish(ScoreReported("snake", 60))
+        self.bus.flush()
+        self.assertEqual(self.system.stats["quickmath_correct_answers"], 10)
+        self.assertEqual(self.system.stats["snake_high_score"], 120)
+        self.assertIn("quickmath_10_correct", self.unlocked)
+        self.assertIn("snake_100_score", self.unlocked)
+
+    def test_merged_unlock_reported(self):
+        """测试合并其他实例的进度后解锁的成就也通过回调回报"""
+        other = AchievementSystem(data_dir=self.data_dir)
+        self.system.update_stat("calculator_total_operations", 60)
+        other.update_stat("calculator_total_operations", 50)
+        other.flush()
+        self.bus.publish(GameStarted("snake"))
+        self.bus.flush()
+        self.assertIn("calc_pro", self.unlocked)
+        self.assertIn("snake_first_game", self.unlocked)
+
+    def test_unknown_events_reported(self):
+        """测试未知事件被计数而不是悄悄丢弃"""
+        self.bus.publish(GameEvent())
+        self.bus.publish(GameStarted("chess"))
+        self.bus.publish(GameStarted("chess"))
+        self.bus.flush()
+        self.assertEqual(self.bus.get_unknown_events(),
+                         {"GameEvent": 1, "GameStarted:chess_games_played": 2})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,68 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+try:
+    from PyQt5.QtWidgets import QApplication
+    from view.components.achievement_widget import UNLOCKED_ROLE, AchievementListModel
+except ImportError:
+    QApplication = None
+
+from core.achievement_system import AchievementSystem
+from core.persistence import WriteBehindWriter
+
+
+@unittest.skipIf(QApplication is None, "需要 PyQt5")
+class TestAchievementListModel(unittest.TestCase):
+    """成就列表模型测试类"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.app = QApplication.instance() or QApplication([])
+
+    def setUp(self):
+        self.data_dirs = [tempfile.mkdtemp(), tempfile.mkdtemp()]
+        self.writer = WriteBehindWriter(delay=0.05)
+        self.systems = [AchievementSystem(data_dir=d, writer=self.writer) for d in self.data_dirs]
+        self.model = AchievementListModel(self.systems[0])
+        self.changed = []
+        self.resets = []
+        self.model.dataChanged.connect(lambda first, last: self.changed.append((first.row(), last.row())))
+        self.model.modelReset.connect(lambda: self.resets.append(True))
+
+    def tearDown(self):
+        self.writer.close()
+        for data_dir in self.data_dirs:
+            shutil.rmtree(data_dir, ignore_errors=True)
+
+    def test_refresh_emits_changed_rows_only(self):
+        """测试刷新时只有状态变化的成就发出 dataChanged，没有变化时不发出"""
+        self.model.refresh()
+        self.assertEqual(self.changed, [])
+
+        self.assertEqual(self.systems[0].update_stat("twentyfour_games_won"), ["twentyfour_first_win"])
+        self.model.refresh()
+        row = list(self.systems[0].achievement_definitions).index("twentyfour_first_win")
+        self.assertIn((row, row), self.changed)
+        # 只有依赖这个统计项的成就（解锁或进度变化）会被通知
+        dependents = set(self.systems[0].rules_by_stat["twentyfour_games_won"])
+        self.assertLessEqual(len(self.changed), len(dependents))
+        self.assertTrue(all(first == last for first, last in self.changed))
+        self.assertTrue(self.model.data(self.model.index(row), UNLOCKED_ROLE))
+        self.assertEqual(self.resets, [])
+
+    def test_profile_switch_resets(self):
+        """测试切换档案时模型整体重置，并显示新档案的数据"""
+        self.systems[0].update_stat("twentyfour_games_won")
+        self.model.refresh()
+        self.model.set_achievement_system(self.systems[1])
+        self.assertEqual(len(self.resets), 1)
+        row = list(self.systems[1].achievement_definitions).index("twentyfour_first_win")
+        self.assertFalse(self.model.data(self.model.index(row), UNLOCKED_ROLE))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,97 @@
+import random
+import shutil
+import tempfile
+import unittest
+
+from core.mastery import MasteryModel
+from core.persistence import WriteBehindWriter
+from games.quick_math import (BORROW, CARRY, QuestionScheduler, QuickMathGame, fact_family, family_name)
+
+
+class TestMastery(unittest.TestCase):
+    """速算掌握度和自适应出题测试类"""
+
+    def setUp(self):
+        self.data_dir = tempfile.mkdtemp()
+        self.writer = WriteBehindWriter(delay=0.05)
+        self.model = MasteryModel(self.data_dir, writer=self.writer)
+
+    def tearDown(self):
+        self.writer.close()
+        shutil.rmtree(self.data_dir, ignore_errors=True)
+
+    def test_fact_families(self):
+        """测试题族划分：交换律、除法按乘法口诀的因数单独归族、两位数按进位/退位分类"""
+        self.assertEqual(fact_family(8, '*', 7), ('*', 7, 8))
+        self.assertEqual(fact_family(56, '/', 7), ('/', 7, 8))
+        self.assertEqual(fact_family(56, '/', 8), fact_family(56, '/', 7))
+        self.assertNotEqual(fact_family(56, '/', 7), fact_family(7, '*', 8))  # 除法与乘法分开统计
+        self.assertEqual(fact_family(17, '+', 5), CARRY)
+        self.assertEqual(fact_family(32, '-', 7), BORROW)
+        self.assertEqual(family_name(('*', 7, 8)), "7×8")
+        rng = random.Random(0)
+        for difficulty in (1, 2, 3):
+            families = QuickMathGame.families_for(difficulty)
+            for _ in range(2000):
+                num1, op, num2 = QuickMathGame.make_question(difficulty, rng)[0].split()[:3]
+                self.assertIn(fact_family(int(num1), op, int(num2)), families)
+
+    def test_record_and_reload(self):
+        """测试答题更新掌握度，并能从二进制文件恢复"""
+        skill = ('*', 7, 8)
+        self.assertEqual(self.model.mastery(skill), MasteryModel.PRIOR)
+        self.assertLess(self.model.record(skill, False), MasteryModel.PRIOR)
+        high = self.model.record(('+', 2, 3), True)
+        self.assertGreater(high, self.model.record(('+', 2, 4), True, response_ms=20000))
+        self.writer.flush()
+
+        reloaded = MasteryModel(self.data_dir, writer=self.writer)
+        self.assertEqual(len(reloaded), 3)
+        self.assertEqual(reloaded.state(skill).attempts, 1)
+        self.assertAlmostEqual(reloaded.mastery(skill), self.model.mastery(skill), places=5)
+
+    def test_gain_grows_with_time(self):
+        """测试掌握得好的题族隔得越久越值得复习，答对次数越多忘得越慢，弱项不会随时间好转"""
+        day = 24 * 3600.0
+        for _ in range(3):
+            self.model.record(('+', 2, 3), True, timestamp=1000.0)
+        self.model.record(('+', 2, 4), True, timestamp=1000.0)
+        self.model.record(('*', 7, 8), False, timestamp=1000.0)
+
+        gains = [self.model.expected_gain(('+', 2, 3), now=1000.0 + days * day) for days in (0, 1, 7, 30, 365)]
+        self.assertEqual(gains, sorted(gains))
+        self.assertLess(gains[0], gains[-1])
+        self.assertLessEqual(gains[-1], 1.0 - MasteryModel.PRIOR + 1e-9)
+        self.assertLess(self.model.expected_gain(('+', 2, 3), now=1000.0 + 7 * day),
+                        self.model.expected_gain(('+', 2, 4), now=1000.0 + 7 * day))
+        self.assertEqual(self.model.expected_gain(('*', 7, 8), now=1000.0 + 30 * day),
+                         self.model.expected_gain(('*', 7, 8), now=1000.0))
+
+    def test_scheduler_targets_weak_facts(self):
+        """测试经常答错的题族会更频繁地出现，但不会连续出现"""
+        weak = ('*', 7, 8)
+        self.model.record(weak, False)
+        game = QuickMathGame(self.model)
+        game.scheduler = QuestionScheduler(self.model, random.Random(1))
+        game.set_difficulty(3)
+        families = []
+        for _ in range(200):
+            game.generate_question()
+            families.append(game.current_family)
+            game.check_answer("-1" if game.current_family == weak else str(game.current_answer))
+        self.assertGreater(families.count(weak), 30)  # 随机出题时平均不到1次
+        for previous, current in zip(families, families[1:]):
+            self.assertFalse(previous == current == weak)
+
+    def test_timeout_counts_once(self):
+        """测试时间到记为答错，同一题不会重复记录"""
+        game = QuickMathGame(self.model)
+        game.generate_question()
+        game.give_up()
+        game.check_answer(str(game.current_answer))
+        self.assertEqual(self.model.state(game.current_family).attempts, 1)
+        self.assertEqual(self.model.state(game.current_family).correct, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,206 @@
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+from datetime import datetime
+
+from core.history_manager import HistoryManager
+from core.leaderboard import Leaderboard, LeaderboardStore
+from core.persistence import WriteBehindWriter, atomic_write
+from core.profile_store import DEFAULT_PROFILE_ID, ProfileStore
+from core.session_store import SESSION_RECORD, SessionStore, bucket_start
+
+
+class TestPersistence(unittest.TestCase):
+    """后台写入服务测试类"""
+
+    def setUp(self):
+        """测试前创建临时目录和写入服务"""
+        self.data_dir = tempfile.mkdtemp()
+        self.writer = WriteBehindWriter(delay=0.05)
+
+    def tearDown(self):
+        self.writer.close()
+        shutil.rmtree(self.data_dir, ignore_errors=True)
+
+    def test_atomic_write(self):
+        """测试原子写入不留下临时文件"""
+        path = os.path.join(self.data_dir, "a.json")
+        atomic_write(path, b"1")
+        atomic_write(path, b"2")
+        with open(path, 'rb') as f:
+            self.assertEqual(f.read(), b"2")
+        self.assertEqual(os.listdir(self.data_dir), ["a.json"])
+
+    def test_coalesced_writes(self):
+        """测试同一文件的多次修改只写一次"""
+        path = os.path.join(self.data_dir, "b.json")
+        calls = []
+
+        def serializer():
+            calls.append(1)
+            return b"x"
+
+        for _ in range(100):
+            self.writer.schedule(path, serializer)
+        self.assertFalse(os.path.exists(path))
+
+        deadline = time.monotonic() + 2
+        while not os.path.exists(path) and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertTrue(os.path.exists(path))
+        self.assertEqual(len(calls), 1)
+
+    def test_flush_waits_for_background_write(self):
+        """测试 flush 会等待后台线程正在进行的写入完成"""
+        path = os.path.join(self.data_dir, "slow.bin")
+        started = threading.Event()
+
+        def slow_serializer():
+            started.set()
+            time.sleep(0.2)
+            return b"done"
+
+        self.writer.schedule(path, slow_serializer)
+        self.assertTrue(started.wait(2))
+        self.writer.flush()
+        with open(path, 'rb') as f:
+            self.assertEqual(f.read(), b"done")
+
+    def test_history_flush(self):
+        """测试历史记录在 flush 后写盘"""
+        manager = HistoryManager(data_dir=self.data_dir, writer=self.writer)
+        manager.add_entry("1+1", "2", timestamp=datetime.now())
+        manager.flush()
+        with open(os.path.join(self.data_dir, "history.json"), encoding='utf-8') as f:
+            self.assertEqual(json.load(f)[0]["expression"], "1+1")
+
+
+class TestProfileStore(unittest.TestCase):
+    """多档案存储测试类"""
+
+    def setUp(self):
+        """测试前创建带旧版数据文件的临时目录"""
+        self.data_dir = tempfile.mkdtemp()
+        self.writer = WriteBehindWriter(delay=0.05)
+        with open(os.path.join(self.data_dir, "history.json"), 'w', encoding='utf-8') as f:
+            json.dump([{"expression": "1+1", "result": "2", "timestamp": "2025-01-01T00:00:00"}], f)
+
+    def tearDown(self):
+        self.writer.close()
+        shutil.rmtree(self.data_dir, ignore_errors=True)
+
+    def test_legacy_data_migrated(self):
+        """测试首次运行时旧数据迁移到默认档案"""
+        store = ProfileStore(self.data_dir, writer=self.writer)
+        profile = store.current()
+        self.assertEqual(profile.profile_id, DEFAULT_PROFILE_ID)
+        self.assertEqual(len(profile.history_manager.get_history()), 1)
+
+    def test_lazy_profiles(self):
+        """测试档案只在首次选择时加载，并且互相隔离"""
+        store = ProfileStore(self.data_dir, writer=self.writer)
+        child_id = store.create_profile("小明")
+        self.assertFalse(store.is_loaded(child_id))
+
+        child = store.select(child_id)
+        self.assertTrue(store.is_loaded(child_id))
+        child.achievement_system.update_stat("snake_games_played")
+        self.assertIs(store.select(child_id), child)
+        self.assertEqual(store.select(DEFAULT_PROFILE_ID).achievement_system.stats["snake_games_played"], 0)
+
+        self.writer.flush()
+        reopened = ProfileStore(self.data_dir, writer=self.writer)
+        self.assertEqual(reopened.index["current"], DEFAULT_PROFILE_ID)
+        self.assertEqual({p["name"] for p in reopened.list_profiles()}, {"默认", "小明"})
+        self.assertEqual(reopened.select(child_id).achievement_system.stats["snake_games_played"], 1)
+
+
+class TestSessionStore(unittest.TestCase):
+    """时间序列存储测试类"""
+
+    def setUp(self):
+        """测试前创建临时目录"""
+        self.data_dir = tempfile.mkdtemp()
+        self.store = SessionStore(self.data_dir)
+
+    def tearDown(self):
+        shutil.rmtree(self.data_dir, ignore_errors=True)
+
+    def test_fixed_width_records(self):
+        """测试原始记录定长追加并可按时间范围读取"""
+        base = 1_700_000_000
+        for i in range(10):
+            self.store.append("quickmath", score=i, correct=i, attempts=10,
+                              avg_response_ms=1000 + i, timestamp=base + i * 3600)
+        path = os.path.join(self.data_dir, "sessions", "quickmath.ts")
+        self.assertEqual(os.path.getsize(path), 10 * SESSION_RECORD.size)
+
+        series = self.store.read_sessions("quickmath", start=base + 2 * 3600, end=base + 5 * 3600)
+        self.assertEqual(list(series.scores), [2, 3, 4])
+        self.assertEqual(list(series.avg_response_ms), [1002.0, 1003.0, 1004.0])
+
+    def test_aggregates(self):
+        """测试各分辨率的聚合数据"""
+        day_start = bucket_start(1_700_000_000, 86400)
+        self.store.append("snake", score=30, timestamp=day_start + 10)
+        self.store.append("snake", score=50, timestamp=day_start + 20)
+        self.store.append("snake", score=10, timestamp=day_start + 86400 + 5)
+
+        days = self.store.read_aggregates("snake", "day")
+        self.assertEqual([(d.sessions, d.max_score) for d in days], [(2, 50), (1, 10)])
+        self.assertEqual(days[0].avg_score, 40)
+        hours = self.store.read_aggregates("snake", "hour", start=day_start + 3600)
+        self.assertEqual(len(hours), 1)
+        self.assertEqual(self.store.choose_resolution(0, 86400 * 365), "week")
+        self.assertEqual(self.store.choose_resolution(0, 86400), "hour")
+
+
+    def test_week_starts_on_monday(self):
+        """测试周聚合从本地周一零点开始"""
+        start = datetime.fromtimestamp(bucket_start(datetime(2024, 5, 17, 15, 30).timestamp(), 7 * 86400))
+        self.assertEqual(start, datetime(2024, 5, 13))
+        self.assertEqual(bucket_start(start.timestamp(), 7 * 86400), start.timestamp())
+
+    def test_clock_step_back_keeps_order(self):
+        """测试系统时钟往回调后记录仍然有序，范围查询结果正确"""
+        base = 1_700_000_000
+        for offset in (0, 100, 50, 200):
+            self.store.append("tetris", score=offset, timestamp=base + offset)
+        series = self.store.read_sessions("tetris")
+        self.assertEqual(list(series.timestamps), sorted(series.timestamps))
+        self.assertEqual(list(self.store.read_sessions("tetris", start=base + 100).scores), [100, 50, 200])
+
+class TestLeaderboard(unittest.TestCase):
+    """排行榜测试类"""
+
+    def test_bounded_and_ordered(self):
+        """测试排行榜只保留前K名，同分按日期先后排列"""
+        board = Leaderboard(k=3)
+        self.assertEqual(board.submit(50, "甲", "2025-01-02"), 1)
+        self.assertEqual(board.submit(80, "乙", "2025-01-03"), 1)
+        self.assertEqual(board.submit(50, "丙", "2025-01-01"), 2)
+        self.assertIsNone(board.submit(10, "丁", "2025-01-04"))
+        self.assertEqual(board.submit(60, "戊", "2025-01-05"), 2)
+        self.assertEqual([e["name"] for e in board.entries], ["乙", "戊", "丙"])
+
+    def test_store_persisted(self):
+        """测试排行榜持久化"""
+        data_dir = tempfile.mkdtemp()
+        writer = WriteBehindWriter(delay=0.05)
+        try:
+            store = LeaderboardStore(data_dir, writer=writer)
+            self.assertEqual(store.submit("snake", 30, "小明"), 1)
+            self.assertIsNone(store.submit("twentyfour", 1, "小明"))
+            writer.flush()
+            self.assertEqual(LeaderboardStore(data_dir, writer=writer).top("snake")[0]["name"], "小明")
+        finally:
+            writer.close()
+            shutil.rmtree(data_dir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    unittest.main()
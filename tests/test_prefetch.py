@@ -0,0 +1,66 @@
+import threading
+import time
+import unittest
+
+from core.prefetch import PrefetchQueue
+from games.quick_math import QuickMathGame
+
+
+class TestPrefetchQueue(unittest.TestCase):
+    """题目预取队列测试类"""
+
+    def wait_until(self, condition, timeout=2.0):
+        deadline = time.monotonic() + timeout
+        while not condition() and time.monotonic() < deadline:
+            time.sleep(0.01)
+        return condition()
+
+    def test_prime_and_refill(self):
+        """测试启动时填满队列，低于水位后补满"""
+        queue = PrefetchQueue(lambda difficulty: difficulty, capacity=5, low_watermark=2)
+        try:
+            self.assertTrue(self.wait_until(lambda: len(queue) == 5))
+            for _ in range(3):
+                self.assertEqual(queue.get(), 1)
+            time.sleep(0.05)
+            self.assertEqual(len(queue), 2)  # 还没有低于水位
+            queue.get()
+            self.assertEqual(queue.misses, 0)
+            self.assertTrue(self.wait_until(lambda: len(queue) == 5))
+        finally:
+            queue.close()
+
+    def test_change_difficulty(self):
+        """测试切换难度后不会再取到旧难度的题目"""
+        release = threading.Event()
+
+        def slow_producer(difficulty):
+            release.wait(1)
+            return difficulty
+
+        queue = PrefetchQueue(slow_producer, capacity=3, low_watermark=1)
+        try:
+            queue.set_difficulty(3)
+            release.set()
+            self.assertTrue(self.wait_until(lambda: len(queue) == 3))
+            self.assertEqual([queue.get() for _ in range(3)], [3, 3, 3])
+        finally:
+            queue.close()
+
+    def test_empty_queue_falls_back(self):
+        """测试队列为空时当场生成题目"""
+        queue = PrefetchQueue(QuickMathGame.make_question, difficulty=2, capacity=2, low_watermark=1)
+        queue.close()
+        while len(queue):
+            queue.get()
+        question, answer = queue.get()
+        self.assertEqual(queue.misses, 1)
+        self.assertTrue(question.endswith("= ?"))
+
+        game = QuickMathGame()
+        game.set_question(question, answer)
+        self.assertTrue(game.check_answer(str(answer)))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,217 @@
+import random
+import shutil
+import tempfile
+import unittest
+
+from core.latency import LatencyStats, P2Quantile
+from core.mastery import MasteryModel
+from core.persistence import WriteBehindWriter
+from core.shuffle import FeistelPermutation
+from games.expression import evaluate, tokenize
+from games.multi_step import MultiStepBuilder, count_steps, render
+from games.quick_math import (CARRY, MULTI_STEP_LIMITS, QuestionSampler, QuickMathGame, fact_family,
+                              question_grid)
+
+
+class TestQuestionSampler(unittest.TestCase):
+    """速算不重复抽题测试类"""
+
+    def test_permutation(self):
+        """测试排列是双射，相同种子结果相同"""
+        for size in (1, 2, 7, 100, 810, 1000):
+            permutation = FeistelPermutation(size, seed=3)
+            self.assertEqual(sorted(permutation[i] for i in range(size)), list(range(size)))
+        self.assertEqual([FeistelPermutation(50, 1)[i] for i in range(50)],
+                         [FeistelPermutation(50, 1)[i] for i in range(50)])
+        with self.assertRaises(IndexError):
+            FeistelPermutation(5)[5]
+
+    def test_no_repeats_until_exhausted(self):
+        """测试同一运算的题目全部出过之前不会重复"""
+        sampler = QuestionSampler(seed=1)
+        questions = {}
+        for _ in range(400):
+            question, answer = sampler.draw(1)
+            questions.setdefault(question.split()[1], []).append(question)
+            self.assertEqual(eval(question.replace("= ?", "")), answer)
+        self.assertEqual(len(set(questions['+'][:100])), min(100, len(questions['+'])))
+        self.assertEqual(len(set(questions['-'][:55])), min(55, len(questions['-'])))
+        self.assertEqual(len(set(questions['+'])), 100)
+
+    def test_same_space_as_random_questions(self):
+        """测试抽题范围与 make_question 完全相同（包括除法）"""
+        rng = random.Random(0)
+        for difficulty in (2, 3):
+            expected = {QuickMathGame.make_question(difficulty, rng)[0] for _ in range(60000)}
+            sampler = QuestionSampler(seed=2)
+            drawn = {sampler.draw(difficulty)[0] for _ in range(8000)}
+            self.assertEqual(drawn, expected)
+        self.assertEqual(question_grid(3, '/'), (10, 10))
+
+    def test_family_no_repeats(self):
+        """测试按题族出题时，同一题族的各种写法全部出过之前不会重复，新一轮不以上一轮最后一题开头"""
+        sampler = QuestionSampler(seed=4)
+        for family, size in ((('*', 7, 8), 2), (('/', 3, 6), 2), (('+', 4, 4), 1), (CARRY, None)):
+            drawn = [sampler.draw_family(family, 3)[0] for _ in range(200)]
+            for question in drawn:
+                num1, op, num2 = question.split()[:3]
+                self.assertEqual(fact_family(int(num1), op, int(num2)), family)
+            size = size or len(set(drawn))
+            for start in range(0, len(drawn) - size + 1, size):
+                self.assertEqual(len(set(drawn[start:start + size])), size)
+            if size > 1:
+                self.assertTrue(all(a != b for a, b in zip(drawn, drawn[1:])))
+        with self.assertRaises(ValueError):
+            sampler.draw_family(('/', 3, 6), 2)
+
+    def test_scheduler_uses_sampler(self):
+        """测试按掌握度出题时具体题目也由抽题器不重复地给出"""
+        data_dir = tempfile.mkdtemp()
+        writer = WriteBehindWriter(delay=0.05)
+        try:
+            game = QuickMathGame(MasteryModel(data_dir, writer=writer))
+            self.assertIs(game.scheduler.sampler, game.sampler)
+            game.set_difficulty(3)
+            drawn = {}
+            for _ in range(300):
+                game.generate_question()
+                drawn.setdefault(game.current_family, []).append(game.current_question)
+                game.check_answer(str(game.current_answer))
+            for family, questions in drawn.items():
+                if family[1]:  # 具体的题族最多两种写法
+                    self.assertEqual(len(set(questions[:2])), min(2, len(set(questions))))
+        finally:
+            writer.close()
+            shutil.rmtree(data_dir, ignore_errors=True)
+
+
+class TestMultiStep(unittest.TestCase):
+    """多步题生成测试类"""
+
+    @staticmethod
+    def _left_to_right(tokens):
+        """按运算顺序依次算出的所有中间结果（括号内先算，同级从左往右）"""
+        results = []
+        ops, values = [], []
+
+        def reduce():
+            b, a, op = values.pop(), values.pop(), ops.pop()
+            values.append(evaluate([str(a), op, str(b)]))
+            results.append(values[-1])
+
+        precedence = {'+': 1, '-': 1, '*': 2, '/': 2}
+        for token in tokens:
+            if token == '(':
+                ops.append(token)
+            elif token == ')':
+                while ops[-1] != '(':
+                    reduce()
+                ops.pop()
+            elif token in precedence:
+                while ops and ops[-1] != '(' and precedence[ops[-1]] >= precedence[token]:
+                    reduce()
+                ops.append(token)
+            else:
+                values.append(int(token))
+        while ops:
+            reduce()
+        return results
+
+    def test_integer_intermediates(self):
+        """测试答案正确，步数准确，每个中间结果都是不超过上限的非负整数"""
+        rng = random.Random(0)
+        for difficulty, limit in MULTI_STEP_LIMITS.items():
+            for steps in (1, 2, 3, 6):
+                for brackets in (False, True):
+                    for _ in range(200):
+                        question, answer = QuickMathGame.make_multi_step(difficulty, steps, brackets, rng)
+                        tokens = tokenize(question.replace("= ?", ""))
+                        self.assertEqual(evaluate(tokens), answer)
+                        self.assertEqual(sum(t in "+-*/" for t in tokens), steps)
+                        if not brackets:
+                            self.assertNotIn("(", tokens)
+                        for value in self._left_to_right(tokens):
+                            self.assertEqual(value.denominator, 1, question)
+                            self.assertTrue(0 <= value <= limit, question)
+
+    def test_many_steps_and_fixed_answer(self):
+        """测试步数很多时也能一次生成，并且可以指定答案"""
+        builder = MultiStepBuilder("+-*/", 100)
+        tree = builder.build(200, random.Random(1), answer=24)
+        self.assertEqual(count_steps(tree), 200)
+        self.assertEqual(evaluate(tokenize(render(tree))), 24)
+        with self.assertRaises(ValueError):
+            MultiStepBuilder("*/", 100)
+
+    def test_game_accepts_multi_step(self):
+        """测试游戏可以直接使用多步题，不记录按运算符的用时"""
+        data_dir = tempfile.mkdtemp()
+        writer = WriteBehindWriter(delay=0.05)
+        try:
+            stats = LatencyStats(data_dir, writer=writer)
+            game = QuickMathGame(latency=stats)
+            game.set_question("3 + 4 * 2 = ?", 11)
+            self.assertIsNone(game.current_family)
+            self.assertTrue(game.check_answer("11", response_ms=900))
+            self.assertEqual(stats.summary(), {})
+        finally:
+            writer.close()
+            shutil.rmtree(data_dir, ignore_errors=True)
+
+
+class TestLatencyStats(unittest.TestCase):
+    """答题用时分位数测试类"""
+
+    def setUp(self):
+        self.data_dir = tempfile.mkdtemp()
+        self.writer = WriteBehindWriter(delay=0.05)
+
+    def tearDown(self):
+        self.writer.close()
+        shutil.rmtree(self.data_dir, ignore_errors=True)
+
+    def test_p2_accuracy(self):
+        """测试流式估计与精确分位数接近"""
+        rng = random.Random(0)
+        values = [rng.lognormvariate(8, 0.5) for _ in range(10000)]
+        exact = sorted(values)
+        for p in (0.5, 0.9):
+            sketch = P2Quantile(p)
+            for value in values:
+                sketch.add(value)
+            self.assertAlmostEqual(sketch.value() / exact[int(p * len(exact))], 1, delta=0.03)
+        small = P2Quantile(0.5)
+        self.assertIsNone(small.value())
+        for value in (300, 100, 200):
+            small.add(value)
+        self.assertEqual(small.value(), 200)
+
+    def test_per_operator_persisted(self):
+        """测试按运算符统计，并能从二进制文件恢复"""
+        stats = LatencyStats(self.data_dir, writer=self.writer)
+        rng = random.Random(1)
+        for _ in range(500):
+            stats.record('+', rng.uniform(1000, 2000))
+            stats.record('*', rng.uniform(3000, 6000))
+        stats.record('/', 2500)
+        self.writer.flush()
+
+        reloaded = LatencyStats(self.data_dir, writer=self.writer)
+        self.assertEqual(reloaded.summary(), stats.summary())
+        self.assertLess(reloaded.quantile('+', 0.9), reloaded.quantile('*', 0.5))
+        self.assertEqual(reloaded.summary()['/'], {"count": 1, "p50": 2500, "p90": 2500})
+
+    def test_game_records_correct_answers(self):
+        """测试游戏只记录答对的题的用时"""
+        stats = LatencyStats(self.data_dir, writer=self.writer)
+        game = QuickMathGame(latency=stats)
+        game.set_question("3 + 4 = ?", 7)
+        game.check_answer("8", response_ms=900)
+        game.set_question("3 * 4 = ?", 12)
+        game.check_answer("12", response_ms=1500)
+        self.assertEqual(stats.count('+'), 0)
+        self.assertEqual(stats.quantile('*', 0.5), 1500)
+
+
+if __name__ == '__main__':
+    unittest.main()
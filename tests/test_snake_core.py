@@ -0,0 +1,93 @@
+import random
+import unittest
+from collections import deque
+
+from games.snake_core import DOWN, LEFT, RIGHT, UP, FreeCells, SnakeSimulation
+
+
+class TestSnakeSimulation(unittest.TestCase):
+    """贪吃蛇纯逻辑模拟测试类"""
+
+    def test_free_cells(self):
+        """测试空闲格子索引与集合的结果一致"""
+        free = FreeCells(50)
+        occupied = set()
+        rng = random.Random(0)
+        for _ in range(5000):
+            cell = rng.randrange(50)
+            if rng.random() < 0.6:
+                self.assertEqual(free.occupy(cell), cell not in occupied)
+                occupied.add(cell)
+            else:
+                free.release(cell)
+                occupied.discard(cell)
+            self.assertEqual(len(free), 50 - len(occupied))
+            choice = free.choice(rng)
+            self.assertTrue(choice is None if len(occupied) == 50 else choice not in occupied)
+
+    def test_same_seed_same_game(self):
+        """测试相同种子和操作序列得到相同的一局，状态始终一致"""
+        def play(seed):
+            game = SnakeSimulation(12, 10, seed=seed)
+            rng = random.Random(seed)
+            trace = []
+            for _ in range(3000):
+                result = game.step(rng.choice([UP, DOWN, LEFT, RIGHT, None]))
+                self.assertEqual(sum(game.occupied), game.snake_length)
+                self.assertEqual(len(game.free_cells), 120 - game.snake_length)
+                self.assertNotIn(game.food, game.body)
+                trace.append((game.head, game.food, game.score))
+                if result.game_over:
+                    game.reset()
+            return trace
+
+        self.assertEqual(play(3), play(3))
+
+    def test_collisions(self):
+        """测试撞墙结束、反向无效、可以跟着尾巴走"""
+        game = SnakeSimulation(5, 3, seed=0)
+        game.food = None  # 不吃食物，方便检查位置
+        game.step(LEFT)  # 掉头被忽略
+        self.assertEqual(game.cell_xy(game.head), (3, 1))
+        self.assertFalse(game.step().game_over)
+        self.assertTrue(game.step().game_over)
+        self.assertTrue(game.step(LEFT).game_over)
+
+        game = SnakeSimulation(2, 2, seed=0)
+        game.length = 4
+        game.food = None
+        for direction in (UP, LEFT, DOWN, RIGHT, UP, LEFT, DOWN):  # 从右下角绕圈
+            game.direction = direction
+            self.assertFalse(game.step().game_over)
+        self.assertEqual(game.snake_length, 4)
+
+    def test_full_board_is_a_win(self):
+        """测试蛇占满棋盘时判定为赢，而不是卡住"""
+        game = SnakeSimulation(4, 1, seed=0)
+        game.body = deque([0])
+        game.occupied = bytearray([1, 0, 0, 0])
+        game.free_cells = FreeCells(4)
+        game.free_cells.occupy(0)
+        game.length = 4
+        for expected in (False, False, True):
+            game.food = game.head + 1
+            result = game.step(RIGHT)
+            self.assertTrue(result.ate)
+            self.assertEqual(result.game_over, expected)
+        self.assertTrue(game.won)
+        self.assertIsNone(game.food)
+
+    def test_long_snake_steps(self):
+        """测试长蛇在大棋盘上也能快速模拟"""
+        game = SnakeSimulation(100, 100, seed=1)
+        game.length = 5000
+        rng = random.Random(1)
+        for _ in range(20000):
+            if game.step(rng.choice([UP, DOWN, LEFT, RIGHT, None, None, None])).game_over:
+                game.reset()
+                game.length = 5000
+        self.assertEqual(sum(game.occupied), game.snake_length)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,340 @@
+import random
+import time
+import unittest
+from fractions import Fraction
+
+from games.batch_solver import hands_in_range, solve_many
+from games.expression import evaluate, tokenize, verify_answer
+from games.puzzle_db import PuzzleDatabase
+from games.puzzle_rating import assign_buckets, rate_puzzle
+from games.reachability import analyze, can_reach, next_step
+from games.solver import SubsetSolver, expressions, solve, value_table
+from games.target_index import TargetIndex
+from games.twenty_four_game import TwentyFourGame
+
+
+class TestPuzzleDatabase(unittest.TestCase):
+    """二十四点题库测试类"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.db = PuzzleDatabase()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.db.close()
+
+    def test_all_combinations(self):
+        """测试题库包含全部1820种组合，其中1362种可解"""
+        self.assertEqual(self.db.count, 1820)
+        self.assertEqual(sum(self.db.count_for(level) for level in (1, 2, 3)), 1362)
+
+    def test_lookup(self):
+        """测试按牌面查找记录"""
+        puzzle = self.db.lookup([8, 3, 8, 3])
+        self.assertTrue(puzzle.solvable)
+        self.assertEqual(puzzle.solution, "8 / (3 - 8 / 3)")
+        self.assertFalse(self.db.lookup([1, 1, 1, 1]).solvable)
+
+    def test_sample_matches_solver(self):
+        """测试抽到的题目难度正确且规范解法可以算出24"""
+        rng = random.Random(1)
+        for level in (1, 2, 3):
+            for _ in range(10):
+                puzzle = self.db.sample(level, rng)
+                self.assertEqual(puzzle.difficulty, level)
+                self.assertEqual(puzzle.solution_count, len(solve(puzzle.numbers)))
+                self.assertEqual(eval(puzzle.solution), 24)
+
+    def test_calibrated_difficulty(self):
+        """测试难度越高的题目评分越高，简单题不需要分数"""
+        scores = {1: [], 2: [], 3: []}
+        for puzzle_id in range(self.db.count):
+            puzzle = self.db.get(puzzle_id)
+            if puzzle.solvable:
+                scores[puzzle.difficulty].append(puzzle.score)
+        averages = [sum(scores[level]) / len(scores[level]) for level in (1, 2, 3)]
+        self.assertLess(averages[0], averages[1])
+        self.assertLess(averages[1], averages[2])
+        self.assertEqual(self.db.lookup([3, 3, 8, 8]).difficulty, 3)
+        self.assertEqual(self.db.lookup([1, 2, 3, 4]).difficulty, 1)
+
+    def test_generate_numbers(self):
+        """测试出题时直接使用题库中的解法"""
+        game = TwentyFourGame()
+        numbers = game.generate_numbers(2)
+        self.assertEqual(len(numbers), 4)
+        self.assertEqual(self.db.lookup(numbers).solution, game.get_solution())
+
+
+class TestSolver(unittest.TestCase):
+    """精确求解器测试类"""
+
+    def test_exact_fractions(self):
+        """测试需要分数的解法不受浮点误差影响"""
+        self.assertEqual([s.expression for s in solve([3, 3, 8, 8])], ["8 / (3 - 8 / 3)"])
+        self.assertFalse(solve([3, 3, 8, 8])[0].integral)
+
+    def test_distinct_solutions(self):
+        """测试交换律和结合律意义下相同的解法只出现一次"""
+        self.assertEqual([s.expression for s in solve([6, 6, 6, 6])], ["6 * 6 - 6 - 6", "6 + 6 + 6 + 6"])
+        expressions = [s.expression for s in solve([1, 2, 3, 4])]
+        self.assertIn("1 * 2 * 3 * 4", expressions)
+        self.assertEqual(len(expressions), len(set(expressions)))
+
+    def test_all_solutions_evaluate(self):
+        """测试每个解法都能算出目标值"""
+        for numbers in ([1, 5, 5, 5], [2, 7, 8, 12], [4, 4, 10, 10]):
+            solutions = solve(numbers)
+            self.assertTrue(solutions)
+            for solution in solutions:
+                self.assertAlmostEqual(eval(solution.expression), 24)
+
+    def test_unsolvable(self):
+        """测试无解的组合"""
+        game = TwentyFourGame()
+        game.numbers = [1, 1, 1, 1]
+        self.assertFalse(game.find_solution())
+        self.assertEqual(game.get_solution(), "没有找到解决方案")
+
+
+class TestPuzzleRating(unittest.TestCase):
+    """题目难度评估测试类"""
+
+    def test_features(self):
+        """测试难度特征"""
+        hard = rate_puzzle([8, 3, 8, 3])
+        self.assertEqual(hard.solution_count, 1)
+        self.assertTrue(hard.needs_fraction)
+        self.assertTrue(hard.needs_division)
+        self.assertEqual(hard.hardest_step, 4)
+
+        easy = rate_puzzle([1, 2, 3, 4])
+        self.assertFalse(easy.needs_fraction)
+        self.assertEqual(easy.min_depth, 1)
+        self.assertLess(easy.score, hard.score)
+        self.assertFalse(rate_puzzle([1, 1, 1, 1]).solvable)
+
+    def test_assign_buckets(self):
+        """测试按评分排名划分难度，无解题目不参与"""
+        ratings = [rate_puzzle(numbers) for numbers in
+                   ([1, 2, 3, 4], [3, 3, 8, 8], [1, 1, 1, 1], [6, 6, 6, 6], [4, 4, 10, 10])]
+        levels = assign_buckets(ratings)
+        self.assertEqual(levels[2], 0)
+        self.assertEqual(levels[0], 1)
+        self.assertEqual(levels[1], 3)
+
+
+class TestSubsetSolver(unittest.TestCase):
+    """任意个数字、任意目标值求解器测试类"""
+
+    def test_value_table_matches_expressions(self):
+        """测试 value_table 与 expressions 结果相同，但最外层不进入缓存"""
+        for numbers in ([3, 8, 3, 8], [7], [1, 5, 5, 5]):
+            expressions.cache_clear()
+            table = value_table(numbers)
+            misses = expressions.cache_info().misses
+            self.assertEqual(table, expressions(tuple(sorted(numbers))))
+            if len(numbers) > 1:
+                self.assertEqual(expressions.cache_info().misses, misses + 1)
+
+    def test_agrees_with_exact_solver(self):
+        """测试四个数时与精确求解器结论一致"""
+        for numbers in ([3, 3, 8, 8], [1, 1, 1, 1], [4, 4, 10, 10], [1, 1, 1, 13]):
+            self.assertEqual(SubsetSolver(numbers).can_reach(24), bool(solve(numbers)))
+
+    def test_more_numbers_and_targets(self):
+        """测试五到七个数字以及其他目标值"""
+        for numbers, target in (([1, 2, 3, 4, 5], 10), ([13, 12, 11, 10, 9, 8], 1000),
+                                ([2, 3, 5, 7, 11, 13, 1], 2024)):
+            expression = SubsetSolver(numbers).find_expression(target)
+            self.assertIsNotNone(expression)
+            self.assertAlmostEqual(eval(expression), target)
+            used = sorted(int(token) for token in expression.replace("(", " ").replace(")", " ").split()
+                          if token.isdigit())
+            self.assertEqual(used, sorted(numbers))
+        self.assertIsNone(SubsetSolver([1, 1, 1, 1, 1]).find_expression(100))
+
+    def test_interactive_limit(self):
+        """测试不超过 MAX_INTERACTIVE 个数字时，算不出的目标也能很快得出结论；游戏不接受更多数字"""
+        size = SubsetSolver.MAX_INTERACTIVE
+        for numbers in (list(range(1, size + 1)), list(range(13, 13 - size, -1))):
+            start = time.perf_counter()
+            self.assertFalse(SubsetSolver(numbers).can_reach(99991))
+            self.assertLess(time.perf_counter() - start, 1.0)
+        with self.assertRaises(ValueError):
+            TwentyFourGame(target=24, count=size + 1)
+
+    def test_game_variant(self):
+        """测试"五张牌凑10"玩法"""
+        game = TwentyFourGame(target=10, count=5)
+        numbers = game.generate_numbers(1)
+        self.assertEqual(len(numbers), 5)
+        self.assertTrue(all(1 <= n <= 10 for n in numbers))
+        self.assertAlmostEqual(eval(game.get_solution()), 10)
+        self.assertTrue(game.check_answer(game.get_solution())[0])
+
+    def test_impossible_variant(self):
+        """测试凑不出的玩法直接报错，而不是一直随机重试"""
+        with self.assertRaises(ValueError):
+            TwentyFourGame(target=24, count=1)
+        with self.assertRaises(ValueError):
+            TwentyFourGame(target=13 ** 4 + 1, count=4)
+        game = TwentyFourGame(target=12, count=1)
+        with self.assertRaises(ValueError):
+            game.generate_numbers(1)  # 难度1只用1-10
+        self.assertEqual(game.generate_numbers(2), [12])
+
+
+class TestTargetIndex(unittest.TestCase):
+    """目标值索引测试类"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.index = TargetIndex()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.index.close()
+
+    def test_matches_solver(self):
+        """测试索引与求解器一致"""
+        self.assertEqual(self.index.count(24), 1362)
+        for hand in self.index.hands_for(17)[::50]:
+            self.assertEqual(hand.solution_count, len(solve(hand.numbers, 17)))
+
+    def test_division_only(self):
+        """测试只用除法才能凑出的组合"""
+        hands = self.index.hands_for(17, division_only=True)
+        self.assertEqual(len(hands), self.index.count(17, division_only=True))
+        self.assertTrue(0 < len(hands) < self.index.count(17))
+        for hand in hands[:10]:
+            self.assertTrue(hand.division_only)
+            self.assertTrue(all("/" in s.expression for s in solve(hand.numbers, 17)))
+        self.assertIn((3, 3, 8, 8), [hand.numbers for hand in self.index.hands_for(24, division_only=True)])
+
+    def test_make_n_variant(self):
+        """测试"凑N"玩法从索引中出题"""
+        rng = random.Random(7)
+        target = self.index.random_target(rng)
+        game = TwentyFourGame(target=target)
+        numbers, solution = game.make_puzzle(1, rng)
+        self.assertEqual(evaluate(tokenize(solution)), target)
+        with self.assertRaises(ValueError):
+            self.index.hands_for(1000)
+
+
+class TestAnswerVerifier(unittest.TestCase):
+    """答案验证测试类"""
+
+    def test_exact_evaluation(self):
+        """测试精确分数计算和运算优先级"""
+        self.assertEqual(evaluate(tokenize("8 ÷ （3 - 8 / 3）")), 24)
+        self.assertEqual(evaluate(tokenize("2*(3+4)*5-6/(1+2)")), 68)
+        self.assertEqual(evaluate(tokenize("3 - 8 - 8")), -13)
+        for text in ("8 / (3 - 3)", "(8 + 3", "8 8", "8 +", "__import__('os')"):
+            with self.assertRaises(ValueError):
+                evaluate(tokenize(text))
+
+    def test_number_usage(self):
+        """测试按多重集检查数字：11 不算用了 1，多用或少用都会指出"""
+        numbers = [1, 3, 8, 8]
+        self.assertTrue(verify_answer("(1 + 3) * 8 - 8", numbers)[0])
+        self.assertEqual(verify_answer("11 + 8 + 8 - 3", numbers),
+                         (False, "题目里没有数字 11，还没有用数字 1"))
+        self.assertEqual(verify_answer("8 * 3 * 1 + 8 - 8", numbers), (False, "数字 8 只能用2次"))
+        self.assertEqual(verify_answer("8 * 3 * 1", numbers), (False, "还没有用数字 8"))
+
+    def test_wrong_result(self):
+        """测试中间出现分数时按精确值判断，结果不对时显示精确结果"""
+        self.assertEqual(verify_answer("3 - 8 / (8 - 3)", [3, 3, 8, 8]), (False, "计算结果是 7/5，不是24哦"))
+        self.assertTrue(verify_answer("8 / 3 * 9", [8, 3, 9])[0])
+
+
+class TestReachability(unittest.TestCase):
+    """边输入边检查测试类"""
+
+    def test_can_reach(self):
+        """测试剩余值能否算出24"""
+        self.assertTrue(can_reach([3, 3, 8, 8]))
+        self.assertTrue(can_reach([Fraction(1, 3), 8]))
+        self.assertFalse(can_reach([16, 3, 3]))
+        self.assertEqual(str(next_step([Fraction(1, 3), 8])), "8 ÷ 1/3 = 24")
+
+    def test_partial_answers(self):
+        """测试闭合的括号算作组合好的值"""
+        numbers = [3, 3, 8, 8]
+        self.assertEqual(analyze("8 / (3", numbers).status, "reachable")
+        progress = analyze("(3 - 8 / 3)", numbers)
+        self.assertEqual(progress.status, "reachable")
+        self.assertEqual(sorted(progress.values), [Fraction(1, 3), 8])
+        self.assertEqual(analyze("(8 + 8)", numbers).status, "unreachable")
+        self.assertEqual(analyze("8 / (3 - 8 / 3)", numbers).status, "solved")
+        self.assertEqual(analyze("(8 + 3) * 3 - 8", numbers).status, "unreachable")
+
+    def test_unbracketed_operations(self):
+        """测试不加括号时已经确定的运算也算作组合好的值（先乘除后加减）"""
+        numbers = [1, 2, 12, 13]
+        progress = analyze("12*2", numbers)
+        self.assertEqual(sorted(progress.values), [1, 13, 24])
+        self.assertEqual(progress.status, "unreachable")
+        self.assertEqual(len(analyze("12*1", numbers).values), 4)  # 1 可能还要写成 13
+        self.assertEqual(sorted(analyze("8 + 8", [3, 3, 8, 8]).values), [3, 3, 8, 8])
+        self.assertEqual(analyze("8 + 8 -", [3, 3, 8, 8]).status, "unreachable")
+        self.assertEqual(sorted(analyze("8 / (3 - 8 / 3", [3, 3, 8, 8]).values), [Fraction(8, 3), 3, 8])
+
+    def test_invalid_numbers(self):
+        """测试使用题目以外的数字，正在输入的多位数不算错"""
+        self.assertEqual(analyze("(9 + 3)", [3, 3, 8, 8]).status, "invalid")
+        self.assertEqual(analyze("(8 + 8 + 8)", [3, 3, 8, 8]).status, "invalid")
+        self.assertEqual(analyze("(1", [13, 1, 2, 5]).status, "reachable")
+        self.assertEqual(analyze("13 - 1", [13, 2, 5, 6]).status, "invalid")
+
+    def test_missing_operator(self):
+        """测试两个数字之间或数字和括号之间缺少运算符时判为有误，不会丢掉数字"""
+        self.assertEqual(analyze("(12 1 13)", [1, 1, 13, 12]).status, "invalid")
+        self.assertEqual(analyze("1 1 1", [1, 1, 1, 12]).status, "invalid")
+        self.assertEqual(analyze("1 (", [1, 1, 1, 12]).status, "invalid")
+
+
+class TestBatchSolver(unittest.TestCase):
+    """批量求解测试类"""
+
+    def test_matches_exact_solver(self):
+        """测试与精确求解器对1-13全部组合的判断一致，给出的解法都能算出24"""
+        hands = hands_in_range(1, 13)
+        result = solve_many(hands)
+        for hand, solvable, witness in zip(hands, result.solvable, result.witnesses):
+            self.assertEqual(bool(solvable), bool(solve(hand.astype(int).tolist())))
+            if solvable:
+                self.assertAlmostEqual(eval(witness), 24)
+            else:
+                self.assertIsNone(witness)
+
+    def test_division_by_zero(self):
+        """测试除以零不会被当成解（也不会通过无穷大凑出目标值）"""
+        result = solve_many([[3, 3, 8, 8], [8, 3, 8, 3], [0, 0, 0, 0], [1, 1, 1, 1]])
+        self.assertEqual(result.solvable.tolist(), [True, True, False, False])
+        self.assertEqual(result.witnesses[0], result.witnesses[1])
+        self.assertFalse(solve_many([[0, 1, 2, 3]], target=float('inf')).solvable[0])
+
+    def test_decimals_and_targets(self):
+        """测试小数和其他目标值"""
+        result = solve_many([[0.5, 2, 3, 8], [1.5, 1.5, 1, 1]], target=10)
+        self.assertAlmostEqual(eval(result.witnesses[0]), 10)
+        self.assertFalse(result.solvable[1])
+        with self.assertRaises(ValueError):
+            solve_many([[1, 2, 3]])
+
+    def test_witness_keeps_precision(self):
+        """测试大数和小数的解法按精确数字写出，能算回目标值"""
+        cases = [([1234567, 1, 1, 1], 1234567), ([0.1, 0.2, 3, 10], 3.3), ([123.456, 1, 1, 2], 246.912)]
+        for hand, target in cases:
+            result = solve_many([hand], target=target)
+            self.assertTrue(result.solvable[0])
+            self.assertNotIn("e+", result.witnesses[0])
+            self.assertAlmostEqual(eval(result.witnesses[0]), target, delta=1e-9 * abs(target))
+
+
+if __name__ == '__main__':
+    unittest.main()
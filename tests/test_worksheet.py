@@ -0,0 +1,70 @@
+import csv
+import os
+import shutil
+import tempfile
+import unittest
+
+from games.worksheet import difficulty_counts, generate_sheet, generate_sheets, write_worksheets
+
+
+class TestWorksheet(unittest.TestCase):
+    """练习卷生成测试类"""
+
+    def setUp(self):
+        self.out_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.out_dir, ignore_errors=True)
+
+    def test_difficulty_mix(self):
+        """测试各难度题数按比例分配且总数不变"""
+        self.assertEqual(difficulty_counts(10, {1: 0.4, 2: 0.4, 3: 0.2}), {1: 4, 2: 4, 3: 2})
+        self.assertEqual(sum(difficulty_counts(7, {1: 1, 2: 1, 3: 1}).values()), 7)
+        problems = generate_sheet("quick", 50, {1: 0.5, 3: 0.5}, seed=1, index=0)
+        self.assertEqual(sum(p.difficulty == 3 for p in problems), 25)
+        with self.assertRaises(ValueError):
+            difficulty_counts(10, {4: 1})
+
+    def test_no_duplicates(self):
+        """测试同一张卷子上没有重复题目（二十四点按数字组合去重）"""
+        quick = generate_sheet("quick", 100, {1: 1}, seed=2, index=0)
+        self.assertEqual(len({p.question for p in quick}), 100)
+        puzzles = generate_sheet("24", 200, {1: 1}, seed=2, index=0)
+        self.assertEqual(len({tuple(sorted(p.question.split()[:4])) for p in puzzles}), 200)
+
+    def test_deterministic_across_workers(self):
+        """测试同样的种子无论进程数多少都得到同样的卷子"""
+        inline = list(generate_sheets("24", 1234, sheet_size=30, seed=7, workers=1))
+        parallel = list(generate_sheets("24", 1234, sheet_size=30, seed=7, workers=2))
+        self.assertEqual(inline, parallel)
+        self.assertEqual(len(inline), 42)
+        self.assertEqual(len(inline[-1]), 4)
+        self.assertNotEqual(inline, list(generate_sheets("24", 1234, sheet_size=30, seed=8, workers=1)))
+
+    def test_write_csv(self):
+        """测试题目和答案分别写入文件"""
+        questions, answers = write_worksheets(os.path.join(self.out_dir, "sheet"), "quick", 120,
+                                              sheet_size=50, workers=1)
+        with open(questions, encoding='utf-8-sig') as f:
+            rows = list(csv.reader(f))
+        with open(answers, encoding='utf-8-sig') as f:
+            answer_rows = list(csv.reader(f))
+        self.assertEqual(len(rows), 121)
+        self.assertEqual(len(answer_rows), 121)
+        self.assertEqual(rows[-1][:2], ["3", "20"])
+        question = rows[1][3].replace(" = ?", "")
+        self.assertEqual(eval(question), float(answer_rows[1][2]))
+
+    def test_invalid_arguments(self):
+        """测试参数错误时抛出 ValueError，且不会留下输出文件"""
+        cases = (("snake", "html", 50, None), ("snake", "csv", 50, None), ("quick", "pdf", 50, None),
+                 ("quick", "csv", 0, None), ("quick", "csv", 10, {4: 1}), ("quick", "html", 10, {1: 0}))
+        for kind, fmt, size, mix in cases:
+            with self.assertRaises(ValueError):
+                write_worksheets(os.path.join(self.out_dir, "bad"), kind, 10, sheet_size=size, mix=mix, fmt=fmt,
+                                 workers=1)
+        self.assertEqual(os.listdir(self.out_dir), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -3,6 +3,7 @@ from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QPushButton,
 from PyQt5.QtCore import Qt, pyqtSignal, QPropertyAnimation, QRect
 from PyQt5.QtGui import QFont, QPixmap
 from core.calculator_engine import CalculatorEngine
+from core.event_bus import CalculationDone
 
 
 class CuteButton(QPushButton):
@@ -74,9 +75,10 @@ class CalculatorWidget(QWidget):
 
     switch_to_game = pyqtSignal(str)
 
-    def __init__(self, parent=None):
+    def __init__(self, parent=None, history_manager=None, event_bus=None):
         super().__init__(parent)
-        self.calculator = CalculatorEngine()
+        self.calculator = CalculatorEngine(history_manager)
+        self.event_bus = event_bus
         self.init_ui()
 
         # 背景样式
@@ -272,6 +274,8 @@ class CalculatorWidget(QWidget):
                 if isinstance(result, float) and result.is_integer():
                     result = int(result)
                 self.result_display.setText(f"✅ {result}")
+                if self.event_bus:
+                    self.event_bus.publish(CalculationDone())
         elif text == 'C':
             self.calculator.clear_expression()
             self.expression_display.clear()
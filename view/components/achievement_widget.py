@@ -1,9 +1,147 @@
 from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout,
-                             QLabel, QPushButton, QScrollArea,
-                             QFrame, QGridLayout)
+                             QLabel, QPushButton, QListView,
+                             QStyledItemDelegate, QStyle)
 from PyQt5 import QtCore
-from PyQt5.QtCore import Qt
-from PyQt5.QtGui import QFont
+from PyQt5.QtCore import (Qt, QAbstractListModel, QModelIndex,
+                          QSortFilterProxyModel, QSize, QRectF)
+from PyQt5.QtGui import QFont, QColor, QPainter, QPen
+
+# 自定义数据角色
+ICON_ROLE = Qt.UserRole + 1
+DESCRIPTION_ROLE = Qt.UserRole + 2
+CATEGORY_ROLE = Qt.UserRole + 3
+UNLOCKED_ROLE = Qt.UserRole + 4
+PROGRESS_ROLE = Qt.UserRole + 5
+TOTAL_ROLE = Qt.UserRole + 6
+
+CARD_SIZE = QSize(220, 150)
+
+
+class AchievementListModel(QAbstractListModel):
+    """成就列表模型，刷新时只对状态发生变化的成就发出 dataChanged"""
+
+    ROLE_KEYS = {
+        Qt.DisplayRole: "title",
+        ICON_ROLE: "icon",
+        DESCRIPTION_ROLE: "description",
+        CATEGORY_ROLE: "category",
+        UNLOCKED_ROLE: "unlocked",
+        PROGRESS_ROLE: "progress",
+        TOTAL_ROLE: "total",
+    }
+
+    def __init__(self, achievement_system, parent=None):
+        super().__init__(parent)
+        self.achievement_system = achievement_system
+        self._ids = []
+        self._entries = {}
+        self.refresh()
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._ids)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid() or role not in self.ROLE_KEYS:
+            return None
+        entry = self._entries[self._ids[index.row()]]
+        return entry.get(self.ROLE_KEYS[role])
+
+    def set_achievement_system(self, achievement_system):
+        """切换档案时更换数据来源，整体重置"""
+        self.achievement_system = achievement_system
+        self.refresh(reset=True)
+
+    def refresh(self, reset=False):
+        """从成就系统读取最新状态，与缓存比较后只通知变化的行；reset 为真时整体重置"""
+        system = self.achievement_system
+        entries = {}
+        for ach in system.get_unlocked_achievements():
+            entries[ach["id"]] = {**ach, "progress": 0, "total": 0}
+        for ach in system.get_locked_achievements():
+            entries[ach["id"]] = ach
+        ids = [ach_id for ach_id in system.achievement_definitions if ach_id in entries]
+
+        if reset or ids != self._ids:
+            # 换了档案，或成就列表本身变了（例如更换了定义文件），整体重置
+            self.beginResetModel()
+            self._ids = ids
+            self._entries = entries
+            self.endResetModel()
+            return
+
+        for row, ach_id in enumerate(ids):
+            if entries[ach_id] != self._entries[ach_id]:
+                self._entries[ach_id] = entries[ach_id]
+                index = self.index(row)
+                self.dataChanged.emit(index, index)
+
+
+class AchievementDelegate(QStyledItemDelegate):
+    """绘制成就卡片：图标、标题、描述和进度"""
+
+    def sizeHint(self, option, index):
+        return CARD_SIZE
+
+    def paint(self, painter, option, index):
+        painter.save()
+        painter.setRenderHint(QPainter.Antialiasing)
+
+        unlocked = index.data(UNLOCKED_ROLE)
+        rect = QRectF(option.rect).adjusted(5, 5, -5, -5)
+
+        # 卡片背景
+        background = QColor("#fff4d6") if unlocked else QColor("#f0f0f0")
+        if option.state & QStyle.State_MouseOver:
+            background = background.darker(105)
+        painter.setPen(QPen(QColor("#f39c12") if unlocked else QColor("#d0d0d0"), 2))
+        painter.setBrush(background)
+        painter.drawRoundedRect(rect, 8, 8)
+
+        # 图标（未解锁时淡化）
+        painter.setOpacity(1.0 if unlocked else 0.4)
+        painter.setFont(QFont("Arial", 24))
+        icon_rect = QRectF(rect.left(), rect.top() + 5, rect.width(), 40)
+        painter.drawText(icon_rect, Qt.AlignCenter, index.data(ICON_ROLE) or "")
+        painter.setOpacity(1.0)
+
+        # 标题
+        painter.setPen(QColor("#2c3e50"))
+        painter.setFont(QFont("Arial", 12, QFont.Bold))
+        title_rect = QRectF(rect.left() + 8, rect.top() + 45, rect.width() - 16, 22)
+        painter.drawText(title_rect, Qt.AlignCenter, index.data(Qt.DisplayRole) or "")
+
+        # 描述
+        painter.setPen(QColor("#555555"))
+        painter.setFont(QFont("Arial", 9))
+        desc_rect = QRectF(rect.left() + 8, rect.top() + 68, rect.width() - 16, 32)
+        painter.drawText(desc_rect, Qt.AlignHCenter | Qt.AlignTop | Qt.TextWordWrap,
+                         index.data(DESCRIPTION_ROLE) or "")
+
+        # 解锁状态或进度条
+        status_rect = QRectF(rect.left() + 15, rect.bottom() - 28, rect.width() - 30, 16)
+        total = index.data(TOTAL_ROLE) or 0
+        if unlocked:
+            painter.setPen(QColor("#28a745"))
+            painter.setFont(QFont("Arial", 10, QFont.Bold))
+            painter.drawText(status_rect, Qt.AlignCenter, "已解锁")
+        elif total:
+            progress = index.data(PROGRESS_ROLE) or 0
+            painter.setPen(Qt.NoPen)
+            painter.setBrush(QColor("#dddddd"))
+            painter.drawRoundedRect(status_rect, 6, 6)
+            filled = QRectF(status_rect)
+            filled.setWidth(status_rect.width() * progress / total)
+            painter.setBrush(QColor("#3498db"))
+            painter.drawRoundedRect(filled, 6, 6)
+            painter.setPen(QColor("#2c3e50"))
+            painter.setFont(QFont("Arial", 8))
+            painter.drawText(status_rect, Qt.AlignCenter, f"{progress}/{total}")
+        else:
+            painter.setPen(QColor("#6c757d"))
+            painter.setFont(QFont("Arial", 10))
+            painter.drawText(status_rect, Qt.AlignCenter, "未解锁")
+
+        painter.restore()
 
 
 class AchievementWidget(QWidget):
@@ -12,9 +150,18 @@ class AchievementWidget(QWidget):
 
     def __init__(self, achievement_system):
         super().__init__()
-        self.achievement_system = achievement_system
+        self._achievement_system = achievement_system
         self.init_ui()
 
+    @property
+    def achievement_system(self):
+        return self._achievement_system
+
+    @achievement_system.setter
+    def achievement_system(self, achievement_system):
+        self._achievement_system = achievement_system
+        self.model.set_achievement_system(achievement_system)
+
     def init_ui(self):
         """初始化界面"""
         main_layout = QVBoxLayout(self)
@@ -27,41 +174,38 @@ class AchievementWidget(QWidget):
 
         # 成就分类标签
         categories_layout = QHBoxLayout()
-
-        calculator_btn = QPushButton("计算器")
-        calculator_btn.setFont(QFont("Arial", 12))
-        categories_layout.addWidget(calculator_btn)
-
-        twentyfour_btn = QPushButton("二十四点")
-        twentyfour_btn.setFont(QFont("Arial", 12))
-        categories_layout.addWidget(twentyfour_btn)
-
-        snake_btn = QPushButton("贪吃蛇")
-        snake_btn.setFont(QFont("Arial", 12))
-        categories_layout.addWidget(snake_btn)
-
-        tetris_btn = QPushButton("俄罗斯方块")
-        tetris_btn.setFont(QFont("Arial", 12))
-        categories_layout.addWidget(tetris_btn)
-
-        quickmath_btn = QPushButton("速算挑战")
-        quickmath_btn.setFont(QFont("Arial", 12))
-        categories_layout.addWidget(quickmath_btn)
-
-        all_btn = QPushButton("全部")
-        all_btn.setFont(QFont("Arial", 12))
-        categories_layout.addWidget(all_btn)
+        categories = [
+            ("计算器", "calculator"),
+            ("二十四点", "twentyfour"),
+            ("贪吃蛇", "snake"),
+            ("俄罗斯方块", "tetris"),
+            ("速算挑战", "quickmath"),
+            ("全部", None),
+        ]
+        for text, category in categories:
+            btn = QPushButton(text)
+            btn.setFont(QFont("Arial", 12))
+            btn.clicked.connect(lambda checked, c=category: self.filter_category(c))
+            categories_layout.addWidget(btn)
 
         main_layout.addLayout(categories_layout)
 
-        # 成就列表
-        scroll_area = QScrollArea()
-        scroll_area.setWidgetResizable(True)
-        achievements_container = QWidget()
-        self.achievements_layout = QGridLayout(achievements_container)
-
-        scroll_area.setWidget(achievements_container)
-        main_layout.addWidget(scroll_area, 1)
+        # 成就列表（模型/视图，卡片由委托绘制）
+        self.model = AchievementListModel(self._achievement_system, self)
+        self.proxy_model = QSortFilterProxyModel(self)
+        self.proxy_model.setSourceModel(self.model)
+        self.proxy_model.setFilterRole(CATEGORY_ROLE)
+
+        self.list_view = QListView()
+        self.list_view.setViewMode(QListView.IconMode)
+        self.list_view.setResizeMode(QListView.Adjust)
+        self.list_view.setMovement(QListView.Static)
+        self.list_view.setUniformItemSizes(True)
+        self.list_view.setGridSize(CARD_SIZE)
+        self.list_view.setMouseTracking(True)
+        self.list_view.setItemDelegate(AchievementDelegate(self.list_view))
+        self.list_view.setModel(self.proxy_model)
+        main_layout.addWidget(self.list_view, 1)
 
         # 返回按钮
         back_btn = QPushButton("返回计算器")
@@ -69,75 +213,15 @@ class AchievementWidget(QWidget):
         back_btn.clicked.connect(self.back_to_calculator.emit)
         main_layout.addWidget(back_btn)
 
-        # 加载成就
-        self.load_achievements()
+    def filter_category(self, category):
+        """按类别筛选成就，None 表示全部"""
+        pattern = QtCore.QRegExp(f"^{category}$") if category else QtCore.QRegExp("")
+        self.proxy_model.setFilterRegExp(pattern)
+
+    def update_achievements(self):
+        """刷新成就状态（只重绘发生变化的卡片）"""
+        self.model.refresh()
 
     def load_achievements(self):
-        """加载并显示所有成就，添加类型验证"""
-        # 清除现有成就
-        while self.achievements_layout.count():
-            item = self.achievements_layout.takeAt(0)
-            widget = item.widget()
-            if widget:
-                widget.deleteLater()
-
-        # 获取所有成就并确保是列表
-        achievements = self.achievement_system.achievements
-        if not isinstance(achievements, list):
-            achievements = []
-
-        row = 0
-        col = 0
-
-        for ach in achievements:
-            # 验证成就项是否为字典且包含必要字段
-            if not isinstance(ach, dict) or not all(key in ach for key in ["icon", "title", "description", "unlocked"]):
-                continue  # 跳过无效的成就项
-
-            # 创建成就卡片
-            card = QFrame()
-            card.setStyleSheet("""
-                QFrame {
-                    background-color: #f0f0f0;
-                    border-radius: 8px;
-                    padding: 10px;
-                    margin: 5px;
-                }
-            """)
-            card_layout = QVBoxLayout(card)
-
-            # 成就图标和标题
-            icon_label = QLabel(ach["icon"])
-            icon_label.setFont(QFont("Arial", 24))
-            icon_label.setAlignment(Qt.AlignCenter)
-
-            title_label = QLabel(ach["title"])
-            title_label.setFont(QFont("Arial", 14, QFont.Bold))
-            title_label.setAlignment(Qt.AlignCenter)
-
-            # 成就描述
-            desc_label = QLabel(ach["description"])
-            desc_label.setFont(QFont("Arial", 10))
-            desc_label.setWordWrap(True)
-
-            # 解锁状态
-            status = "已解锁" if ach["unlocked"] else "未解锁"
-            status_color = "#28a745" if ach["unlocked"] else "#6c757d"
-            status_label = QLabel(status)
-            status_label.setStyleSheet(f"color: {status_color};")
-            status_label.setAlignment(Qt.AlignCenter)
-
-            # 添加到卡片布局
-            card_layout.addWidget(icon_label)
-            card_layout.addWidget(title_label)
-            card_layout.addWidget(desc_label)
-            card_layout.addWidget(status_label)
-
-            # 添加到网格布局
-            self.achievements_layout.addWidget(card, row, col)
-
-            # 控制网格布局的行列
-            col += 1
-            if col >= 3:
-                col = 0
-                row += 1
+        """兼容旧接口"""
+        self.update_achievements()
@@ -0,0 +1,64 @@
+from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QLabel, QPushButton,
+                             QTabWidget, QTableWidget, QTableWidgetItem, QHeaderView)
+from PyQt5 import QtCore
+from PyQt5.QtCore import Qt
+from PyQt5.QtGui import QFont
+
+GAME_TITLES = {
+    "snake": "贪吃蛇",
+    "tetris": "俄罗斯方块",
+    "quickmath": "速算挑战"
+}
+
+
+class LeaderboardWidget(QWidget):
+    """排行榜界面，直接显示内存中的前K名，不需要扫描历史记录"""
+    back_to_calculator = QtCore.pyqtSignal()  # 返回计算器的信号
+
+    def __init__(self, leaderboards):
+        super().__init__()
+        self.leaderboards = leaderboards
+        self.tables = {}
+        self.init_ui()
+
+    def init_ui(self):
+        """初始化界面"""
+        main_layout = QVBoxLayout(self)
+
+        # 标题
+        title_label = QLabel("排行榜")
+        title_label.setFont(QFont("Arial", 18, QFont.Bold))
+        title_label.setAlignment(Qt.AlignCenter)
+        main_layout.addWidget(title_label)
+
+        # 每个游戏一个标签页
+        tabs = QTabWidget()
+        for game, title in GAME_TITLES.items():
+            table = QTableWidget(0, 4)
+            table.setHorizontalHeaderLabels(["名次", "名字", "分数", "日期"])
+            table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+            table.verticalHeader().setVisible(False)
+            table.setEditTriggers(QTableWidget.NoEditTriggers)
+            self.tables[game] = table
+            tabs.addTab(table, title)
+        main_layout.addWidget(tabs, 1)
+
+        # 返回按钮
+        back_btn = QPushButton("返回计算器")
+        back_btn.setFont(QFont("Arial", 14))
+        back_btn.clicked.connect(self.back_to_calculator.emit)
+        main_layout.addWidget(back_btn)
+
+        self.update_leaderboards()
+
+    def update_leaderboards(self):
+        """刷新所有排行榜"""
+        for game, table in self.tables.items():
+            entries = self.leaderboards.top(game)
+            table.setRowCount(len(entries))
+            for row, entry in enumerate(entries):
+                values = [str(row + 1), entry["name"], str(entry["score"]), entry["date"].replace("T", " ")]
+                for col, value in enumerate(values):
+                    item = QTableWidgetItem(value)
+                    item.setTextAlignment(Qt.AlignCenter)
+                    table.setItem(row, col, item)
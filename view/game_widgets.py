@@ -4,21 +4,25 @@ from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QPushButton,
 from PyQt5.QtCore import Qt, pyqtSignal, QTimer, QRect, QPoint
 from PyQt5.QtGui import QFont, QPainter, QBrush, QColor, QPen, QKeyEvent, QImage, QPixmap
 import sys
+import math
 import random
+import time
 import pygame  # 新增：确保导入pygame
 from games.twenty_four_game import TwentyFourGame
-from games.snake_game import SnakeGame
+from games.snake_core import SnakeSimulation
 from games.quick_math import QuickMathGame
 from games.teris_game import TetrisGame  # 修正：正确导入俄罗斯方块类
+from core.event_bus import AnswerCorrect, GameStarted, GameWon, ScoreReported, SessionFinished
+from core.prefetch import PrefetchQueue
 
 
 class GameBaseWidget(QWidget):
     """游戏界面基类，包含通用功能"""
     back_to_calculator = pyqtSignal()
 
-    def __init__(self, achievement_system, parent=None):
+    def __init__(self, event_bus, parent=None):
         super().__init__(parent)
-        self.achievement_system = achievement_system
+        self.event_bus = event_bus  # 成就事件总线，统计更新在后台线程处理
         self.init_ui()  # 父类初始化时调用UI初始化
 
     def init_ui(self):
@@ -61,10 +65,12 @@ class GameBaseWidget(QWidget):
 class TwentyFourGameWidget(GameBaseWidget):
     """二十四点游戏界面"""
 
-    def __init__(self, achievement_system, parent=None):
+    def __init__(self, event_bus, parent=None):
         self.game = TwentyFourGame()
         self.current_numbers = []
-        super().__init__(achievement_system, parent)  # 调用父类初始化
+        # 后台预先准备好题目，点"新题目"时不用等待求解
+        self.prefetch = PrefetchQueue(self.game.make_puzzle, name="twentyfour-prefetch")
+        super().__init__(event_bus, parent)  # 调用父类初始化
 
     def init_ui(self):
         main_layout = QVBoxLayout(self)
@@ -138,8 +144,14 @@ class TwentyFourGameWidget(GameBaseWidget):
         self.answer_input = QLineEdit()
         self.answer_input.setFont(QFont("Arial", 16))
         self.answer_input.setStyleSheet("padding: 10px; border-radius: 5px; border: 2px solid #bdc3c7;")
+        self.answer_input.textChanged.connect(self.update_progress)
         input_layout.addWidget(self.answer_input)
 
+        # 边输入边提示：还能不能算出24
+        self.progress_label = QLabel("")
+        self.progress_label.setFont(QFont("Arial", 12))
+        input_layout.addWidget(self.progress_label)
+
         # 按钮区域
         buttons_layout = QHBoxLayout()
 
@@ -214,13 +226,23 @@ class TwentyFourGameWidget(GameBaseWidget):
     def set_difficulty(self, difficulty: int):
         """设置游戏难度"""
         self.game.difficulty = difficulty
+        self.prefetch.set_difficulty(difficulty)
         # 更新按钮状态
         for i, btn in enumerate(self.difficulty_buttons):
             btn.setChecked(i + 1 == difficulty)
 
     def generate_new_game(self):
         """生成新的游戏题目"""
-        self.current_numbers = self.game.generate_numbers(self.game.difficulty)
+        # 放弃的题目（尝试过但没解出）也记入进度数据
+        if getattr(self, "attempts", 0) and not self.solved:
+            self.event_bus.publish(SessionFinished("twentyfour", attempts=self.attempts,
+                                                   avg_response_ms=self.elapsed_ms() / self.attempts))
+        self.attempts = 0
+        self.solved = False
+        self.puzzle_started = time.monotonic()
+
+        self.game.set_puzzle(*self.prefetch.get())
+        self.current_numbers = self.game.numbers
         # 更新数字显示
         for i, num in enumerate(self.current_numbers):
             self.number_labels[i].setText(str(num))
@@ -231,7 +253,7 @@ class TwentyFourGameWidget(GameBaseWidget):
         self.solution_label.setText("")
 
         # 更新统计
-        self.achievement_system.update_stat("twentyfour_games_played")
+        self.event_bus.publish(GameStarted("twentyfour"))
 
     def check_answer(self):
         """检查用户答案"""
@@ -242,6 +264,13 @@ class TwentyFourGameWidget(GameBaseWidget):
             return
 
         is_correct, message = self.game.check_answer(user_answer)
+        if not self.solved:
+            self.attempts += 1
+
+        if is_correct and not self.solved:
+            self.solved = True
+            self.event_bus.publish(SessionFinished("twentyfour", score=1, correct=1, attempts=self.attempts,
+                                                   avg_response_ms=self.elapsed_ms() / self.attempts))
 
         if is_correct:
             self.feedback_label.setText(f"正确! {message}")
@@ -251,30 +280,78 @@ class TwentyFourGameWidget(GameBaseWidget):
             # 显示正确答案
             self.solution_label.setText(f"一种解法: {self.game.get_solution()}")
             # 更新成就系统
-            self.achievement_system.update_stat("twentyfour_games_won")
+            self.event_bus.publish(GameWon("twentyfour"))
         else:
             self.feedback_label.setText(f"不正确: {message}")
             self.feedback_label.setStyleSheet("color: #e74c3c; text-align: center;")
 
+    def elapsed_ms(self) -> float:
+        """当前题目已用时间（毫秒）"""
+        return (time.monotonic() - self.puzzle_started) * 1000
+
+    def update_progress(self, text: str):
+        """每次输入变化时检查剩下的数字还能否算出24"""
+        progress = self.game.check_progress(text)
+        colors = {"reachable": "#2ecc71", "solved": "#2ecc71", "unreachable": "#e74c3c", "invalid": "#f39c12"}
+        self.progress_label.setText(progress.message)
+        self.progress_label.setStyleSheet(f"color: {colors.get(progress.status, '#7f8c8d')};")
+
     def show_hint(self):
-        """显示提示"""
-        hint = self.game.get_hint()
+        """显示提示：已经开始输入时给出下一步可以怎么算"""
+        text = self.answer_input.text()
+        progress = self.game.check_progress(text)
+        if text.strip() and progress.hint is not None:
+            hint = f"下一步可以算 {progress.hint}"
+        elif progress.status == "unreachable":
+            hint = progress.message
+        else:
+            hint = self.game.get_hint()
         self.feedback_label.setText(f"提示: {hint}")
         self.feedback_label.setStyleSheet("color: #f39c12; text-align: center;")
 
 
+class SnakeCanvas(QWidget):
+    """用 QPainter 直接绘制贪吃蛇棋盘"""
+
+    CELL_SIZE = 25  # 每个格子的像素数
+
+    def __init__(self, game: SnakeSimulation, parent=None):
+        super().__init__(parent)
+        self.game = game
+        self.setFixedSize(game.width * self.CELL_SIZE, game.height * self.CELL_SIZE)
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        painter.fillRect(self.rect(), QColor("#f0f0f0"))
+        size = self.CELL_SIZE
+        painter.setPen(QPen(QColor("#333333"), 1))
+        for i, cell in enumerate(self.game.body):
+            x, y = self.game.cell_xy(cell)
+            painter.setBrush(QBrush(QColor("#1e8449" if i == 0 else "#2ecc71")))
+            painter.drawRect(x * size, y * size, size - 1, size - 1)
+        if self.game.food is not None:
+            x, y = self.game.cell_xy(self.game.food)
+            painter.setBrush(QBrush(QColor("#e74c3c")))
+            painter.drawEllipse(x * size + 2, y * size + 2, size - 5, size - 5)
+        painter.setBrush(Qt.NoBrush)
+        painter.setPen(QPen(QColor("#333333"), 2))
+        painter.drawRect(self.rect().adjusted(1, 1, -1, -1))
+        painter.end()
+
+
 class SnakeGameWidget(GameBaseWidget):
-    """贪吃蛇游戏界面（已修复父类初始化问题）"""
+    """贪吃蛇游戏界面：定时器驱动 SnakeSimulation，棋盘用 QPainter 绘制"""
 
-    def __init__(self, achievement_system, parent=None):
+    def __init__(self, event_bus, parent=None):
         # 1. 初始化自身属性
-        self.game = SnakeGame(width=20, height=15)
+        self.game = SnakeSimulation(width=20, height=15)
+        self.running = False
+        self.next_direction = None  # 两次前进之间最后按下的方向
         self.timer = QTimer()
-        self.timer_interval = 200  # 初始速度（毫秒/帧）
-        self.game.need_check = False  # 关闭验证，直接启动
+        self.timer_interval = 200  # 初始速度（毫秒/步）
 
-        # 2. 关键修复：调用父类初始化方法（必须在属性初始化后调用）
-        super().__init__(achievement_system, parent)
+        # 2. 调用父类初始化方法（必须在属性初始化后调用）
+        super().__init__(event_bus, parent)
 
         # 3. 连接定时器信号（在父类初始化后执行）
         self.timer.timeout.connect(self.update_game)
@@ -283,6 +360,7 @@ class SnakeGameWidget(GameBaseWidget):
         main_layout = QVBoxLayout(self)
         main_layout.setSpacing(15)
         main_layout.setContentsMargins(20, 20, 20, 20)
+        self.setFocusPolicy(Qt.StrongFocus)
 
         # 添加标题栏
         header_layout = self.create_game_header("数学贪吃蛇")
@@ -299,13 +377,8 @@ class SnakeGameWidget(GameBaseWidget):
         status_layout.addWidget(self.length_label)
         main_layout.addLayout(status_layout)
 
-        # Pygame画布（关键：将Pygame画面嵌入PyQt）
-        self.game_canvas = QFrame()
-        self.game_canvas.setFixedSize(
-            self.game.grid_width * 25,  # 每个格子25像素
-            self.game.grid_height * 25
-        )
-        self.game_canvas.setStyleSheet("background-color: #f0f0f0; border: 2px solid #333;")
+        # 棋盘
+        self.game_canvas = SnakeCanvas(self.game)
         main_layout.addWidget(self.game_canvas)
 
         # 控制按钮
@@ -315,78 +388,86 @@ class SnakeGameWidget(GameBaseWidget):
         self.reset_btn = QPushButton("重置")
         for btn in [self.start_btn, self.pause_btn, self.reset_btn]:
             btn.setFont(QFont("Arial", 14))
+            btn.setFocusPolicy(Qt.NoFocus)  # 方向键留给棋盘
             control_layout.addWidget(btn)
         self.start_btn.clicked.connect(self.start_game)
         self.pause_btn.clicked.connect(self.pause_game)
         self.reset_btn.clicked.connect(self.reset_game)
         main_layout.addLayout(control_layout)
 
-        # 初始化Pygame
-        pygame.init()
-        self.game_surface = pygame.Surface(
-            (self.game.grid_width * 25, self.game.grid_height * 25)
-        )
-
     def start_game(self):
-        self.game.running = True
+        self.running = True
+        self.session_recorded = False
         self.timer.start(self.timer_interval)
+        self.setFocus()
+        self.event_bus.publish(GameStarted("snake"))
+
+    def record_session(self):
+        """游戏结束时记录本局得分（每局只记录一次）"""
+        if self.game.game_over and not getattr(self, "session_recorded", True):
+            self.session_recorded = True
+            self.event_bus.publish(ScoreReported("snake", self.game.score))
+            self.event_bus.publish(SessionFinished("snake", score=self.game.score))
 
     def pause_game(self):
-        self.game.running = not self.game.running
-        if self.game.running:
+        self.running = not self.running
+        if self.running:
             self.timer.start(self.timer_interval)
         else:
             self.timer.stop()
 
     def reset_game(self):
         self.game.reset()
+        self.running = True
+        self.next_direction = None
+        self.session_recorded = False
+        self.update_labels()
+        self.game_canvas.update()
+        self.timer.start(self.timer_interval)
+
+    def update_labels(self):
         self.score_label.setText(f"分数: {self.game.score}")
         self.length_label.setText(f"长度: {self.game.snake_length}")
-        self.timer.start(self.timer_interval)
 
     def update_game(self):
-        """更新游戏状态并绘制到PyQt组件"""
-        if self.game.running:
-            self.game.update()  # 更新游戏逻辑
-            self.score_label.setText(f"分数: {self.game.score}")
-            self.length_label.setText(f"长度: {self.game.snake_length}")
-
-        # 绘制Pygame画面
-        self.game.draw(self.game_surface)  # 假设SnakeGame有draw方法
-        # 转换Pygame表面为PyQt图像
-        w, h = self.game_surface.get_size()
-        q_image = QImage(
-            self.game_surface.get_buffer().raw,
-            w, h, QImage.Format_RGB32
-        )
-        pixmap = QPixmap.fromImage(q_image)
-
-        # 绘制到Qt组件
-        painter = QPainter(self.game_canvas)
-        painter.drawPixmap(0, 0, pixmap)
-        painter.end()
+        """前进一步并重绘棋盘"""
+        if self.running and not self.game.game_over:
+            self.game.step(self.next_direction)
+            self.next_direction = None
+            self.update_labels()
+            self.record_session()
+            if self.game.game_over:
+                self.timer.stop()
+                self.feedback_game_over()
+        self.game_canvas.update()
+
+    def feedback_game_over(self):
+        """一局结束时提示结果"""
+        title = "你赢了！" if self.game.won else "游戏结束"
+        QMessageBox.information(self, title, f"最终分数: {self.game.score}")
 
     def keyPressEvent(self, event: QKeyEvent):
         """处理键盘事件（方向键控制）"""
         if event.key() == Qt.Key_Left:
-            self.game.change_direction("LEFT")
+            self.next_direction = "LEFT"
         elif event.key() == Qt.Key_Right:
-            self.game.change_direction("RIGHT")
+            self.next_direction = "RIGHT"
         elif event.key() == Qt.Key_Up:
-            self.game.change_direction("UP")
+            self.next_direction = "UP"
         elif event.key() == Qt.Key_Down:
-            self.game.change_direction("DOWN")
-        super().keyPressEvent(event)
+            self.next_direction = "DOWN"
+        else:
+            super().keyPressEvent(event)
 
 
 class TetrisGameWidget(GameBaseWidget):
     """俄罗斯方块游戏界面"""
 
-    def __init__(self, achievement_system, parent=None):
+    def __init__(self, event_bus, parent=None):
         self.game = TetrisGame()  # 初始化俄罗斯方块引擎
         self.timer = QTimer()
         self.timer.timeout.connect(self.update_game)
-        super().__init__(achievement_system, parent)  # 调用父类初始化
+        super().__init__(event_bus, parent)  # 调用父类初始化
 
     def init_ui(self):
         main_layout = QVBoxLayout(self)
@@ -441,6 +522,15 @@ class TetrisGameWidget(GameBaseWidget):
     def start_game(self):
         self.game.paused = False
         self.timer.start(int(self.game.fall_speed * 1000))  # 根据游戏速度调整定时器
+        self.session_recorded = False
+        self.event_bus.publish(GameStarted("tetris"))
+
+    def record_session(self):
+        """游戏结束时记录本局得分（每局只记录一次）"""
+        if self.game.game_over and not getattr(self, "session_recorded", True):
+            self.session_recorded = True
+            self.event_bus.publish(ScoreReported("tetris", self.game.score))
+            self.event_bus.publish(SessionFinished("tetris", score=self.game.score))
 
     def pause_game(self):
         self.game.toggle_pause()
@@ -451,6 +541,7 @@ class TetrisGameWidget(GameBaseWidget):
 
     def reset_game(self):
         self.game.reset()
+        self.session_recorded = False
         self.score_label.setText(f"分数: {self.game.score}")
         self.level_label.setText(f"等级: {self.game.level}")
         self.timer.start(int(self.game.fall_speed * 1000))
@@ -463,6 +554,7 @@ class TetrisGameWidget(GameBaseWidget):
             self.level_label.setText(f"等级: {self.game.level}")
             # 随等级提升加快速度
             self.timer.setInterval(int(self.game.fall_speed * 1000))
+            self.record_session()
 
         # 绘制游戏画面
         self.game_surface.fill((0, 0, 0))  # 黑色背景
@@ -503,12 +595,22 @@ class TetrisGameWidget(GameBaseWidget):
 class QuickMathGameWidget(GameBaseWidget):
     """速算挑战游戏界面"""
 
-    def __init__(self, achievement_system, parent=None):
-        self.game = QuickMathGame()  # 导入速算游戏核心逻辑
-        self.timer = QTimer()  # 用于计时
-        self.time_left = 10  # 初始答题时间（秒）
+    QUESTION_TIME_LIMIT = 10  # 每道题的答题时间（秒）
+
+    def __init__(self, event_bus, mastery=None, latency=None, parent=None):
+        # 导入速算游戏核心逻辑，有档案时按掌握度出题并统计答题用时
+        self.game = QuickMathGame(mastery, latency)
+        # 倒计时按截止时刻计算，计时器只负责在剩余秒数变化时刷新显示
+        self.timer = QTimer()
+        self.timer.setSingleShot(True)
+        self.timer.setTimerType(Qt.PreciseTimer)
+        self.time_left = self.QUESTION_TIME_LIMIT  # 剩余答题时间（秒）
+        self.deadline = 0.0
         self.score = 0  # 当前分数
-        super().__init__(achievement_system, parent)  # 调用父类初始化
+        # 没有掌握度模型时在后台预先准备好题目，第一次出题时才启动；
+        # 按掌握度出题要用到上一题的结果，不能提前生成，这时不启动预取线程
+        self.prefetch = None
+        super().__init__(event_bus, parent)  # 调用父类初始化
 
     def init_ui(self):
         main_layout = QVBoxLayout(self)
@@ -648,50 +750,71 @@ class QuickMathGameWidget(GameBaseWidget):
     def set_difficulty(self, difficulty: int):
         """设置游戏难度"""
         self.game.set_difficulty(difficulty)
+        if self.prefetch is not None:
+            self.prefetch.set_difficulty(self.game.difficulty)
         for i, btn in enumerate(self.difficulty_buttons):
             btn.setChecked(i + 1 == difficulty)
 
     def start_game(self):
         """开始游戏"""
+        self.finish_session()
+        self.session_correct = 0
+        self.session_attempts = 0
+        self.session_response_ms = 0.0
+        self.session_active = True
         self.score = 0
         self.score_label.setText(f"当前分数: {self.score}")
         self.start_btn.setEnabled(False)
         self.submit_btn.setEnabled(True)
         self.next_btn.setEnabled(True)
         self.generate_new_question()
-        self.achievement_system.update_stat("quickmath_games_played")
+        self.event_bus.publish(GameStarted("quickmath"))
 
     def generate_new_question(self):
         """生成新题目"""
-        self.time_left = 10  # 重置时间（简单难度10秒）
-        self.timer_label.setText(f"剩余时间: {self.time_left}秒")
         self.answer_input.clear()
         self.feedback_label.setText("")
 
-        # 生成题目
-        question, _ = self.game.generate_question()
-        self.question_label.setText(question)
+        # 有掌握度模型时按最值得练习的题族出题（选题只需 O(log n)），否则从预取队列取出题目
+        if self.game.scheduler is not None:
+            self.game.generate_question()
+        else:
+            if self.prefetch is None:
+                self.prefetch = PrefetchQueue(self.game.sampler.draw, difficulty=self.game.difficulty,
+                                              name="quickmath-prefetch")
+            self.game.set_question(*self.prefetch.get())
+        self.question_label.setText(self.game.current_question)
 
-        # 启动计时器
-        self.timer.start(1000)  # 每秒刷新一次
+        # 出题时刻和截止时刻都用单调的高精度时钟，倒计时不会因为计时器触发得晚而累积误差
+        self.question_shown_at = time.perf_counter()
+        self.deadline = self.question_shown_at + self.QUESTION_TIME_LIMIT
+        self.update_timer()
 
     def update_timer(self):
-        """更新计时器"""
-        self.time_left -= 1
+        """按截止时刻刷新剩余时间，并把下一次刷新安排在剩余秒数变化的时刻"""
+        remaining = self.deadline - time.perf_counter()
+        self.time_left = max(0, math.ceil(remaining))
         self.timer_label.setText(f"剩余时间: {self.time_left}秒")
 
-        if self.time_left <= 0:
+        if remaining > 0:
+            self.timer.start(int((remaining - (self.time_left - 1)) * 1000) + 1)
+        else:
             self.timer.stop()
+            self.game.give_up()
             self.feedback_label.setText(f"时间到！正确答案是: {self.game.get_correct_answer()}")
             self.feedback_label.setStyleSheet("color: #e74c3c;")
             self.submit_btn.setEnabled(False)
 
     def check_answer(self):
         """检查答案"""
+        submitted_at = time.perf_counter()
         if self.time_left <= 0:
             return
+        if submitted_at >= self.deadline:
+            # 计时器还没来得及触发也按超时处理
+            self.update_timer()
+            return
 
-        self.timer.stop()
         user_answer = self.answer_input.text().strip()
 
         if not user_answer:
@@ -699,16 +822,36 @@ class QuickMathGameWidget(GameBaseWidget):
             self.feedback_label.setStyleSheet("color: #f39c12;")
             return
 
-        if self.game.check_answer(user_answer):
+        self.timer.stop()
+        response_ms = (submitted_at - self.question_shown_at) * 1000
+        self.session_attempts += 1
+        self.session_response_ms += response_ms
+
+        if self.game.check_answer(user_answer, response_ms):
+            self.session_correct += 1
             # 答案正确
             self.feedback_label.setText("正确！太棒了！")
             self.feedback_label.setStyleSheet("color: #2ecc71;")
             self.score += 10 * self.game.difficulty  # 分数与难度挂钩
             self.score_label.setText(f"当前分数: {self.score}")
-            self.achievement_system.update_stat("quickmath_games_won")
+            self.event_bus.publish(AnswerCorrect("quickmath"))
         else:
             # 答案错误
             self.feedback_label.setText(f"不正确，正确答案是: {self.game.get_correct_answer()}")
             self.feedback_label.setStyleSheet("color: #e74c3c;")
 
-        self.submit_btn.setEnabled(False)
\ No newline at end of file
+        self.submit_btn.setEnabled(False)
+
+    def finish_session(self):
+        """结束本轮速算，把正确率和平均用时写入进度数据"""
+        if getattr(self, "session_active", False) and self.session_attempts:
+            self.event_bus.publish(SessionFinished(
+                "quickmath", score=self.score, correct=self.session_correct,
+                attempts=self.session_attempts,
+                avg_response_ms=self.session_response_ms / self.session_attempts))
+        self.session_active = False
+
+    def hideEvent(self, event):
+        """离开速算界面时结束本轮"""
+        self.finish_session()
+        super().hideEvent(event)
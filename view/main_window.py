@@ -1,19 +1,30 @@
 from PyQt5.QtWidgets import (QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
-                             QPushButton, QLabel, QStackedWidget, QTabWidget)
-from PyQt5.QtCore import Qt
+                             QPushButton, QLabel, QStackedWidget, QTabWidget,
+                             QComboBox, QInputDialog, QMessageBox)
+from PyQt5.QtCore import Qt, QObject, pyqtSignal
 from PyQt5.QtGui import QFont, QIcon
 from .calculator_widget import CalculatorWidget
 from .game_widgets import (TwentyFourGameWidget, SnakeGameWidget,
                            TetrisGameWidget, QuickMathGameWidget)
 from view.components.achievement_widget import AchievementWidget
+from view.components.leaderboard_widget import LeaderboardWidget
+from core.event_bus import AchievementEventBus
+from core.session_store import SessionStore
+from core.leaderboard import LeaderboardStore
+
+
+class AchievementNotifier(QObject):
+    """把事件总线后台线程中的成就解锁通知转发到 GUI 线程"""
+    unlocked = pyqtSignal(list)
 
 
 class MainWindow(QMainWindow):
     """应用程序主窗口"""
 
-    def __init__(self, achievement_system):
+    def __init__(self, achievement_system, profile_store=None):
         super().__init__()
         self.achievement_system = achievement_system
+        self.profile_store = profile_store
         self.init_ui()
 
     def init_ui(self):
@@ -36,17 +47,36 @@ class MainWindow(QMainWindow):
         self.stacked_widget = QStackedWidget()
         main_layout.addWidget(self.stacked_widget)
 
+        # 成就事件总线：游戏只发布事件，解锁通知通过排队信号回到 GUI 线程
+        self.notifier = AchievementNotifier()
+        self.notifier.unlocked.connect(self.on_achievements_unlocked, Qt.QueuedConnection)
+        if self.profile_store:
+            profile = self.profile_store.current()
+            session_store = profile.session_store
+            player_name = self.profile_store.profile_name(profile.profile_id)
+            self.leaderboards = LeaderboardStore(self.profile_store.data_dir)
+        else:
+            session_store = SessionStore()
+            player_name = ""
+            self.leaderboards = LeaderboardStore()
+        self.event_bus = AchievementEventBus(self.achievement_system, on_unlocked=self.notifier.unlocked.emit,
+                                             session_store=session_store, leaderboards=self.leaderboards,
+                                             player_name=player_name)
+
         # 创建计算器界面
-        self.calculator_widget = CalculatorWidget()
+        history_manager = self.profile_store.current().history_manager if self.profile_store else None
+        self.calculator_widget = CalculatorWidget(history_manager=history_manager, event_bus=self.event_bus)
         self.calculator_widget.switch_to_game.connect(self.switch_to_game)
         self.stacked_widget.addWidget(self.calculator_widget)
 
         # 创建游戏界面
         self.game_widgets = {
-            "二十四点": TwentyFourGameWidget(self.achievement_system),
-            "贪吃蛇": SnakeGameWidget(self.achievement_system),
-            "俄罗斯方块": TetrisGameWidget(self.achievement_system),
-            "速算挑战": QuickMathGameWidget(self.achievement_system)
+            "二十四点": TwentyFourGameWidget(self.event_bus),
+            "贪吃蛇": SnakeGameWidget(self.event_bus),
+            "俄罗斯方块": TetrisGameWidget(self.event_bus),
+            "速算挑战": QuickMathGameWidget(
+                self.event_bus, mastery=self.profile_store.current().mastery_model if self.profile_store else None,
+                latency=self.profile_store.current().latency_stats if self.profile_store else None)
         }
 
         # 将游戏界面添加到堆叠窗口
@@ -60,6 +90,11 @@ class MainWindow(QMainWindow):
         self.achievement_widget.back_to_calculator.connect(self.switch_to_calculator)
         self.stacked_widget.addWidget(self.achievement_widget)
 
+        # 创建排行榜界面
+        self.leaderboard_widget = LeaderboardWidget(self.leaderboards)
+        self.leaderboard_widget.back_to_calculator.connect(self.switch_to_calculator)
+        self.stacked_widget.addWidget(self.leaderboard_widget)
+
         # 底部导航栏
         nav_layout = QHBoxLayout()
         nav_layout.setContentsMargins(10, 10, 10, 10)
@@ -98,13 +133,103 @@ class MainWindow(QMainWindow):
         self.achievement_btn.clicked.connect(self.switch_to_achievements)
         nav_layout.addWidget(self.achievement_btn)
 
+        # 排行榜按钮
+        self.leaderboard_btn = QPushButton("排行榜")
+        self.leaderboard_btn.setFont(QFont("Arial", 12))
+        self.leaderboard_btn.setStyleSheet("""
+            QPushButton {
+                background-color: #27ae60;
+                color: white;
+                border-radius: 5px;
+                padding: 8px 15px;
+            }
+            QPushButton:hover {
+                background-color: #1e8449;
+            }
+        """)
+        self.leaderboard_btn.clicked.connect(self.switch_to_leaderboard)
+        nav_layout.addWidget(self.leaderboard_btn)
+
         nav_layout.addStretch()
 
+        # 档案切换（多个孩子共用一台电脑）
+        if self.profile_store:
+            self.profile_combo = QComboBox()
+            self.profile_combo.setFont(QFont("Arial", 12))
+            self.reload_profiles()
+            self.profile_combo.activated.connect(self.on_profile_selected)
+            nav_layout.addWidget(self.profile_combo)
+
+            new_profile_btn = QPushButton("新建档案")
+            new_profile_btn.setFont(QFont("Arial", 12))
+            new_profile_btn.clicked.connect(self.create_profile)
+            nav_layout.addWidget(new_profile_btn)
+
         main_layout.addLayout(nav_layout)
 
         # 默认显示计算器界面
         self.switch_to_calculator()
 
+    def reload_profiles(self):
+        """刷新档案下拉框（只用到索引中的元数据）"""
+        current_id = self.profile_store.index["current"]
+        self.profile_combo.clear()
+        for profile in self.profile_store.list_profiles():
+            self.profile_combo.addItem(profile["name"], profile["id"])
+        self.profile_combo.setCurrentIndex(self.profile_combo.findData(current_id))
+
+    def on_profile_selected(self, index: int):
+        """下拉框选择档案"""
+        self.switch_profile(self.profile_combo.itemData(index))
+
+    def create_profile(self):
+        """新建档案并切换过去"""
+        name, ok = QInputDialog.getText(self, "新建档案", "请输入名字:")
+        if not ok:
+            return
+        try:
+            profile_id = self.profile_store.create_profile(name)
+        except ValueError as e:
+            QMessageBox.warning(self, "新建档案", str(e))
+            return
+        self.switch_profile(profile_id)
+        self.reload_profiles()
+
+    def switch_profile(self, profile_id: str):
+        """
+        切换当前档案，已加载过的档案直接从缓存取出
+
+        参数:
+            profile_id: 档案ID
+        """
+        profile = self.profile_store.select(profile_id)
+        # 先处理完上一个档案的事件，再把总线指向新档案
+        self.event_bus.flush()
+        self.achievement_system = profile.achievement_system
+        self.event_bus.achievement_system = profile.achievement_system
+        self.event_bus.session_store = profile.session_store
+        self.event_bus.player_name = self.profile_store.profile_name(profile_id)
+        self.achievement_widget.achievement_system = profile.achievement_system
+        self.calculator_widget.calculator.history_manager = profile.history_manager
+        self.game_widgets["速算挑战"].game.use_mastery(profile.mastery_model)
+        self.game_widgets["速算挑战"].game.latency = profile.latency_stats
+        if self.stacked_widget.currentWidget() is self.achievement_widget:
+            self.achievement_widget.update_achievements()
+
+    def on_achievements_unlocked(self, ach_ids: list):
+        """在 GUI 线程中显示新解锁的成就"""
+        titles = [self.achievement_system.achievements[ach_id]["title"]
+                  for ach_id in ach_ids if ach_id in self.achievement_system.achievements]
+        if titles:
+            self.statusBar().showMessage(f"🏆 解锁成就: {'、'.join(titles)}", 5000)
+        if self.stacked_widget.currentWidget() is self.achievement_widget:
+            self.achievement_widget.update_achievements()
+
+    def closeEvent(self, event):
+        """关闭窗口前处理完所有待处理的游戏事件"""
+        self.event_bus.close()
+        super().closeEvent(event)
+
     def switch_to_calculator(self):
         """切换到计算器界面"""
         self.stacked_widget.setCurrentWidget(self.calculator_widget)
@@ -126,3 +251,9 @@ class MainWindow(QMainWindow):
         self.achievement_widget.update_achievements()
         self.stacked_widget.setCurrentWidget(self.achievement_widget)
         self.setWindowTitle("儿童益智计算器 - 我的成就")
+
+    def switch_to_leaderboard(self):
+        """切换到排行榜界面"""
+        self.leaderboard_widget.update_leaderboards()
+        self.stacked_widget.setCurrentWidget(self.leaderboard_widget)
+        self.setWindowTitle("儿童益智计算器 - 排行榜")